@@ -1,7 +1,12 @@
 import streamlit as st
 import streamlit.components.v1 as components
 
-# Create HTML with embedded Lightweight Charts using the ESM version from the CDN
+import chart_assets
+import chart_component
+
+# Create HTML with embedded Lightweight Charts. The self-hosted build is loaded
+# from the chart component's static files, the URL every chart iframe uses, so
+# the browser fetches it once instead of each render inlining it
 html_code = """
 <!DOCTYPE html>
 <html>
@@ -15,8 +20,9 @@ html_code = """
 </head>
 <body>
     <div id="container"></div>
-    <script type="module">
-        import { createChart } from 'https://cdn.jsdelivr.net/npm/lightweight-charts@4.2.1/+esm';
+    <!-- LIGHTWEIGHT_CHARTS -->
+    <script>
+        const { createChart } = LightweightCharts;
 
         // Set up chart options
         const chartOptions = { 
@@ -74,4 +80,5 @@ html_code = """
 """
 
 # Display the HTML chart in Streamlit
-components.html(html_code, height=650)
+components.html(html_code.replace('<!-- LIGHTWEIGHT_CHARTS -->', chart_assets.script_tag(chart_component.library_url())),
+                height=650)
@@ -0,0 +1,356 @@
+"""Read-through OHLCV bar cache: memory -> local Parquet -> network.
+
+``BarCache.get(symbol, interval, period)`` answers from the in-process memory
+tier until its entry expires (per data class, intraday sooner than daily) or
+is evicted; that tier is a byte-bounded ``memory_cache.MemoryCache``, which
+may be shared with other caches. Otherwise it loads the
+per-symbol/interval Parquet file from disk, asks the provider only for the
+bars after the last stored timestamp and appends them. The last stored bar is
+fetched again because it may still have been forming when it was saved.
+
+``version`` returns a token that changes whenever the bars ``get`` would
+return change, so results computed from them (see payload_cache.py) can be
+reused without copying the bars out again.
+
+Providers only need a ``history(symbol, interval, period=None, start=None)``
+method returning an OHLCV frame indexed by timestamp, so the Yahoo provider
+can be swapped for ``FakeProvider`` to run everything offline. Each provider's
+bars are stored in their own subdirectory (``provider_name``), so synthetic
+bars never overwrite real ones.
+"""
+import contextlib
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import memory_cache
+import metrics
+import multi_fetch
+from lazy_imports import lazy_import
+
+yf = lazy_import('yfinance')
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+DEFAULT_DIR = os.environ.get('BAR_CACHE_DIR', '.bar_cache')
+# Per-key locks are striped, so they don't grow with the number of symbols
+LOCK_STRIPES = 64
+
+# yfinance period strings -> lookback used to trim cached history
+PERIODS = {
+    'd': lambda n: pd.DateOffset(days=n),
+    'wk': lambda n: pd.DateOffset(weeks=n),
+    'mo': lambda n: pd.DateOffset(months=n),
+    'y': lambda n: pd.DateOffset(years=n),
+}
+
+
+def period_offset(period):
+    """``'6mo'`` -> ``DateOffset(months=6)``; ``None``/``'max'`` -> ``None``."""
+    if period in (None, 'max'):
+        return None
+    for suffix in sorted(PERIODS, key=len, reverse=True):
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return PERIODS[suffix](int(period[:-len(suffix)]))
+    raise ValueError(f"Unsupported period: {period!r}")
+
+
+def index_name(interval):
+    # Matches yfinance: daily and longer bars are indexed by 'Date'
+    return 'Date' if interval.endswith(('d', 'wk', 'mo')) else 'Datetime'
+
+
+class YahooProvider:
+    """Network tier backed by ``yf.Ticker(symbol).history``."""
+
+    name = 'yahoo'
+
+    def history(self, symbol, interval, period=None, start=None):
+        ticker = yf.Ticker(symbol)
+        if start is not None:
+            df = ticker.history(start=start, interval=interval)
+        else:
+            df = ticker.history(period=period or 'max', interval=interval)
+        return df[OHLCV]
+
+    def history_many(self, symbols, interval, period=None, start=None):
+        """One bulk ``yf.download`` for ``symbols``; returns ``{symbol: frame}``."""
+        kwargs = {'start': start} if start is not None else {'period': period or 'max'}
+        df = yf.download(
+            list(symbols), interval=interval, group_by='ticker',
+            auto_adjust=True, threads=False, progress=False, **kwargs,
+        )
+        present = set(df.columns.get_level_values(0))
+        return {
+            symbol: df[symbol][OHLCV].dropna(how='all')
+            for symbol in symbols if symbol in present
+        }
+
+
+def interval_freq(interval):
+    """yfinance interval string -> pandas frequency (``'5m'`` -> ``'5min'``)."""
+    for suffix, freq in (('mo', 'MS'), ('wk', 'W-MON'), ('m', 'min'), ('h', 'h'), ('d', 'D')):
+        if interval.endswith(suffix):
+            return f"{interval[:-len(suffix)]}{freq}"
+    raise ValueError(f"Unsupported interval: {interval!r}")
+
+
+class FakeProvider:
+    """Offline stand-in serving deterministic synthetic bars for any symbol.
+
+    Prices are a pure function of symbol and timestamp, so overlapping
+    requests agree bar for bar. ``now`` fixes the end of history and
+    ``calls`` records every request so tests can check what was asked for.
+    ``latency`` adds a per-request delay and the first ``fail_first``
+    requests raise ``ConnectionError``, to exercise retries.
+    """
+
+    name = 'fake'
+
+    def __init__(self, now=None, latency=0.0, fail_first=0):
+        self.now = now
+        self.latency = latency
+        self.fail_first = fail_first
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def history(self, symbol, interval, period=None, start=None):
+        with self._lock:
+            self.calls.append((symbol, interval, period, start))
+            failing = len(self.calls) <= self.fail_first
+        if self.latency:
+            time.sleep(self.latency)
+        if failing:
+            raise ConnectionError(f"Injected failure for {symbol}")
+        end = pd.Timestamp(self.now) if self.now is not None else pd.Timestamp.now(tz='UTC')
+        freq = interval_freq(interval)
+        end = end.floor('D') if freq.endswith(('D', 'MS', 'W-MON')) else end.floor(freq)
+        begin = pd.Timestamp(start) if start is not None else end - (period_offset(period) or pd.DateOffset(years=1))
+        index = pd.date_range(start=begin, end=end, freq=freq, name=index_name(interval))
+
+        # Cheap integer hash of (symbol, timestamp) -> [0, 1)
+        seconds = index.asi8 // 10**9 + sum(map(ord, symbol)) * 7919
+        noise = (seconds * 2654435761 % 2**32) / 2**32
+        close = 100.0 + 10.0 * noise
+        spread = close * 0.01 * noise
+        return pd.DataFrame({
+            'Open': close - spread / 2,
+            'High': close + spread,
+            'Low': close - spread,
+            'Close': close,
+            'Volume': (1_000_000 * noise).astype(np.int64),
+        }, index=index)
+
+
+def default_provider():
+    """Provider named by ``BAR_PROVIDER`` (``yahoo`` by default, or ``fake``)."""
+    name = os.environ.get('BAR_PROVIDER', 'yahoo')
+    if name == 'fake':
+        return FakeProvider()
+    if name == 'yahoo':
+        return YahooProvider()
+    raise ValueError(f"Unknown BAR_PROVIDER: {name!r}")
+
+
+def provider_name(provider):
+    """Subdirectory name for ``provider``'s bars (its ``name``, else its class name)."""
+    return getattr(provider, 'name', type(provider).__name__)
+
+
+class BarStore:
+    """One Parquet file per ``(symbol, interval)`` under ``root``."""
+
+    def __init__(self, root=DEFAULT_DIR):
+        self.root = root
+
+    def path(self, symbol, interval):
+        return os.path.join(self.root, f"{symbol.replace('/', '_')}_{interval}.parquet")
+
+    def read(self, symbol, interval):
+        path = self.path(symbol, interval)
+        if not os.path.exists(path):
+            return None
+        return pd.read_parquet(path)
+
+    def write(self, symbol, interval, df):
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(symbol, interval)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        os.close(fd)
+        try:
+            df.to_parquet(tmp)
+            os.replace(tmp, path)  # readers never see a half-written file
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+
+def merge_bars(stored, fresh):
+    """Append ``fresh`` to ``stored``; fresh rows win on duplicate timestamps."""
+    if stored is None or stored.empty:
+        return fresh.sort_index()
+    if fresh is None or fresh.empty:
+        return stored
+    merged = pd.concat([stored, fresh])
+    return merged[~merged.index.duplicated(keep='last')].sort_index()
+
+
+class BarCache:
+    """Memory tier (``MemoryCache``) in front of a ``BarStore`` in front of a provider.
+
+    Memory entries are ``(bars, full)`` under ``('bars', symbol, interval)``.
+    """
+
+    def __init__(self, provider=None, store=None, memory=None):
+        self.provider = provider or default_provider()
+        self.store = store or BarStore(os.path.join(DEFAULT_DIR, provider_name(self.provider)))
+        self.memory = memory if memory is not None else memory_cache.MemoryCache()
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def _key_lock(self, key):
+        return self._locks[hash(key) % LOCK_STRIPES]
+
+    def _bars(self, symbol, interval, period):
+        # The memory tier's bars for the key, refreshed first if stale (not a copy)
+        key = ('bars', symbol, interval)
+        kind = memory_cache.data_class(interval)
+        with self._key_lock(key):
+            entry = self.memory.get(key, kind=kind, accept=lambda entry: self._serves(entry, period))
+            if entry is None:
+                entry = (self.refresh(symbol, interval, period), period == 'max')
+                self.memory.put(key, entry, kind)
+            else:
+                metrics.annotate(cache='hit')
+            return entry[0]
+
+    def get(self, symbol, interval='1d', period=None, columns=None):
+        """Bars for ``symbol``/``interval`` covering ``period``, as a fresh copy.
+
+        ``columns`` limits the copy to those columns.
+        """
+        df = trim_to_period(self._bars(symbol, interval, period), period)
+        return df.copy() if columns is None else df[list(columns)].copy()
+
+    def version(self, symbol, interval='1d', period=None):
+        """Token for the bars ``get`` would return; it changes whenever they do.
+
+        Refreshes like ``get`` but copies nothing. Stored bars only change by
+        appending bars and rewriting the last one (see ``refresh``), so the
+        row count, the first and last timestamps and the last row identify them.
+        The last row is compared by its bytes, so a NaN in it still matches.
+        The period's first bar is found by binary search on the sorted index
+        rather than by slicing like ``trim_to_period``.
+        """
+        df = self._bars(symbol, interval, period)
+        if df.empty:
+            return (0,)
+        offset = period_offset(period)
+        start = 0 if offset is None else int(df.index.searchsorted(df.index[-1] - offset))
+        return (len(df) - start, df.index[start], df.index[-1], last_row_bytes(df))
+
+    @staticmethod
+    def _serves(entry, period):
+        # entry[1] marks a full-history ('max') load
+        return entry[1] if period == 'max' else covers(entry[0], period)
+
+    def refresh(self, symbol, interval, period=None):
+        """Bring the disk tier up to date from the provider and return it."""
+        stored = self.store.read(symbol, interval)
+        if stored is None or stored.empty or not covers(stored, period):
+            metrics.annotate(cache='miss')
+            fresh = self.provider.history(symbol, interval, period=period)
+        else:
+            metrics.annotate(cache='partial')  # disk tier, topped up from the last bar
+            fresh = self.provider.history(symbol, interval, start=stored.index[-1])
+        bars = merge_bars(stored, fresh)
+        if fresh is not None and not fresh.empty:
+            self.store.write(symbol, interval, bars)
+        return bars
+
+    def get_many(self, symbols, interval='1d', period=None, **fetch_kwargs):
+        """``{symbol: bars}`` for many symbols, bulk-fetching only what memory can't serve.
+
+        Symbols already on disk are topped up from their oldest last bar;
+        the rest are fetched for ``period``. Symbols that fail to download are
+        left out. ``fetch_kwargs`` go to ``multi_fetch.fetch_many``.
+        """
+        kind = memory_cache.data_class(interval)
+        out, stale = self._from_memory(symbols, interval, period, kind)
+        # The same stripe locks as ``_bars``, taken in one order so two bulk loads can't deadlock
+        stripes = sorted({hash(('bars', symbol, interval)) % LOCK_STRIPES for symbol in stale})
+        with contextlib.ExitStack() as held:
+            for stripe in stripes:
+                held.enter_context(self._locks[stripe])
+            # Another session may have loaded some of them while we waited
+            served, stale = self._from_memory(stale, interval, period, kind)
+            out.update(served)
+
+            stored = {symbol: self.store.read(symbol, interval) for symbol in stale}
+            topped_up = [s for s in stale if stored[s] is not None and not stored[s].empty and covers(stored[s], period)]
+            missing = [s for s in stale if s not in topped_up]
+            fetched = {}
+            if topped_up:
+                start = min(stored[s].index[-1] for s in topped_up)
+                fetched.update(multi_fetch.fetch_many(topped_up, interval, start=start, provider=self.provider, aligned=False, **fetch_kwargs))
+            if missing:
+                fetched.update(multi_fetch.fetch_many(missing, interval, period=period, provider=self.provider, aligned=False, **fetch_kwargs))
+
+            for symbol, result in fetched.items():
+                if result.frame is None:
+                    if stored[symbol] is not None and not stored[symbol].empty:
+                        out[symbol] = stored[symbol]  # serve stale bars rather than nothing
+                    continue
+                bars = merge_bars(stored[symbol], result.frame)
+                self.store.write(symbol, interval, bars)
+                self.memory.put(('bars', symbol, interval), (bars, period == 'max'), kind)
+                out[symbol] = bars
+        return {symbol: trim_to_period(out[symbol], period).copy() for symbol in symbols if symbol in out}
+
+    def _from_memory(self, symbols, interval, period, kind):
+        # ``({symbol: bars}, [symbols memory can't serve])``
+        out, stale = {}, []
+        for symbol in symbols:
+            entry = self.memory.get(('bars', symbol, interval), kind=kind,
+                                    accept=lambda entry: self._serves(entry, period))
+            if entry is not None:
+                out[symbol] = entry[0]
+            else:
+                stale.append(symbol)
+        return out, stale
+
+    def invalidate(self, symbol=None, interval=None):
+        """Drop memory entries (all, per symbol or per symbol/interval)."""
+        self.memory.invalidate(lambda key: (
+            isinstance(key, tuple) and key[:1] == ('bars',)
+            and (symbol is None or key[1] == symbol) and (interval is None or key[2] == interval)
+        ))
+
+
+def last_row_bytes(df):
+    """The last row's values as float64 bytes (equal for equal rows, NaNs included)."""
+    return df.iloc[-1].to_numpy(dtype=np.float64).tobytes()
+
+
+def covers(df, period, slack=pd.Timedelta(days=7)):
+    """Whether stored bars reach back far enough to serve ``period``.
+
+    ``slack`` absorbs weekends and holidays at the start of the window.
+    ``period=None`` accepts whatever is stored; a ``'max'`` request is never
+    considered covered and refetches in full.
+    """
+    if period is None:
+        return not df.empty
+    offset = period_offset(period)
+    if offset is None:
+        return False
+    return df.index[0] <= df.index[-1] - offset + slack
+
+
+def trim_to_period(df, period):
+    offset = period_offset(period)
+    if offset is None or df.empty:
+        return df
+    return df[df.index >= df.index[-1] - offset]
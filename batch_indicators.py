@@ -0,0 +1,168 @@
+"""Vectorized indicators for many symbols at once on a (symbols x bars) matrix.
+
+Every function takes a 2D float array of closes, one row per symbol and one
+column per bar on a shared time axis, and returns arrays of the same shape.
+Recursive indicators (EMA, MACD, RSI) loop over bars but update all symbols
+in one NumPy operation per bar (EMA on a few long rows, e.g. one symbol's
+full intraday history, goes through pandas' compiled ``ewm`` instead); window
+indicators are fully vectorized.
+
+Rows may start with NaN padding (symbols with shorter history); each row is
+computed from its own first valid bar, matching pandas_ta on that symbol's
+series alone. Rows are expected to be gap-free after their first valid bar.
+Output names follow pandas_ta, and ``series_records`` turns any output row
+straight into chart records.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import serializers
+
+# Below this many rows the per-bar Python loop costs more than pandas' ewm
+EWM_MAX_ROWS = 64
+
+
+def frame_matrix(frames, column='Close'):
+    """Stack ``{symbol: DataFrame}`` into ``(times, symbols, matrix)``.
+
+    The time axis is the sorted union of all frame indexes; symbols missing a
+    bar get NaN.
+    """
+    symbols = list(frames)
+    times = None
+    for df in frames.values():
+        times = df.index if times is None else times.union(df.index)
+    matrix = np.full((len(symbols), len(times)), np.nan)
+    for row, symbol in enumerate(symbols):
+        df = frames[symbol]
+        matrix[row, times.get_indexer(df.index)] = df[column].to_numpy(dtype=np.float64)
+    return times, symbols, matrix
+
+
+def _left_align(matrix):
+    # Shift each row so its first valid bar sits in column 0
+    matrix = np.asarray(matrix, dtype=np.float64)
+    rows, n = matrix.shape
+    valid = ~np.isnan(matrix)
+    offsets = np.where(valid.any(axis=1), valid.argmax(axis=1), n)
+    cols = np.arange(n)[None, :] + offsets[:, None]
+    inside = cols < n
+    aligned = np.where(inside, matrix[np.arange(rows)[:, None], np.minimum(cols, n - 1)], np.nan)
+    return aligned, cols, inside
+
+
+def _restore(aligned, cols, inside):
+    out = np.full(aligned.shape, np.nan)
+    row_ids = np.broadcast_to(np.arange(aligned.shape[0])[:, None], aligned.shape)
+    out[row_ids[inside], cols[inside]] = aligned[inside]
+    return out
+
+
+def _ema_aligned(x, length):
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] < length:
+        return out
+    alpha = 2.0 / (length + 1)
+    prev = x[:, :length].mean(axis=1)  # pandas_ta seeds the EMA with an SMA
+    if x.shape[0] < EWM_MAX_ROWS:
+        seeded = x[:, length - 1:].copy()
+        seeded[:, 0] = prev
+        out[:, length - 1:] = pd.DataFrame(seeded.T).ewm(alpha=alpha, adjust=False).mean().to_numpy().T
+        return out
+    out[:, length - 1] = prev
+    for j in range(length, x.shape[1]):
+        prev = alpha * x[:, j] + (1 - alpha) * prev
+        out[:, j] = prev
+    return out
+
+
+def ema(closes, length):
+    """pandas_ta ``ema`` per row."""
+    aligned, cols, inside = _left_align(closes)
+    return _restore(_ema_aligned(aligned, length), cols, inside)
+
+
+def sma(closes, length):
+    """Simple moving average per row."""
+    closes = np.asarray(closes, dtype=np.float64)
+    out = np.full(closes.shape, np.nan)
+    if closes.shape[1] >= length:
+        out[:, length - 1:] = sliding_window_view(closes, length, axis=1).mean(axis=-1)
+    return out
+
+
+def macd(closes, fast=12, slow=26, signal=9):
+    """pandas_ta ``macd`` per row: ``{'MACD_f_s_g', 'MACDh_f_s_g', 'MACDs_f_s_g'}``."""
+    line = ema(closes, fast) - ema(closes, slow)
+    # ema() re-aligns, so the signal starts at each row's first valid MACD value
+    signal_line = ema(line, signal)
+    suffix = f"{fast}_{slow}_{signal}"
+    return {
+        f"MACD_{suffix}": line,
+        f"MACDh_{suffix}": line - signal_line,
+        f"MACDs_{suffix}": signal_line,
+    }
+
+
+def rsi(closes, length=14):
+    """pandas_ta ``rsi`` per row (``RSI_n``), using Wilder's adjusted EWM."""
+    aligned, cols, inside = _left_align(closes)
+    rows, n = aligned.shape
+    out = np.full(aligned.shape, np.nan)
+    change = np.diff(aligned, axis=1)
+    gains, losses = np.clip(change, 0, None), np.clip(-change, 0, None)
+    decay = 1 - 1.0 / length
+    gain = loss = np.zeros(rows)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for j in range(n - 1):
+            gain = gains[:, j] + decay * gain
+            loss = losses[:, j] + decay * loss
+            if j + 1 >= length:
+                out[:, j + 1] = 100.0 * gain / (gain + loss)
+    return _restore(out, cols, inside)
+
+
+def rolling_min_max(closes, window):
+    """``{'MIN_n', 'MAX_n'}`` over a trailing ``window`` per row."""
+    closes = np.asarray(closes, dtype=np.float64)
+    lows, highs = np.full(closes.shape, np.nan), np.full(closes.shape, np.nan)
+    if closes.shape[1] >= window:
+        windows = sliding_window_view(closes, window, axis=1)
+        lows[:, window - 1:] = windows.min(axis=-1)
+        highs[:, window - 1:] = windows.max(axis=-1)
+    return {f"MIN_{window}": lows, f"MAX_{window}": highs}
+
+
+def bbands(closes, length=20, std=2.0, ddof=0):
+    """pandas_ta ``bbands`` lower/mid/upper per row (``BBL``, ``BBM``, ``BBU``)."""
+    closes = np.asarray(closes, dtype=np.float64)
+    mid, width = np.full(closes.shape, np.nan), np.full(closes.shape, np.nan)
+    if closes.shape[1] >= length:
+        windows = sliding_window_view(closes, length, axis=1)
+        mid[:, length - 1:] = windows.mean(axis=-1)
+        width[:, length - 1:] = std * windows.std(axis=-1, ddof=ddof)
+    suffix = f"{length}_{float(std)}"
+    return {f"BBL_{suffix}": mid - width, f"BBM_{suffix}": mid, f"BBU_{suffix}": mid + width}
+
+
+def compute(closes, macd_params=(12, 26, 9), rsi_length=14, bbands_length=20, window=20):
+    """MACD, RSI, Bollinger bands and rolling min/max for every row in one pass."""
+    outputs = macd(closes, *macd_params)
+    outputs[f"RSI_{rsi_length}"] = rsi(closes, rsi_length)
+    outputs.update(bbands(closes, bbands_length))
+    outputs.update(rolling_min_max(closes, window))
+    return outputs
+
+
+def series_records(times, values, colors=None):
+    """Chart records for one output row; NaN warm-up bars become whitespace points.
+
+    Whitespace points (``{"time": t}``) keep the row on the same bars as the
+    price pane it is drawn under, so panes with synced time scales stay aligned.
+    """
+    values = np.asarray(values)
+    records = serializers.line_records(times, values, colors)
+    for i in np.flatnonzero(np.isnan(values)).tolist():
+        records[i] = {'time': records[i]['time']}
+    return records
@@ -0,0 +1,748 @@
+"""Micro-benchmarks for the chart data pipeline.
+
+Run ``python benchmarks.py`` for every benchmark, or name the ones to run,
+e.g. ``python benchmarks.py serialization``.
+
+``pipeline`` runs the dashboard's own pipeline functions
+(``build_multipane_series``, ``build_intraday_pyramid``,
+``build_intraday_series``) on synthetic GBM bars from 1e3 up to
+``--max-bars`` (1e7 at most) and reports their ``metrics`` stages plus the
+payload size. ``--json PATH`` writes the results of
+benchmarks that return them, tagged with the git commit, and
+``--compare OLD NEW`` prints the per-stage and memory-peak changes between two
+such files.
+
+``memory`` runs the dashboard's own chart functions under tracemalloc and
+checks their peak (and retained) traced memory against ``MEMORY_BUDGETS``;
+the run exits non-zero when a chart is over budget.
+
+``screener`` compares the MACD screener's chunks computed inline on the
+script thread with the same chunks on ``indicator_pool`` worker processes.
+``cache`` browses many symbols through a bar cache with a small memory cap
+and reports what it holds, evicts and serves.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import bar_cache
+import batch_indicators
+import chart_component
+import chart_spec
+import csv_ingest
+import frames
+import indicator_pool
+import live_feed
+import memory_cache
+import metrics
+import paging
+import pyramid
+import serializers
+import streaming_indicators
+import time_axis
+import transport
+
+
+def best_of(fn, repeat=3):
+    """Best wall time of ``repeat`` calls to ``fn``, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def synthetic_frame(n, seed=0):
+    """Daily OHLCV frame with ``n`` bars and a string ``time`` column."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = close * (1 + rng.normal(0, 0.002, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.003, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.003, n)))
+    dates = pd.date_range('1970-01-01', periods=n, freq='D')
+    return pd.DataFrame({
+        'time': time_axis.business_days(dates),
+        'open': open_, 'high': high, 'low': low, 'close': close,
+        'volume': rng.integers(1_000, 1_000_000, n).astype(np.float64),
+    })
+
+
+def gbm_ohlcv(n, seed=0, s0=100.0, mu=0.05, sigma=0.2, bar_seconds=60, start='2000-01-03'):
+    """``n`` bars of geometric Brownian motion (annual ``mu``/``sigma``) as an OHLCV frame.
+
+    Bars are ``bar_seconds`` apart from ``start`` on a ``datetime64[s]`` index
+    named ``Date``; opens gap from the previous close and highs/lows
+    extend past the body by a half-normal amount.
+    """
+    rng = np.random.default_rng(seed)
+    dt = bar_seconds / (252 * 6.5 * 3600)  # fraction of a trading year
+    shocks = rng.standard_normal((3, n))
+    close = s0 * np.exp(np.cumsum((mu - sigma**2 / 2) * dt + sigma * np.sqrt(dt) * shocks[0]))
+    open_ = np.r_[s0, close[:-1]] * np.exp(sigma * np.sqrt(dt) * 0.1 * shocks[1])
+    wick = np.abs(shocks[2]) * sigma * np.sqrt(dt) * 0.5
+    index = pd.DatetimeIndex(
+        np.datetime64(start, 's') + np.arange(n, dtype=np.int64) * bar_seconds, name='Date',
+    )
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) * (1 + wick),
+        'Low': np.minimum(open_, close) * (1 - wick),
+        'Close': close,
+        'Volume': np.round(rng.lognormal(8, 1, n)),
+    }, index=index)
+
+
+class Stages:
+    """Wall time per named stage: ``with stages('load'): ...``."""
+
+    def __init__(self):
+        self.seconds = {}
+
+    @contextlib.contextmanager
+    def __call__(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+
+def payload_bytes(charts):
+    """Size of the first (full) binary payload ``render_charts`` would send."""
+    payload, _ = chart_component.build_payload(charts, {})
+    payload, blob = chart_component.pack_payload(payload)
+    return len(json.dumps(payload)) + len(blob)
+
+
+def bench_serialization(sizes=(10_000, 100_000, 1_000_000)):
+    print(f"{'bars':>10} {'json round trip':>16} {'serializers':>12} {'speedup':>8}")
+    for n in sizes:
+        df = synthetic_frame(n)
+
+        def round_trip():
+            json.loads(df[['time', 'open', 'high', 'low', 'close']].to_json(orient='records'))
+            json.loads(df[['time', 'volume']].rename(columns={'volume': 'value'}).to_json(orient='records'))
+
+        def direct():
+            serializers.frame_ohlc_records(df)
+            serializers.frame_line_records(df, 'volume')
+
+        old, new = best_of(round_trip), best_of(direct)
+        print(f"{n:>10} {old:>15.3f}s {new:>11.3f}s {old / new:>7.1f}x")
+
+
+# Runs in a fresh interpreter so the first load of each chart's dependencies is
+# a true cold import; the second load in the same process is the warm case
+_IMPORT_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import lightweight_all_charts as app
+app_import = time.perf_counter() - start
+import lazy_imports
+names = getattr(app.chart_functions[sys.argv[1]], '__requires__', ())
+timings, error = [], None
+for _ in range(2):
+    start = time.perf_counter()
+    try:
+        lazy_imports.load(*names)
+    except ImportError as e:
+        error = str(e)
+    timings.append(time.perf_counter() - start)
+print(json.dumps({'app': app_import, 'cold': timings[0], 'warm': timings[1], 'modules': names, 'error': error}))
+'''
+
+
+def bench_imports():
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    import lightweight_all_charts as app
+
+    print(f"{'chart':<38} {'app import':>10} {'cold deps':>10} {'warm deps':>10}  modules")
+    for name in app.chart_functions:
+        proc = subprocess.run(
+            [sys.executable, '-c', _IMPORT_PROBE, name],
+            cwd=here, capture_output=True, text=True, check=True,
+        )
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        modules = ', '.join(result['modules']) or '-'
+        if result['error']:
+            modules += f" (failed: {result['error']})"
+        print(f"{name:<38} {result['app']:>9.3f}s {result['cold']:>9.3f}s {result['warm']:>9.4f}s  {modules}")
+
+
+def _pandas_ema(close, length):
+    # ta.ema: SMA of the first ``length`` values as the seed, then ewm(adjust=False)
+    seeded = close.copy()
+    seeded.iloc[:length - 1] = np.nan
+    seeded.iloc[length - 1] = close.iloc[:length].mean()
+    return seeded.ewm(span=length, adjust=False).mean()
+
+
+def _pandas_macd(close, fast, slow, signal):
+    # ta.macd per series, the path the charts took before the streaming engine
+    macd = _pandas_ema(close, fast) - _pandas_ema(close, slow)
+    signal_line = _pandas_ema(macd.dropna(), signal).reindex(macd.index)
+    return pd.DataFrame({'macd': macd, 'hist': macd - signal_line, 'signal': signal_line})
+
+
+def bench_batch_indicators(symbols=500, bars=1_000):
+    rng = np.random.default_rng(0)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (symbols, bars)), axis=1))
+
+    def per_series():
+        for row in closes:
+            streaming_indicators.macd_frame(row, 6, 12, 5)
+
+    def per_series_pandas():
+        for row in closes:
+            _pandas_macd(pd.Series(row), 6, 12, 5)
+
+    batch = batch_indicators.macd(closes, 6, 12, 5)
+    expected = _pandas_macd(pd.Series(closes[-1]), 6, 12, 5)
+    np.testing.assert_allclose(batch['MACDh_6_12_5'][-1], expected['hist'].to_numpy(), rtol=1e-9, atol=1e-12)
+
+    streaming = best_of(per_series, repeat=1)
+    pandas_ewm = best_of(per_series_pandas, repeat=1)
+    new = best_of(lambda: batch_indicators.macd(closes, 6, 12, 5))
+    print(f"MACD(6,12,5) for {symbols} symbols x {bars} bars: per-series streaming {streaming:.3f}s, "
+          f"per-series pandas ewm {pandas_ewm:.3f}s, batch {new:.3f}s "
+          f"({streaming / new:.1f}x, {pandas_ewm / new:.1f}x)")
+
+
+def bench_transport(sizes=(10_000, 100_000, 1_000_000)):
+    print(f"{'bars':>10} {'json bytes':>12} {'binary bytes':>13} {'base64 bytes':>13} "
+          f"{'json decode':>12} {'binary decode':>14}")
+    for n in sizes:
+        df = synthetic_frame(n)
+        df['time'] = np.arange(n, dtype=np.int64) * 60 + 1_600_000_000
+        charts = [{'chart': {}, 'series': [{'type': 'Candlestick', 'data': serializers.frame_ohlc_records(df)}]}]
+        encoded = json.dumps(charts)
+        packed, blob = transport.pack_charts(charts)
+        inline, _ = transport.pack_charts(charts, inline=True)
+        meta = json.dumps(packed)
+
+        # Round trip must reproduce the records exactly
+        assert transport.unpack(packed[0]['series'][0]['packed'], blob) == charts[0]['series'][0]['data']
+
+        json_decode = best_of(lambda: json.loads(encoded))
+        binary_decode = best_of(lambda: transport.unpack(json.loads(meta)[0]['series'][0]['packed'], blob))
+        print(f"{n:>10} {len(encoded):>12,} {len(blob) + len(meta):>13,} {len(json.dumps(inline)):>13,} "
+              f"{json_decode:>11.3f}s {binary_decode:>13.3f}s")
+
+    # Candles, volume and three MACD series on one time axis: the blob holds the time column once
+    n = 100_000
+    df = synthetic_frame(n)
+    time = np.arange(n, dtype=np.int64) * 60 + 1_600_000_000
+    o, h, l, c, v = (df[col].to_numpy() for col in ('open', 'high', 'low', 'close', 'volume'))
+    charts = [
+        {'chart': {}, 'series': [{'type': 'Candlestick', 'data': serializers.ohlc_records(time, o, h, l, c)}]},
+        {'chart': {}, 'series': [{'type': 'Histogram', 'data': serializers.line_records(time, v)}]},
+        {'chart': {}, 'series': [{'type': 'Line', 'data': serializers.line_records(time, c - o)},
+                                 {'type': 'Line', 'data': serializers.line_records(time, h - l)},
+                                 {'type': 'Histogram', 'data': serializers.line_records(time, c - l)}]},
+    ]
+    packed, blob = transport.pack_charts(charts)
+    times = {json.dumps(s['packed']['time']) for pane in packed for s in pane['series']}
+    print(f"multipane, 5 series x {n:,} bars: {len(blob) + len(json.dumps(packed)):,} binary bytes, "
+          f"{len(times)} time column(s) in the blob")
+
+
+def bench_grid(cells=(100, 500), bars=250):
+    """One ``render_grid`` payload vs. a ``renderLightweightCharts`` iframe per sparkline."""
+    time = np.arange(bars, dtype=np.int64) * 86_400 + 1_700_000_000
+    print(f"{'cells':>6} {'per-chart bytes':>16} {'grid bytes':>11} {'grid build':>11}  (iframes: one per chart vs. 1)")
+    for n in cells:
+        closes = 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, (n, bars)), axis=1))
+        per_chart = sum(
+            payload_bytes([{'chart': chart_component.GRID_CHART_OPTIONS, 'series': [{
+                'type': 'Line', 'options': chart_component.GRID_SERIES_OPTIONS,
+                'data': serializers.line_records(time, row)}]}])
+            for row in closes
+        )
+        grid_cells = [{'title': f"S{i}", 'time': time, 'values': row} for i, row in enumerate(closes)]
+        payload, blob = chart_component.build_grid_payload(grid_cells)
+        build = best_of(lambda: chart_component.build_grid_payload(grid_cells))
+        print(f"{n:>6} {per_chart:>16,} {len(json.dumps(payload)) + len(blob):>11,} {build:>10.4f}s")
+
+
+def bench_specs(reruns=1_000):
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    import lightweight_all_charts as app
+
+    specs = app.multipane_intraday_specs()
+    data = [[{'time': 0, 'value': 1.0}] * len(spec.series) for spec in specs]
+    dicts = [spec.bind(*d).to_dict() for spec, d in zip(specs, data)]
+
+    def rebuild():
+        # Old path: fresh dict literals every rerun, serialized to compare structure
+        panes = [chart_spec.as_pane(json.loads(json.dumps(pane))) for pane in dicts]
+        chart_spec.layout(tuple(pane.spec for pane in panes))
+
+    def cached():
+        panes = [spec.bind(*d) for spec, d in zip(specs, data)]
+        chart_spec.layout(tuple(pane.spec for pane in panes))
+
+    old = best_of(lambda: [rebuild() for _ in range(reruns)])
+    new = best_of(lambda: [cached() for _ in range(reruns)])
+    repeated = len(json.dumps([
+        {'chart': pane['chart'], 'series': [{k: v for k, v in s.items() if k != 'data'} for s in pane['series']]}
+        for pane in dicts
+    ]))
+    blocks, charts = chart_spec.layout(specs)
+    shared = len(json.dumps({'blocks': blocks, 'charts': charts}))
+    print(f"intraday multipane specs, per rerun: rebuilt {old / reruns * 1e6:.0f}us, "
+          f"cached {new / reruns * 1e6:.1f}us ({old / new:.0f}x)")
+    print(f"options bytes: repeated per pane {repeated:,}, shared blocks {shared:,}")
+
+
+def bench_time_axis(sizes=(10_000, 100_000, 1_000_000)):
+    print(f"{'bars':>10} {'strftime':>9} {'business days':>14} {'epoch seconds':>14} {'check':>8}")
+    for n in sizes:
+        dates = pd.Series(pd.date_range('2000-01-03 09:30', periods=n, freq='min', tz='America/New_York'))
+        seconds = time_axis.epoch_seconds(dates)
+        assert (time_axis.business_days(dates) == dates.dt.strftime('%Y-%m-%d').to_numpy()).all()
+
+        old = best_of(lambda: dates.dt.strftime('%Y-%m-%d'))
+        days = best_of(lambda: time_axis.business_days(dates))
+        epoch = best_of(lambda: time_axis.epoch_seconds(dates))
+        check = best_of(lambda: time_axis.check(seconds))
+        print(f"{n:>10} {old:>8.3f}s {days:>13.4f}s {epoch:>13.4f}s {check:>7.4f}s")
+
+
+def bench_paging(n=10_000_000, page_size=paging.DEFAULT_PAGE_SIZE):
+    times = np.arange(n, dtype=np.int64) * 60 + 946_684_800
+    values = np.random.default_rng(0).normal(0, 1, n).cumsum()
+    index = paging.TimeIndex(times)
+    start = paging.page_start(index)
+
+    lookup = best_of(lambda: [index.locate(t) for t in times[::n // 1_000]]) / 1_000
+    page = best_of(lambda: serializers.line_records(times[start:], values[start:]))
+    sample = 100_000
+    full = best_of(lambda: serializers.line_records(times[:sample], values[:sample]), repeat=1) * n / sample
+    print(f"{n:,} one-minute bars: window lookup {lookup * 1e6:.1f}us, "
+          f"first page of {page_size:,} bars {page * 1e3:.1f}ms, all bars ~{full:.1f}s (extrapolated)")
+
+
+def bench_pyramid(n=1_000_000):
+    df = synthetic_frame(n)
+    df['time'] = np.arange(n, dtype=np.int64) * 60 + 946_684_800
+    indexed = df.set_index(pd.to_datetime(df['time'], unit='s'))
+    agg = pyramid.OHLCV_AGG
+
+    def macd(close):
+        return {name: values[0] for name, values in batch_indicators.macd(close[None, :]).items()}
+
+    build = best_of(lambda: pyramid.Pyramid.build(df, indicators=macd), repeat=1)
+    levels = pyramid.Pyramid.build(df)
+    print(f"{n:,} one-minute bars: pyramid build with MACD {build:.3f}s "
+          f"({sum(len(levels.level(label)) for label in levels.labels):,} bars over {len(levels.labels)} levels)")
+    print(f"{'timeframe':>10} {'resample':>9} {'lookup':>9}")
+    for label, freq in (('5m', '5min'), ('15m', '15min'), ('1h', '1h'), ('1d', '1D')):
+        resample = best_of(lambda: indexed.resample(freq).agg(agg).dropna())
+        lookup = best_of(lambda: levels.level(label))
+        print(f"{label:>10} {resample:>8.3f}s {lookup * 1e6:>7.1f}us")
+
+
+def bench_live(ticks=1_000_000, rate=50_000, seconds=2.0):
+    rng = np.random.default_rng(0)
+    batch = np.empty(ticks, dtype=live_feed.TICK_DTYPE)
+    batch['time'] = np.sort(rng.uniform(0, ticks / rate, ticks)) + 1_700_000_000
+    batch['price'] = 100 * np.exp(np.cumsum(rng.normal(0, 2e-5, ticks)))
+    batch['size'] = rng.integers(1, 500, ticks)
+    print(f"{'batch':>8} {'ticks/s aggregated':>19}")
+    for size in (100, 1_000, 10_000):
+        chunks = np.array_split(batch, ticks // size)
+
+        def aggregate():
+            aggregator = live_feed.BarAggregator()
+            for chunk in chunks:
+                aggregator.add(chunk)
+
+        print(f"{size:>8} {ticks / best_of(aggregate):>19,.0f}")
+
+    # The feed thread must keep up while the script thread is busy
+    feed = live_feed.LiveFeed(lambda: live_feed.fake_ticks(rate)).start()
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        feed.snapshot()
+    feed.stop()
+    print(f"fake feed at {rate:,} ticks/s for {seconds:.0f}s: {feed.aggregator.ticks:,} ticks ingested "
+          f"({feed.aggregator.ticks / seconds:,.0f}/s) while snapshotting in a busy loop")
+
+
+def bench_screener(symbols=300, period='2y', workers=None):
+    """Inline ``run_chunk`` calls on the script thread vs. ``IndicatorPool`` workers."""
+    names = [f"SYM{i}" for i in range(symbols)]
+    chunks = [names[i:i + indicator_pool.DEFAULT_CHUNK_SIZE]
+              for i in range(0, symbols, indicator_pool.DEFAULT_CHUNK_SIZE)]
+    with tempfile.TemporaryDirectory() as root, _environ(BAR_PROVIDER='fake', BAR_CACHE_DIR=root):
+        # Bars on disk first, as after any earlier session
+        bar_cache.BarCache(bar_cache.FakeProvider(), bar_cache.BarStore(root)).get_many(names, '1d', period)
+
+        def inline(cache):
+            for chunk in chunks:
+                indicator_pool.read_chunk(indicator_pool.run_chunk(chunk, '1d', period, 'macd', (12, 26, 9), cache))
+
+        cache = bar_cache.BarCache(bar_cache.FakeProvider(), bar_cache.BarStore(root))
+        inline_disk = best_of(lambda: inline(cache), repeat=1)
+        inline_memory = best_of(lambda: inline(cache))
+
+        start = time.perf_counter()
+        pool = indicator_pool.IndicatorPool(workers)
+        try:
+            job = pool.submit(names, period=period)
+            job.wait()
+            pool_cold = time.perf_counter() - start
+            assert len(job.results()) == symbols, job.errors
+            pool_warm = best_of(lambda: pool.submit(names, period=period).wait())
+        finally:
+            pool.shutdown()
+    print(f"MACD for {symbols} symbols ({period}, {len(chunks)} chunks, {os.cpu_count()} CPUs): "
+          f"inline {inline_disk:.3f}s from disk, {inline_memory:.3f}s from memory; "
+          f"pool {pool_cold:.3f}s incl. worker start, {pool_warm:.3f}s warm")
+
+
+def bench_cache(symbols=500, max_mb=4):
+    """Browse ``symbols`` tickers through a ``BarCache`` whose memory tier is capped at ``max_mb``."""
+    memory = memory_cache.MemoryCache(max_bytes=max_mb * 2**20)
+    with tempfile.TemporaryDirectory() as root:
+        cache = bar_cache.BarCache(bar_cache.FakeProvider(), bar_cache.BarStore(root), memory=memory)
+        names = [f"SYM{i}" for i in range(symbols)]
+        start = time.perf_counter()
+        for name in names:
+            cache.get(name, '1d', '1y')
+        cold = (time.perf_counter() - start) / symbols
+        hit = best_of(lambda: cache.get(names[-1], '1d', '1y'), repeat=100)
+        for name in names:  # a second pass: the oldest symbols were evicted
+            cache.get(name, '1d', '1y')
+    stats = memory.stats()
+    counts = stats['classes']['daily']
+    print(f"{symbols} symbols x 1y daily, cap {max_mb} MB: {stats['entries']} entries, "
+          f"{stats['bytes'] / 2**20:.2f} MB held; "
+          f"{counts['hits']} hits, {counts['misses']} misses, {counts['evictions']} evictions; "
+          f"miss {cold * 1e3:.1f}ms, hit {hit * 1e6:.0f}us")
+
+
+@contextlib.contextmanager
+def _environ(**values):
+    # Spawned workers read the bar cache settings from the environment
+    saved = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+class _StoredBars:
+    """Provider with no new bars, so the bar cache serves what is on disk."""
+
+    def history(self, symbol, interval, period=None, start=None):
+        return pd.DataFrame(columns=bar_cache.OHLCV)
+
+
+def _app():
+    # The dashboard module, imported outside a Streamlit run (main() is guarded)
+    here = os.path.dirname(os.path.abspath(__file__))
+    if here not in sys.path:
+        sys.path.insert(0, here)
+    import lightweight_all_charts as app
+    return app
+
+
+def _timed(chart, fn, *args, **kwargs):
+    # Call one of the app's pipeline functions; returns its result and seconds per metrics stage
+    with metrics.collect(chart, log=None) as records:
+        result = fn(*args, **kwargs)
+    seconds = {}
+    for record in records:
+        seconds[record['stage']] = seconds.get(record['stage'], 0.0) + record['seconds']
+    return result, seconds
+
+
+def _pandas_pipeline(bars, root):
+    # multipane_chart_with_pandas's own stages (build_multipane_series) over bars stored under root
+    app = _app()
+    bar_cache.BarStore(root).write('BENCH', '1m', bars)
+    cache = bar_cache.BarCache(_StoredBars(), bar_cache.BarStore(root))
+    series, seconds = _timed('multipane_chart_with_pandas', app.build_multipane_series, 'BENCH', '1m', None,
+                             (6, 12, 5), 800, bars=cache, indicators=streaming_indicators.IndicatorStore(root))
+    stages = Stages()
+    stages.seconds.update(seconds)
+    candles, volume, macd_fast, macd_signal, macd_hist = series
+    candlestick_pane, volume_pane, macd_pane = app.multipane_specs()
+    with stages('payload'):
+        size = payload_bytes([candlestick_pane.bind(candles), volume_pane.bind(volume),
+                              macd_pane.bind(macd_fast, macd_signal, macd_hist)])
+    return stages.seconds, size
+
+
+def _intraday_pipeline(bars, root):
+    # multipane_chart_intraday_from_csv's own stages: build_intraday_pyramid (cold, then from
+    # the converted Parquet) and build_intraday_series on the finest level
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    app = _app()
+    path = os.path.join(root, 'intraday.csv')
+    frame = bars.reset_index().rename(columns=str.lower).rename(columns={'date': 'datetime'})
+    for col in ('macd_fast', 'macd_slow', 'macd_hist'):
+        frame[col] = 0.0
+    pa_csv.write_csv(pa.Table.from_pandas(frame, preserve_index=False), path)
+    chart = 'multipane_chart_intraday_from_csv'
+    fingerprint = csv_ingest.file_fingerprint(path)
+    _, cold = _timed(chart, app.build_intraday_pyramid, path, fingerprint, cache_dir=root)
+    levels, seconds = _timed(chart, app.build_intraday_pyramid, path, fingerprint, cache_dir=root)
+    df = frames.skip_warmup(levels.level(levels.labels[0]), ['macd_slow'])
+    series, render = _timed(chart, app.build_intraday_series, df, 800)
+    stages = Stages()
+    stages.seconds.update(seconds, load_cold=cold['load'], **render)
+    candles, volume, macd_fast, macd_slow, macd_hist = series
+    candlestick_pane, volume_pane, macd_pane = app.multipane_intraday_specs()
+    with stages('payload'):
+        size = payload_bytes([candlestick_pane.bind(candles), volume_pane.bind(volume),
+                              macd_pane.bind(macd_fast, macd_slow, macd_hist)])
+    return stages.seconds, size
+
+
+def _static_charts():
+    # The static charts have fixed sample data; time building their payload with the renderer intercepted
+    app = _app()
+
+    rendered = []
+    original = app.renderLightweightCharts, app.chart_component.render_charts
+    app.renderLightweightCharts = lambda charts, key: rendered.append(charts)
+    app.chart_component.render_charts = lambda charts, key, **kwargs: rendered.append(
+        [chart_spec.as_pane(pane).to_dict() for pane in charts])
+    results = []
+    try:
+        for name, fn in app.chart_functions.items():
+            if getattr(fn, '__requires__', None):
+                continue
+            rendered.clear()
+            stages = Stages()
+            with stages('build'):
+                fn()
+            with stages('serialize'):
+                size = len(json.dumps(rendered[-1]))
+            results.append({'chart': name, 'bars': sum(len(s['data']) for pane in rendered[-1] for s in pane['series']),
+                            'stages': stages.seconds, 'payload_bytes': size})
+    finally:
+        app.renderLightweightCharts, app.chart_component.render_charts = original
+    return results
+
+
+PIPELINE_SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+STAGES = ('load_cold', 'load', 'fetch', 'transform', 'indicators', 'frame', 'downsample', 'build', 'serialize', 'payload')
+
+
+def bench_pipeline(max_bars=1_000_000):
+    results = []
+    for n in (n for n in PIPELINE_SIZES if n <= max_bars):
+        bars = gbm_ohlcv(n)
+        for chart, pipeline in (('multipane_chart_with_pandas', _pandas_pipeline),
+                                ('multipane_chart_intraday_from_csv', _intraday_pipeline)):
+            with tempfile.TemporaryDirectory() as root:
+                seconds, size = pipeline(bars, root)
+            results.append({'chart': chart, 'bars': n, 'stages': seconds, 'payload_bytes': size})
+    results.extend(_static_charts())
+
+    names = [name for name in STAGES if any(name in result['stages'] for result in results)]
+    print(f"{'chart':<38} {'bars':>10} " + ' '.join(f"{name:>10}" for name in names) + f" {'bytes':>10}")
+    for result in results:
+        cells = ' '.join(
+            f"{result['stages'][name]:>9.4f}s" if name in result['stages'] else f"{'-':>10}" for name in names)
+        print(f"{result['chart']:<38} {result['bars']:>10,} {cells} {result['payload_bytes']:>10,}")
+    return results
+
+
+# Runs one chart function in a fresh interpreter (the environment points the bar and
+# CSV caches at a temporary directory) with the component renderer stubbed out.
+# The first call builds the process-wide caches; 'retained' is what they still
+# hold afterwards. 'rerun', the per-session cost, is the best of two more calls.
+_MEMORY_PROBE = '''
+import json, sys, tracemalloc
+import streamlit as st
+import lazy_imports
+import lightweight_all_charts as app
+app.chart_component.render_charts = lambda charts, key, **kwargs: None
+chart, options = sys.argv[1], json.loads(sys.argv[2])
+lazy_imports.load(*getattr(app.chart_functions[chart], '__requires__', ()))
+for key, value in options.items():
+    st.session_state[key] = value
+result = {}
+for run in ('cold', 'rerun', 'rerun'):
+    tracemalloc.start()
+    app.chart_functions[chart]()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result[run] = min(peak, result.get(run, peak))
+    if run == 'cold':
+        result['retained'] = current
+print(json.dumps(result))
+'''
+
+MEMORY_BARS = 200_000
+# (chart, session options) -> {'cold'/'retained'/'rerun': max traced bytes}, for
+# MEMORY_BARS 1-minute bars in the intraday CSV (the pandas chart reads 6 months of
+# daily bars). The intraday cold peak is mostly MACD temporaries; 'retained' is the
+# float32 pyramid. A pandas rerun with unchanged bars is a payload_cache hit
+MEMORY_BUDGETS = {
+    ('Multipane Chart with Pandas', ()): {'cold': 2_000_000, 'rerun': 100_000},
+    ('Multipane Chart (Intraday) from CSV', ()): {'cold': 40_000_000, 'retained': 15_000_000, 'rerun': 800_000},
+    ('Multipane Chart (Intraday) from CSV', (('page_history', True),)): {'rerun': 1_800_000},
+}
+
+
+def memory_environ(root, bars=MEMORY_BARS):
+    """Environment for ``trace_memory``: fake bars and an intraday CSV of ``bars`` rows, cached under ``root``."""
+    frame = gbm_ohlcv(bars).reset_index().rename(columns=str.lower).rename(columns={'date': 'datetime'})
+    for col in ('macd_fast', 'macd_slow', 'macd_hist'):
+        frame[col] = 0.0  # like the real export; recomputed per timeframe by the chart
+    path = os.path.join(root, 'intraday.csv')
+    frame.to_csv(path, index=False)
+    return dict(os.environ, BAR_PROVIDER='fake', BAR_CACHE_DIR=root, CSV_CACHE_DIR=root, INTRADAY_CSV=path)
+
+
+def trace_memory(chart, options, env):
+    """``{'cold', 'retained', 'rerun'}`` traced bytes of one chart function (see ``_MEMORY_PROBE``)."""
+    proc = subprocess.run(
+        [sys.executable, '-c', _MEMORY_PROBE, chart, json.dumps(dict(options))],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def bench_memory(bars=MEMORY_BARS):
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        env = memory_environ(root, bars)
+        print(f"{'chart':<38} {'options':<20} {'run':>8} {'traced':>12} {'budget':>12}")
+        for (chart, options), budget in MEMORY_BUDGETS.items():
+            traced = trace_memory(chart, options, env)
+            label = ', '.join(key for key, value in options if value) or '-'
+            for run, limit in budget.items():
+                ok = traced[run] <= limit
+                print(f"{chart:<38} {label:<20} {run:>8} {traced[run]:>12,} {limit:>12,}"
+                      f"{'' if ok else '  OVER BUDGET'}")
+                results.append({'chart': chart, 'options': label, 'run': run, 'bytes': traced[run],
+                                'budget': limit, 'ok': ok})
+    return results
+
+
+BENCHMARKS = {
+    'serialization': bench_serialization,
+    'imports': bench_imports,
+    'batch_indicators': bench_batch_indicators,
+    'transport': bench_transport,
+    'grid': bench_grid,
+    'specs': bench_specs,
+    'time_axis': bench_time_axis,
+    'paging': bench_paging,
+    'pyramid': bench_pyramid,
+    'live': bench_live,
+    'screener': bench_screener,
+    'cache': bench_cache,
+    'pipeline': bench_pipeline,
+    'memory': bench_memory,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _change(old, new):
+    return f"{(new / old - 1) * 100 if old else 0:>+7.1f}%"
+
+
+def compare(old_path, new_path):
+    """Print per-stage timings and memory peaks of two ``--json`` result files side by side."""
+    def rows(path):
+        with open(path) as f:
+            run = json.load(f)
+        benchmarks = run['benchmarks']
+        stages = {
+            (result['chart'], result['bars'], stage): seconds
+            for result in benchmarks.get('pipeline', ())
+            for stage, seconds in result['stages'].items()
+        }
+        memory = {(result['chart'], result['options'], result['run']): result['bytes']
+                  for result in benchmarks.get('memory', ())}
+        return run, stages, memory
+
+    (old_run, old, old_memory), (new_run, new, new_memory) = rows(old_path), rows(new_path)
+    print(f"{old_run.get('commit')} -> {new_run.get('commit')}")
+    print(f"{'chart':<38} {'bars':>10} {'stage':>11} {'old':>10} {'new':>10} {'change':>8}")
+    order = {stage: i for i, stage in enumerate(STAGES)}
+    for key in sorted(old.keys() & new.keys(), key=lambda k: (k[0], k[1], order.get(k[2], len(order)))):
+        chart, bars, stage = key
+        print(f"{chart:<38} {bars:>10,} {stage:>11} {old[key]:>9.4f}s {new[key]:>9.4f}s {_change(old[key], new[key])}")
+    if old_memory.keys() & new_memory.keys():
+        print(f"{'chart':<38} {'options':<20} {'run':>8} {'old':>12} {'new':>12} {'change':>8}")
+        for key in sorted(old_memory.keys() & new_memory.keys()):
+            chart, options, run = key
+            print(f"{chart:<38} {options:<20} {run:>8} {old_memory[key]:>12,} {new_memory[key]:>12,} "
+                  f"{_change(old_memory[key], new_memory[key])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('names', nargs='*', help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument('--json', metavar='PATH', help='write machine-readable results to PATH')
+    parser.add_argument('--max-bars', type=int, default=1_000_000,
+                        help=f"largest pipeline size (sizes: {', '.join(f'{n:,}' for n in PIPELINE_SIZES)})")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two --json result files')
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    results = {}
+    for name in args.names or BENCHMARKS:
+        print(f"== {name}")
+        result = BENCHMARKS[name](max_bars=args.max_bars) if name == 'pipeline' else BENCHMARKS[name]()
+        if result is not None:
+            results[name] = result
+    if args.json:
+        run = {
+            'commit': git_commit(),
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'benchmarks': results,
+        }
+        with open(args.json, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"Wrote {args.json}")
+    if not all(result['ok'] for result in results.get('memory', ())):
+        sys.exit("memory: over budget")
+
+
+if __name__ == '__main__':
+    main()
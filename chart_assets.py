@@ -0,0 +1,116 @@
+"""Self-hosted Lightweight Charts library.
+
+The standalone production build of Lightweight Charts is vendored under
+``frontend/vendor`` so charts render without a CDN round trip and work in
+air-gapped deployments. The stateful chart component loads it from its own
+static files (one URL, cached by the browser across every chart iframe).
+Pages built with ``components.html`` get a ``script_tag`` pointing at that
+same URL (``library_url``), or with the source inlined when no component
+serves it.
+
+``python chart_assets.py check`` verifies that no frontend file references a
+remote script, and ``python chart_assets.py update --version X.Y.Z``
+refreshes the vendored build when network access is available.
+"""
+import argparse
+import functools
+import os
+import re
+import sys
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FRONTEND_DIR = os.path.join(HERE, 'frontend')
+LIBRARY_PATH = os.path.join(FRONTEND_DIR, 'vendor', 'lightweight-charts.standalone.production.js')
+DOWNLOAD_URL = 'https://unpkg.com/lightweight-charts@{version}/dist/lightweight-charts.standalone.production.js'
+
+# Remote code pulled in by a page: <script src="http...">, <link href="http...">,
+# import ... from 'http...', import('http...')
+_REMOTE_SCRIPT = re.compile(
+    r"""(src\s*=\s*["']https?://|<link\b[^>]*href\s*=\s*["']https?://"""
+    r"""|from\s+["']https?://|import\s*\(\s*["']https?://)"""
+)
+
+
+@functools.lru_cache(maxsize=None)
+def library_source():
+    """The vendored library source, read from disk once per process."""
+    with open(LIBRARY_PATH, encoding='utf-8') as f:
+        return f.read()
+
+
+def library_version():
+    match = re.search(r'Lightweight Charts\S* v(\d+\.\d+\.\d+)', library_source()[:500])
+    return match.group(1) if match else None
+
+
+def library_url(component_name):
+    """URL of the vendored library as served by the component ``component_name``, relative to the app page."""
+    return f"component/{component_name}/{os.path.relpath(LIBRARY_PATH, FRONTEND_DIR).replace(os.sep, '/')}"
+
+
+@functools.lru_cache(maxsize=None)
+def script_tag(src=None):
+    """``<script>`` element defining ``window.LightweightCharts``, for inline HTML pages.
+
+    Loads ``src`` (see ``library_url``) when given, else inlines the source.
+    """
+    if src is not None:
+        return f'<script src="{src}"></script>'
+    return f"<script>{library_source()}</script>"
+
+
+def remote_references(paths=None):
+    """``(path, line number, line)`` for every remote script reference found."""
+    if paths is None:
+        paths = [
+            os.path.join(root, name)
+            for root, _, names in os.walk(FRONTEND_DIR)
+            for name in names
+            if name.endswith(('.html', '.js')) and 'vendor' not in root
+        ]
+        paths.append(os.path.join(HERE, 'app.py'))
+    found = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for lineno, line in enumerate(f, 1):
+                if _REMOTE_SCRIPT.search(line):
+                    found.append((path, lineno, line.strip()))
+    return found
+
+
+def update(version):
+    """Download the standalone build for ``version`` into the vendor directory."""
+    with urllib.request.urlopen(DOWNLOAD_URL.format(version=version), timeout=30) as response:
+        source = response.read().decode('utf-8')
+    if f"v{version}" not in source[:500]:
+        raise ValueError(f"Downloaded file is not Lightweight Charts v{version}")
+    tmp = f"{LIBRARY_PATH}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(source)
+    os.replace(tmp, LIBRARY_PATH)
+    library_source.cache_clear()
+    script_tag.cache_clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('check', help='fail if any page loads a remote script')
+    update_parser = commands.add_parser('update', help='re-vendor the library from unpkg')
+    update_parser.add_argument('--version', required=True)
+    args = parser.parse_args()
+
+    if args.command == 'update':
+        update(args.version)
+        print(f"Vendored Lightweight Charts v{library_version()}")
+        return
+    found = remote_references()
+    for path, lineno, line in found:
+        print(f"{os.path.relpath(path, HERE)}:{lineno}: {line}")
+    print(f"Vendored Lightweight Charts v{library_version()}; {len(found)} remote script reference(s)")
+    sys.exit(1 if found else 0)
+
+
+if __name__ == '__main__':
+    main()
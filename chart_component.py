@@ -0,0 +1,316 @@
+"""Stateful chart component that sends only changed bars on reruns.
+
+``render_charts(charts, key)`` takes the same list of ``{"chart", "series"}``
+dicts as ``renderLightweightCharts``, or ``chart_spec.Pane``s whose static
+options were serialized once (see chart_spec.py). The first render of a key sends
+everything; later reruns send, per series, only the bars appended since the
+previous render plus the last bar if it changed, and the frontend applies
+them with ``series.update``. Every bar sent before the last one is checked
+against a digest kept with the summary, so a series whose earlier history
+changed anywhere falls back to ``setData``; a change to any option remounts.
+
+What was last sent is kept per chart key in ``st.session_state``. If the
+frontend misses a delta (it was remounted), it asks for a resync through its
+component value and the next rerun sends the full payload.
+
+Options travel as a table of distinct blocks that panes reference by key,
+so options shared by several panes are sent once. Likewise, series on one
+time axis share a single packed time column. The panes' scroll, zoom and
+crosshair are synchronized in the frontend, without a rerun.
+
+Paging mode (``page_window`` plus ``history=``) sends only the newest page of
+bars. When the user scrolls near the oldest loaded bar, the frontend asks for
+the page before it. The next render's data then starts earlier, and that
+older slice is sent as a ``prepend``; the frontend keeps the loaded pages and
+preserves the visible range.
+
+With ``transport='binary'`` (the default) full series data travels as packed
+typed-array columns in one binary arg (see transport.py); small per-bar
+updates stay JSON. Series data is a record list or ``serializers.Columns``;
+the latter is packed straight from its arrays, and only the few points of
+an update become records.
+
+``render_grid`` draws many small charts (a watchlist of sparklines) in one
+instance of the same component: one iframe, one library load and one
+payload, instead of an iframe per chart. The frontend only creates charts
+for cells near the viewport and removes them again when they scroll away.
+"""
+import bisect
+import hashlib
+import json
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+import chart_assets
+import chart_spec
+import metrics
+import paging
+import transport as packing
+
+_component = components.declare_component('lightweight_chart', path=chart_assets.FRONTEND_DIR)
+
+
+def library_url():
+    """URL of the vendored library among this component's static files, for ``chart_assets.script_tag``."""
+    return chart_assets.library_url(_component.name)
+
+
+def _structure(panes):
+    # Everything except the series data; any change here needs a remount
+    return tuple(pane.spec.key for pane in panes)
+
+
+# Series data is a record list or a ``serializers.Columns`` (duck-typed, so this
+# module doesn't import NumPy): these helpers read either
+def _time_at(data, i):
+    return data[i]['time'] if isinstance(data, list) else data.time_at(i)
+
+
+def _locate(data, time):
+    if isinstance(data, list):
+        return bisect.bisect_left(data, time, key=lambda point: point['time'])
+    return data.locate(time)
+
+
+def _records(data):
+    return data if isinstance(data, list) else data.records()
+
+
+def _digest(data):
+    # Content hash of already-sent bars, so a change anywhere in them is seen
+    if isinstance(data, list):
+        return hashlib.blake2b(json.dumps(data).encode(), digest_size=16).hexdigest()
+    return data.digest()
+
+
+def _pack(data, buffers):
+    return packing.pack_records(data, buffers) if isinstance(data, list) else data.pack(buffers)
+
+
+def _series_delta(data, sent):
+    """``{'update': [...]}`` (plus ``'prepend'`` for older bars) or ``{'set': data}`` turning ``sent`` into ``data``."""
+    k = 0
+    first = sent.get('first')
+    if first is not None and len(data) and _time_at(data, 0) != first:
+        # Older bars (a page of history) in front of what was sent
+        k = _locate(data, first)
+        if k == len(data) or _time_at(data, k) != first:
+            return {'set': data}
+    n = sent['length']
+    if (n and len(data) - k >= n and _time_at(data, k + n - 1) == sent['last']['time']
+            and _digest(data[k:k + n - 1]) == sent['head']):
+        tail = _records(data[k + n - 1:])
+        if tail[0] == sent['last']:
+            tail = tail[1:]
+        delta = {'update': tail}
+        if k:
+            delta['prepend'] = data[:k]
+        return delta
+    return {'set': data}
+
+
+def _summary(data):
+    # The last bar is kept whole: it may be replaced in place by an update
+    return {'length': len(data), 'first': _time_at(data, 0) if len(data) else None,
+            'last': _records(data[-1:])[0] if len(data) else None, 'head': _digest(data[:-1])}
+
+
+def _full_charts(panes):
+    blocks, charts = chart_spec.layout(tuple(pane.spec for pane in panes))
+    return blocks, [
+        dict(chart, series=[dict(s, data=data) for s, data in zip(chart['series'], pane.data)])
+        for chart, pane in zip(charts, panes)
+    ]
+
+
+def build_payload(charts, state, resync=False, history=None):
+    """Payload for this render and the new per-key ``state``.
+
+    ``history`` is the number of older bars not sent yet in paging mode.
+    """
+    panes = [chart_spec.as_pane(pane) for pane in charts]
+    # Switching paging on or off remounts, since the frontend only keeps loaded bars when paging
+    structure = (_structure(panes), history is not None)
+    version = state.get('version', 0) + 1
+    summaries = [[_summary(data) for data in pane.data] for pane in panes]
+    if resync or state.get('structure') != structure:
+        blocks, full = _full_charts(panes)
+        payload = {'mode': 'full', 'version': version, 'blocks': blocks, 'charts': full}
+    else:
+        deltas = [
+            [_series_delta(data, sent) for data, sent in zip(pane.data, sent_pane)]
+            for pane, sent_pane in zip(panes, state['series'])
+        ]
+        if all(d == {'update': []} for pane in deltas for d in pane):
+            # Nothing changed: repeat the current version so the frontend ignores it
+            version -= 1
+            payload = {'mode': 'delta', 'version': version, 'base': version, 'charts': []}
+        else:
+            payload = {'mode': 'delta', 'version': version, 'base': version - 1,
+                       'charts': [{'series': pane} for pane in deltas]}
+    if history is not None:
+        payload['history'] = history
+    new_state = dict(state, version=version, structure=structure, series=summaries)
+    return payload, new_state
+
+
+def _pack_change(change, buffers):
+    if 'set' in change:
+        return {'setPacked': _pack(change['set'], buffers)}
+    if 'prepend' in change:
+        return {'update': change['update'], 'prependPacked': _pack(change['prepend'], buffers)}
+    return change
+
+
+def pack_payload(payload):
+    """Move full series data in ``payload`` into packed columns; returns ``(payload, blob)``."""
+    buffers = packing.Buffers(inline=False)
+    if payload['mode'] == 'full':
+        charts = [
+            dict(pane, series=[
+                dict({k: v for k, v in s.items() if k != 'data'}, packed=_pack(s['data'], buffers))
+                for s in pane['series']
+            ])
+            for pane in payload['charts']
+        ]
+    else:
+        charts = [
+            {'series': [
+                _pack_change(change, buffers)
+                for change in pane['series']
+            ]}
+            for pane in payload['charts']
+        ]
+    return dict(payload, charts=charts), buffers.blob()
+
+
+def records_payload(payload):
+    """``payload`` with every series' data as record lists, for the JSON transport."""
+    if payload['mode'] == 'full':
+        charts = [
+            dict(pane, series=[dict(s, data=_records(s['data'])) for s in pane['series']])
+            for pane in payload['charts']
+        ]
+    else:
+        charts = [
+            {'series': [
+                {key: _records(value) if key in ('set', 'prepend') else value for key, value in change.items()}
+                for change in pane['series']
+            ]}
+            for pane in payload['charts']
+        ]
+    return dict(payload, charts=charts)
+
+
+def page_window(key, times, page_size=paging.DEFAULT_PAGE_SIZE):
+    """Index of the oldest bar to render under ``key`` in paging mode.
+
+    ``times`` is the full, sorted time column. The first render gets the
+    newest ``page_size`` bars; every page request from the frontend extends
+    the window further back. Pass the result as ``history=`` to
+    ``render_charts`` along with the data from that index on.
+    """
+    state_key = f"_lightweight_chart_{key}"
+    state = st.session_state.get(state_key, {})
+    page = (st.session_state.get(key) or {}).get('page') or {}
+    index = paging.TimeIndex(times)
+    if page.get('id') is None or page.get('id') == state.get('page'):
+        page = {}
+    start = paging.page_start(index, state.get('loaded_from'), page.get('before'), page.get('bars', 0), page_size)
+    state = dict(state, page=page.get('id', state.get('page')),
+                 loaded_from=index.time_at(start) if len(index) else None)
+    st.session_state[state_key] = state
+    return start
+
+
+def render_charts(charts, key, transport='binary', history=None):
+    """Render ``charts`` under ``key``, sending only what changed since the last rerun.
+
+    ``transport`` is ``'binary'`` (packed columns) or ``'json'`` (record lists).
+    ``history`` turns on paging: the number of older bars that can still be
+    requested (see ``page_window``).
+    """
+    state_key = f"_lightweight_chart_{key}"
+    state = st.session_state.get(state_key, {})
+
+    # The component value carries the frontend's resync and page requests
+    request = st.session_state.get(key) or {}
+    resync = request.get('resync') is not None and request.get('resync') != state.get('resync')
+
+    payload, state = build_payload(charts, state, resync, history)
+    state['resync'] = request.get('resync')
+    st.session_state[state_key] = state
+    blob = None
+    if transport == 'binary':
+        payload, blob = pack_payload(payload)
+    else:
+        payload = records_payload(payload)
+    if metrics.active():
+        metrics.annotate(mode=payload['mode'], bytes=len(json.dumps(payload)) + len(blob or b''))
+    if blob is not None:
+        return _component(payload=payload, buffers=blob, key=key, default=None)
+    return _component(payload=payload, key=key, default=None)
+
+
+# Sparkline defaults for render_grid: no axes, grid lines, crosshair or interaction
+GRID_CHART_OPTIONS = {
+    'layout': {'background': {'type': 'solid', 'color': 'white'}, 'textColor': '#333'},
+    'grid': {'vertLines': {'visible': False}, 'horzLines': {'visible': False}},
+    'rightPriceScale': {'visible': False},
+    'leftPriceScale': {'visible': False},
+    'timeScale': {'visible': False},
+    'crosshair': {'vertLine': {'visible': False}, 'horzLine': {'visible': False}},
+    'handleScroll': False,
+    'handleScale': False,
+}
+GRID_SERIES_OPTIONS = {'lineWidth': 1, 'priceLineVisible': False, 'lastValueVisible': False,
+                       'crosshairMarkerVisible': False}
+
+
+def build_grid_payload(cells, columns=4, cell_height=80, series_type='Line', chart_options=None,
+                       series_options=None, palette=None):
+    """Grid payload and its blob; see ``render_grid``."""
+    buffers = packing.Buffers(inline=False)
+    payload = {
+        'mode': 'grid',
+        'columns': columns,
+        'cellHeight': cell_height,
+        'type': series_type,
+        'chart': GRID_CHART_OPTIONS if chart_options is None else chart_options,
+        'series': GRID_SERIES_OPTIONS if series_options is None else series_options,
+        'palette': palette,
+        'cells': [
+            {
+                'title': cell.get('title', ''),
+                'caption': cell.get('caption', ''),
+                'color': cell.get('color'),
+                # Sparklines don't need more than float32 precision
+                'packed': packing.pack_columns(cell['time'], {'value': cell['values']}, buffers, 'float32'),
+            }
+            for cell in cells
+        ],
+    }
+    return payload, buffers.blob()
+
+
+def render_grid(cells, key, columns=4, cell_height=80, series_type='Line', chart_options=None,
+                series_options=None, palette=None):
+    """Render ``cells`` as a grid of small charts in one component instance.
+
+    Each cell is a dict with ``time`` and ``values`` arrays, plus optional
+    ``title``, ``caption`` and ``color`` (a code into ``palette``, applied as
+    the series color). Reruns with identical cells keep the version, so the
+    frontend doesn't rebuild the grid.
+    """
+    payload, blob = build_grid_payload(cells, columns, cell_height, series_type, chart_options,
+                                       series_options, palette)
+    state_key = f"_lightweight_chart_{key}"
+    state = st.session_state.get(state_key, {})
+    digest = hashlib.blake2b(json.dumps(payload).encode() + blob, digest_size=16).hexdigest()
+    version = state.get('version', 0) + (digest != state.get('digest'))
+    st.session_state[state_key] = dict(state, version=version, digest=digest)
+    payload['version'] = version
+    if metrics.active():
+        metrics.annotate(mode='grid', bytes=len(json.dumps(payload)) + len(blob))
+    return _component(payload=payload, buffers=blob, key=key, default=None)
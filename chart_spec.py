@@ -0,0 +1,182 @@
+"""Immutable chart and series specs with memoized serialization.
+
+A dashboard's chart options, series options, price scales and markers are
+static; only the series data changes between reruns. ``ChartSpec`` and
+``SeriesSpec`` hold those static parts as ``Block``s: option dicts that are
+serialized once to canonical JSON and interned by content hash, so equal
+options (e.g. one options dict used by every pane) are a single shared
+block.
+
+A ``SeriesSpec`` can carry a ``palette``: a list of colors that per-point
+``color`` fields index into. Points then carry a small integer code (see
+``serializers.color_codes``) instead of a color string, and the frontend
+expands the codes.
+
+``layout(specs)`` encodes a tuple of specs into the wire format used by
+chart_component: a ``{key: options}`` table holding each distinct block
+once, and per-pane entries that reference blocks by key. It is memoized on
+the specs, so re-encoding a dashboard whose specs were cached (e.g. with
+``st.cache_resource``) is a dict lookup.
+
+    CANDLES = ChartSpec(OPTIONS, [SeriesSpec('Candlestick', {...})])
+    render_charts([CANDLES.bind(candle_records), ...], 'key')
+"""
+import functools
+import hashlib
+import json
+import weakref
+
+# Blocks still in use somewhere (a spec, a cached layout), by content hash;
+# a block nothing references any more drops out, so the table can't grow without bound
+_BLOCKS = weakref.WeakValueDictionary()
+
+
+class _Frozen:
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.key == self.key
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class Block(_Frozen):
+    """A JSON-able value serialized once; ``value`` must not be mutated."""
+    __slots__ = ('key', 'text', 'value', '__weakref__')
+
+    def __init__(self, key, text):
+        object.__setattr__(self, 'key', key)
+        object.__setattr__(self, 'text', text)
+        # Decoded from the text, so later changes to the caller's dict don't leak in
+        object.__setattr__(self, 'value', json.loads(text))
+
+
+def block(value):
+    """The interned ``Block`` for ``value`` (``None`` stays ``None``)."""
+    if value is None or isinstance(value, Block):
+        return value
+    text = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    key = _digest(text)
+    found = _BLOCKS.get(key)
+    if found is None:
+        found = _BLOCKS[key] = Block(key, text)
+    return found
+
+
+def _key(*parts):
+    return _digest('|'.join('' if p is None else getattr(p, 'key', p) for p in parts))
+
+
+class SeriesSpec(_Frozen):
+    """Static part of one series: type, options, price scale, markers and color palette."""
+    __slots__ = ('type', 'options', 'price_scale', 'markers', 'palette', 'key')
+
+    def __init__(self, type, options=None, price_scale=None, markers=None, palette=None):
+        options = block(options or {})
+        price_scale = block(price_scale)
+        markers = block(markers)
+        palette = block(list(palette) if palette is not None else None)
+        for name, value in (('type', type), ('options', options), ('price_scale', price_scale),
+                            ('markers', markers), ('palette', palette),
+                            ('key', _key(type, options, price_scale, markers, palette))):
+            object.__setattr__(self, name, value)
+
+    def to_dict(self, data):
+        """Series dict in the ``renderLightweightCharts`` format (plus ``palette``, if any)."""
+        series = {'type': self.type, 'data': data, 'options': self.options.value}
+        if self.price_scale is not None:
+            series['priceScale'] = self.price_scale.value
+        if self.markers is not None:
+            series['markers'] = self.markers.value
+        if self.palette is not None:
+            series['palette'] = self.palette.value
+        return series
+
+
+class ChartSpec(_Frozen):
+    """Static part of one pane: chart options and its ``SeriesSpec``s."""
+    __slots__ = ('options', 'series', 'key')
+
+    def __init__(self, options, series):
+        options = block(options)
+        series = tuple(series)
+        object.__setattr__(self, 'options', options)
+        object.__setattr__(self, 'series', series)
+        object.__setattr__(self, 'key', _key(options, *series))
+
+    def bind(self, *data):
+        """A ``Pane`` pairing this spec with one data list per series."""
+        if len(data) != len(self.series):
+            raise ValueError(f"Expected {len(self.series)} data lists, got {len(data)}")
+        return Pane(self, data)
+
+    @classmethod
+    def from_dict(cls, pane):
+        """``(spec, data)`` for a ``{"chart": ..., "series": [...]}`` dict."""
+        series = [
+            SeriesSpec(s['type'], s.get('options'), s.get('priceScale'), s.get('markers'), s.get('palette'))
+            for s in pane['series']
+        ]
+        return cls(pane['chart'], series), tuple(s['data'] for s in pane['series'])
+
+
+class Pane:
+    """A ``ChartSpec`` bound to this render's series data."""
+    __slots__ = ('spec', 'data')
+
+    def __init__(self, spec, data):
+        self.spec = spec
+        self.data = tuple(data)
+
+    def to_dict(self):
+        """Pane dict in the ``renderLightweightCharts`` format."""
+        return {
+            'chart': self.spec.options.value,
+            'series': [s.to_dict(d) for s, d in zip(self.spec.series, self.data)],
+        }
+
+
+def as_pane(pane):
+    """Accept either a ``Pane`` or a legacy chart dict."""
+    if isinstance(pane, Pane):
+        return pane
+    return Pane(*ChartSpec.from_dict(pane))
+
+
+@functools.lru_cache(maxsize=256)
+def layout(specs):
+    """``(blocks, charts)`` for a tuple of ``ChartSpec``s.
+
+    ``blocks`` maps key -> options for each distinct block; ``charts`` has one
+    ``{"chart": key, "series": [{"type", "options", "priceScale", "markers", "palette"}]}``
+    entry per pane, with block keys (or ``None``) in place of the dicts. The
+    result is shared between calls and must not be mutated.
+    """
+    blocks = {}
+
+    def ref(b):
+        if b is None:
+            return None
+        blocks.setdefault(b.key, b.value)
+        return b.key
+
+    charts = [
+        {
+            'chart': ref(spec.options),
+            'series': [
+                {'type': s.type, 'options': ref(s.options), 'priceScale': ref(s.price_scale),
+                 'markers': ref(s.markers), 'palette': ref(s.palette)}
+                for s in spec.series
+            ],
+        }
+        for spec in specs
+    ]
+    return blocks, charts
@@ -0,0 +1,143 @@
+"""Cached, chunked, schema-typed CSV ingestion for local intraday exports.
+
+``pd.read_csv(path, parse_dates=[...])`` infers every dtype and parses dates
+row by row, and it runs again on each rerun. ``load`` instead:
+
+* reads only the columns in an explicit dtype schema,
+* parses the date column with one vectorized ``to_datetime(format=...)`` per chunk,
+* streams the file in ``chunksize`` row chunks into a Parquet file, so peak
+  memory is bounded by the chunk size rather than the file size,
+* keys that Parquet file on the CSV's size and mtime (or a content hash), so
+  later calls skip CSV parsing entirely, and deletes the conversions of
+  earlier versions of the same CSV once a new one is written.
+
+``load`` reads the whole cached file into memory; ``iter_batches`` streams
+it back in batches for files too large to hold in memory at once.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+from lazy_imports import lazy_import
+
+pa = lazy_import('pyarrow')
+pq = lazy_import('pyarrow.parquet')
+
+DEFAULT_DIR = os.environ.get('CSV_CACHE_DIR', '.csv_cache')
+DEFAULT_CHUNKSIZE = 1_000_000
+
+# Columns of the intraday multipane export (MultiPaneChartsFromCSV.csv)
+INTRADAY_DATE_COLUMN = 'datetime'
+INTRADAY_SCHEMA = {
+    'open': 'float64',
+    'high': 'float64',
+    'low': 'float64',
+    'close': 'float64',
+    'volume': 'float64',
+    'macd_fast': 'float64',
+    'macd_slow': 'float64',
+    'macd_hist': 'float64',
+}
+
+
+def file_fingerprint(path, hash_content=False):
+    """Identity of a file's current contents: size+mtime, or a SHA-1 of the bytes."""
+    stat = os.stat(path)
+    if not hash_content:
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _digest(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def cache_path(path, schema, date_column, date_format, cache_dir=DEFAULT_DIR, hash_content=False):
+    """Location of the Parquet file caching ``path`` parsed with these settings.
+
+    The name is ``<stem>-<source>-<version>-<settings>.parquet``, so the
+    conversions of one CSV can be found by their common prefix.
+    """
+    settings = {'schema': schema, 'date_column': date_column, 'date_format': date_format}
+    name = os.path.splitext(os.path.basename(path))[0]
+    parts = [name, _digest(os.path.abspath(path)), _digest(file_fingerprint(path, hash_content)), _digest(settings)]
+    return os.path.join(cache_dir, f"{'-'.join(parts)}.parquet")
+
+
+def _remove_stale(target):
+    # Conversions of earlier versions of the same CSV (same stem and source, other version)
+    directory, name = os.path.split(target)
+    stem, source, version, _ = name.rsplit('-', 3)
+    prefix = f"{stem}-{source}-"
+    for other in os.listdir(directory or '.'):
+        if other.startswith(prefix) and other.endswith('.parquet') and other[len(prefix):].split('-', 1)[0] != version:
+            try:
+                os.remove(os.path.join(directory, other))
+            except FileNotFoundError:
+                pass  # another session removed it first
+
+
+def _convert(path, target, schema, date_column, date_format, chunksize):
+    # Stream CSV chunks into one Parquet file; only one chunk is in memory at a time
+    os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+    # A unique name, since sessions (threads) may convert the same file at once
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target) or '.', suffix='.tmp')
+    os.close(fd)
+    writer = None
+    try:
+        chunks = pd.read_csv(
+            path,
+            usecols=[date_column, *schema],
+            dtype=schema,
+            chunksize=chunksize,
+            skip_blank_lines=True,
+        )
+        for chunk in chunks:
+            chunk[date_column] = pd.to_datetime(chunk[date_column], format=date_format)
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema)
+            writer.write_table(table)
+        if writer is None:
+            raise ValueError(f"No rows in CSV file: {path}")
+        writer.close()
+        os.replace(tmp, target)
+    except BaseException:
+        # Don't leave a partial file behind in the cache directory
+        if writer is not None:
+            writer.close()
+        os.remove(tmp)
+        raise
+
+
+def ingest(path, schema=INTRADAY_SCHEMA, date_column=INTRADAY_DATE_COLUMN, date_format='ISO8601',
+           chunksize=DEFAULT_CHUNKSIZE, cache_dir=DEFAULT_DIR, hash_content=False):
+    """Parse ``path`` into the binary cache if needed and return the Parquet path."""
+    target = cache_path(path, schema, date_column, date_format, cache_dir, hash_content)
+    if not os.path.exists(target):
+        _convert(path, target, schema, date_column, date_format, chunksize)
+        _remove_stale(target)
+    return target
+
+
+def load(path, columns=None, **kwargs):
+    """DataFrame for the CSV at ``path``, served from the Parquet cache.
+
+    ``columns`` restricts what is read back; remaining keyword arguments are
+    passed to ``ingest``.
+    """
+    return pd.read_parquet(ingest(path, **kwargs), columns=columns)
+
+
+def iter_batches(path, batch_size=DEFAULT_CHUNKSIZE, columns=None, **kwargs):
+    """Yield DataFrames of up to ``batch_size`` rows from the cached CSV."""
+    parquet = pq.ParquetFile(ingest(path, **kwargs))
+    for batch in parquet.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas()
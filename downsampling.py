@@ -0,0 +1,91 @@
+"""Pixel-budget downsampling applied before series are serialized.
+
+A chart cannot show more bars than it has pixels, so every series is reduced
+to a bar budget derived from the chart width before it is sent to the
+browser. ``downsample_frame`` buckets all of a chart's columns on one plan,
+so its panes keep a shared time axis: OHLC columns re-aggregate as
+first/max/min/last and volume is summed per bucket. A line's last value per
+bucket would drop its peaks, so line columns (``'minmax'``) keep each pair
+of buckets' min and max instead, in the order they occur; the plan then
+pairs up its buckets so every column still has one value per row. Inputs
+shorter than the budget are returned unchanged.
+"""
+import numpy as np
+
+DEFAULT_WIDTH = 800
+PIXELS_PER_BAR = 2
+
+
+def bar_budget(width=None, pixels_per_bar=PIXELS_PER_BAR):
+    """Number of bars worth sending to a chart ``width`` pixels wide."""
+    return max(int((width or DEFAULT_WIDTH) / pixels_per_bar), 3)
+
+
+def bucket_starts(n, buckets):
+    """Start index of each of ``buckets`` contiguous, near-equal buckets over ``n`` rows."""
+    return np.linspace(0, n, buckets, endpoint=False).astype(np.int64)
+
+
+def _ends(starts, n):
+    return np.append(starts[1:], n)
+
+
+# Rows compared per step when locating bucket extremes, bounding the temporaries
+BLOCK_ROWS = 1 << 14
+
+
+def _first_rows(a, pairs, values):
+    # Row of each bucket's first value equal to its entry in ``values`` (len(a) if none),
+    # a block of whole buckets at a time
+    bounds = np.append(pairs, len(a))
+    out = np.full(len(pairs), len(a))
+    step = max(int(BLOCK_ROWS * len(pairs) / len(a)), 1)
+    for i in range(0, len(pairs), step):
+        lo, hi = bounds[i], bounds[min(i + step, len(pairs))]
+        block = a[lo:hi] == np.repeat(values[i:i + step], np.diff(bounds[i:i + step + 1]))
+        rows = np.flatnonzero(block)
+        buckets = np.searchsorted(pairs[i:i + step], rows + lo, side='right') - 1
+        found, first = np.unique(buckets, return_index=True)
+        out[i + found] = rows[first] + lo
+    return out
+
+
+def _min_max(a, starts):
+    # One value per bucket: each pair of buckets gets its min and max, in time order
+    pairs = starts[::2]
+    low, high = np.fmin.reduceat(a, pairs), np.fmax.reduceat(a, pairs)
+    low_first = _first_rows(a, pairs, low) <= _first_rows(a, pairs, high)
+    out = np.empty(len(starts), dtype=a.dtype)
+    out[0::2] = np.where(low_first, low, high)
+    out[1::2] = np.where(low_first, high, low)
+    return out
+
+
+# Per-bucket reducers, all vectorized over the bucket start indices
+REDUCERS = {
+    'first': lambda a, starts: a[starts],
+    'last': lambda a, starts: a[_ends(starts, len(a)) - 1],
+    'max': lambda a, starts: np.maximum.reduceat(a, starts),
+    'min': lambda a, starts: np.minimum.reduceat(a, starts),
+    'sum': lambda a, starts: np.add.reduceat(a, starts),
+    'minmax': _min_max,  # needs an even number of buckets (see downsample_frame)
+}
+
+
+def downsample_frame(df, budget, agg, time_col='time'):
+    """Bucket every column of ``df`` on one shared plan so panes stay aligned.
+
+    ``agg`` maps column name to one of ``REDUCERS`` (first/last/max/min/sum/
+    minmax); other columns, including ``time_col``, take the first row of
+    each bucket. With ``'minmax'`` columns the budget is rounded down to an
+    even number of buckets.
+    """
+    if len(df) <= budget:
+        return df
+    if 'minmax' in agg.values():
+        budget = max(budget - budget % 2, 2)
+    starts = bucket_starts(len(df), budget)
+    out = df.iloc[starts].reset_index(drop=True)
+    for col, how in agg.items():
+        out[col] = REDUCERS[how](df[col].to_numpy(), starts)
+    return out
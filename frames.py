@@ -0,0 +1,64 @@
+"""Lean DataFrames for the chart pipelines.
+
+Frames that stay in memory across reruns (the bar cache, the intraday
+pyramid) and the per-rerun frames of every session should hold only the
+columns that are rendered, in the narrowest dtype that still displays
+correctly. The helpers here build such frames:
+
+* ``lean_frame`` assembles one new frame from the rendered columns only,
+  instead of copying a wide frame and adding or dropping columns in place.
+* ``downcast`` stores a float column as float32 when the float32 round trip
+  stays within half a display tick (``PRICE_DECIMALS``). That halves its
+  memory. Large values such as big volumes don't fit and stay float64.
+* ``skip_warmup`` drops leading indicator warm-up rows with a slice (a view)
+  rather than ``dropna``, which copies the whole frame.
+
+``serializers.value_column`` rounds float32 values back to the decimals
+they stand for, so downcasting doesn't add float noise to the payload.
+"""
+import numpy as np
+import pandas as pd
+
+# Lightweight Charts' default priceFormat precision
+PRICE_DECIMALS = 2
+
+
+def fits_float32(values, decimals=PRICE_DECIMALS):
+    """Whether ``values`` survive a float32 round trip to within half a display tick."""
+    values = np.asarray(values, dtype=np.float64)
+    error = np.abs(values.astype(np.float32).astype(np.float64) - values)
+    return bool(np.all((error <= 0.5 * 10.0 ** -decimals) | np.isnan(values)))
+
+
+def narrow(values, decimals=PRICE_DECIMALS):
+    """``values`` as float32 if they ``fits_float32``, else unchanged."""
+    values = np.asarray(values)
+    if values.dtype == np.float64 and fits_float32(values, decimals):
+        return values.astype(np.float32)
+    return values
+
+
+def downcast(frame, columns=None, decimals=PRICE_DECIMALS):
+    """Store each float64 column of ``columns`` (default: all) that fits as float32, in place."""
+    for col in frame.columns if columns is None else columns:
+        values = frame[col].to_numpy()
+        narrowed = narrow(values, decimals)
+        if narrowed is not values:
+            frame[col] = narrowed
+    return frame
+
+
+def lean_frame(time, columns, decimals=PRICE_DECIMALS):
+    """New frame of ``time`` plus ``{name: values}``, floats narrowed where they fit."""
+    data = {'time': np.asarray(time)}
+    data.update((name, narrow(values, decimals)) for name, values in columns.items())
+    return pd.DataFrame(data)
+
+
+def skip_warmup(frame, columns):
+    """``frame`` from the first row where every one of ``columns`` is set (a slice, not a copy)."""
+    start = 0
+    for col in columns:
+        valid = frame[col].notna().to_numpy()
+        start = max(start, int(valid.argmax()) if valid.any() else len(frame))
+    return frame.iloc[start:]
@@ -0,0 +1,387 @@
+// Stateful Lightweight Charts component (see chart_component.py).
+//
+// The iframe stays mounted across Streamlit reruns, so charts and series
+// created here outlive a single render. Python sends either a full payload
+// (create everything, setData) or a delta against the version this frame
+// last applied (series.update for appended/changed bars). If a delta does
+// not match our version (e.g. the frame was remounted), we ask Python for a
+// full resync through the component value.
+//
+// Series with a palette get per-point colors as integer codes into it (see
+// chart_spec.py); they are expanded to color strings here before reaching the
+// library.
+//
+// Panes share one time axis: scrolling, zooming or moving the crosshair in
+// one pane moves the others, here in the frame without a rerun. Series on
+// the same time axis point at one time column in the blob (transport.py),
+// which is decoded once per render.
+//
+// In paging mode (payload.history is set) we keep the loaded bars of every
+// series and, when the visible range comes within PREFETCH visible widths of
+// the oldest loaded bar, ask Python for the page before it. That page comes
+// back as a "prepend" delta.
+//
+// Grid mode (render_grid) lays out many small charts in this one frame. Only
+// cells within GRID_MARGIN of the viewport hold a chart: an
+// IntersectionObserver creates the chart when a cell comes near and removes it
+// when the cell scrolls away, keeping the decoded points for next time.
+//
+// The library comes from the vendored standalone build loaded by index.html.
+const { createChart } = window.LightweightCharts;
+
+const ADD_SERIES = {
+    Area: 'addAreaSeries',
+    Bar: 'addBarSeries',
+    Baseline: 'addBaselineSeries',
+    Candlestick: 'addCandlestickSeries',
+    Histogram: 'addHistogramSeries',
+    Line: 'addLineSeries',
+};
+
+const ARRAYS = {
+    float64: Float64Array,
+    float32: Float32Array,
+    int32: Int32Array,
+    uint8: Uint8Array,
+};
+
+// Series option that takes a grid cell's color, per series type (default 'color')
+const COLOR_OPTION = {
+    Area: 'lineColor',
+    Baseline: 'topLineColor',
+};
+
+// Request older bars when fewer than this many visible widths remain to the left
+const PREFETCH = 1;
+
+// Grid cells this close to the viewport get a chart
+const GRID_MARGIN = '200px';
+
+const root = document.getElementById('root');
+let version = 0;
+let panes = [];
+let history = null;  // older bars still on the server (paging mode), else null
+let pageRequested = false;
+let grid = null;  // grid mode: { cells, observer }
+const decoded = new Map();  // blob columns decoded during this render, by offset
+const request = {};  // component value: latest resync and page requests
+
+function post(type, data) {
+    window.parent.postMessage({ isStreamlitMessage: true, type, ...data }, '*');
+}
+
+function setValue(value) {
+    post('streamlit:setComponentValue', { value, dataType: 'json' });
+}
+
+function send(field, value) {
+    request[field] = value;
+    setValue({ ...request });
+}
+
+function requestId() {
+    return Math.random().toString(36).slice(2);
+}
+
+// Packed columns (transport.py): copy each column out of the blob so typed
+// arrays get an aligned buffer, then rebuild the point objects
+function readColumn(spec, blob, length) {
+    const key = spec.offset === undefined ? null : `${spec.dtype}:${spec.offset}:${length}`;
+    if (key !== null && decoded.has(key)) return decoded.get(key);
+    const Arr = ARRAYS[spec.dtype];
+    const bytes = spec.b64 !== undefined
+        ? Uint8Array.from(atob(spec.b64), (c) => c.charCodeAt(0))
+        : blob.slice(spec.offset, spec.offset + length * Arr.BYTES_PER_ELEMENT);
+    const column = new Arr(bytes.buffer, bytes.byteOffset, length);
+    if (key !== null) decoded.set(key, column);
+    return column;
+}
+
+function unpack(packed, blob) {
+    const n = packed.length;
+    const t = readColumn(packed.time, blob, n);
+    const time = packed.time.kind === 'date'
+        ? (i) => new Date(t[i] * 86400000).toISOString().slice(0, 10)
+        : (i) => t[i];
+    const columns = Object.entries(packed.columns).map(([key, spec]) => [key, readColumn(spec, blob, n)]);
+    const extras = Object.entries(packed.extras);
+    const points = new Array(n);
+    for (let i = 0; i < n; i++) {
+        const point = { time: time(i) };
+        for (const [key, values] of columns) {
+            if (!Number.isNaN(values[i])) point[key] = values[i];
+        }
+        for (const [key, values] of extras) {
+            if (values[i] !== null) point[key] = values[i];
+        }
+        points[i] = point;
+    }
+    return points;
+}
+
+function seriesData(s, blob) {
+    return s.packed ? unpack(s.packed, blob) : s.data;
+}
+
+function colorPoint(point, palette) {
+    if (palette && typeof point.color === 'number') point.color = palette[point.color];
+    return point;
+}
+
+function colorize(points, palette) {
+    if (palette) points.forEach((point) => colorPoint(point, palette));
+    return points;
+}
+
+function syncTimeScales() {
+    // Keep every pane scrolled/zoomed to the same logical range
+    let syncing = false;
+    panes.forEach(({ chart }, i) => {
+        chart.timeScale().subscribeVisibleLogicalRangeChange((range) => {
+            if (range === null || syncing) return;
+            syncing = true;
+            panes.forEach((other, j) => {
+                if (j !== i) other.chart.timeScale().setVisibleLogicalRange(range);
+            });
+            syncing = false;
+        });
+    });
+}
+
+function timeKey(time) {
+    // Seconds for any chart time: UNIX seconds, 'YYYY-MM-DD' or a business day object
+    if (typeof time === 'number') return time;
+    if (typeof time === 'string') return Date.parse(time) / 1000;
+    return Date.UTC(time.year, time.month - 1, time.day) / 1000;
+}
+
+function pointAt(points, time) {
+    // Binary search on the time column; undefined when the pane has no bar then
+    const key = timeKey(time);
+    let lo = 0;
+    let hi = points.length - 1;
+    while (lo <= hi) {
+        const mid = (lo + hi) >> 1;
+        const t = timeKey(points[mid].time);
+        if (t === key) return points[mid];
+        if (t < key) lo = mid + 1;
+        else hi = mid - 1;
+    }
+    return undefined;
+}
+
+function syncCrosshairs() {
+    // Mirror the crosshair onto the other panes at the same time
+    let syncing = false;
+    panes.forEach(({ chart }, i) => {
+        chart.subscribeCrosshairMove((param) => {
+            if (syncing) return;
+            syncing = true;
+            panes.forEach((other, j) => {
+                if (j === i || !other.series.length) return;
+                // The horizontal line goes at the other pane's own value for that bar
+                const point = param.time === undefined ? undefined : pointAt(other.data[0], param.time);
+                const price = point ? (point.value !== undefined ? point.value : point.close) : undefined;
+                if (price === undefined) other.chart.clearCrosshairPosition();
+                else other.chart.setCrosshairPosition(price, point.time, other.series[0]);
+            });
+            syncing = false;
+        });
+    });
+}
+
+function requestOlder(range) {
+    // The visible range is in logical (bar index) units, 0 = oldest loaded bar
+    if (range === null || !history || pageRequested) return;
+    const visible = range.to - range.from;
+    if (range.from > visible * PREFETCH) return;
+    const loaded = panes[0].data.find((data) => data.length);
+    if (!loaded) return;
+    pageRequested = true;
+    send('page', { id: requestId(), before: loaded[0].time, bars: Math.ceil(visible * (1 + PREFETCH)) });
+}
+
+function prepend(pane, j, points) {
+    pane.data[j] = points.concat(pane.data[j]);
+    pane.series[j].setData(pane.data[j]);
+}
+
+function keeps(j) {
+    // Panes keep their first series' points for the crosshair lookup, and every series' when paging
+    return j === 0 || history !== null;
+}
+
+function track(pane, j, point) {
+    // Mirror series.update on the loaded bars: replace the last bar or append
+    const data = pane.data[j];
+    if (data.length && data[data.length - 1].time === point.time) data[data.length - 1] = point;
+    else data.push(point);
+}
+
+function mount(charts, blocks, blob) {
+    // Options arrive once per distinct block (chart_spec.py); panes hold keys
+    const block = (key) => (key === null || key === undefined ? undefined : blocks[key]);
+    panes.forEach(({ chart }) => chart.remove());
+    root.innerHTML = '';
+    panes = charts.map((spec) => {
+        const container = document.createElement('div');
+        root.appendChild(container);
+        const options = { width: root.clientWidth, height: 300, ...block(spec.chart) };
+        const chart = createChart(container, options);
+        const data = [];
+        const palettes = spec.series.map((s) => block(s.palette));
+        const series = spec.series.map((s, j) => {
+            const seriesOptions = block(s.options) || {};
+            const api = chart[ADD_SERIES[s.type]](seriesOptions);
+            const priceScale = block(s.priceScale);
+            if (priceScale) {
+                chart.priceScale(seriesOptions.priceScaleId || '').applyOptions(priceScale);
+            }
+            const points = colorize(seriesData(s, blob), palettes[j]);
+            api.setData(points);
+            if (keeps(j)) data[j] = points;
+            const markers = block(s.markers);
+            if (markers) api.setMarkers(markers);
+            return api;
+        });
+        chart.timeScale().fitContent();
+        return { chart, series, data, palettes };
+    });
+    syncTimeScales();
+    syncCrosshairs();
+    if (history !== null && panes.length) {
+        panes[0].chart.timeScale().subscribeVisibleLogicalRangeChange(requestOlder);
+    }
+}
+
+function applyDelta(charts, blob) {
+    charts.forEach((pane, i) => {
+        const target = panes[i];
+        const range = target.chart.timeScale().getVisibleLogicalRange();
+        let shift = 0;
+        pane.series.forEach((change, j) => {
+            const api = target.series[j];
+            const palette = target.palettes[j];
+            if (change.set || change.setPacked) {
+                const points = colorize(change.set || unpack(change.setPacked, blob), palette);
+                api.setData(points);
+                if (keeps(j)) target.data[j] = points;
+                return;
+            }
+            if (change.prepend || change.prependPacked) {
+                const points = colorize(change.prepend || unpack(change.prependPacked, blob), palette);
+                prepend(target, j, points);
+                shift = Math.max(shift, points.length);
+            }
+            (change.update || []).forEach((point) => {
+                colorPoint(point, palette);
+                api.update(point);
+                if (keeps(j)) track(target, j, point);
+            });
+        });
+        if (shift && range !== null) {
+            // Keep the user looking at the same bars after the older page lands
+            target.chart.timeScale().setVisibleLogicalRange({ from: range.from + shift, to: range.to + shift });
+        }
+    });
+}
+
+function showCell(cell, payload) {
+    if (cell.chart) return;
+    const chart = createChart(cell.plot, { ...payload.chart, width: cell.plot.clientWidth, height: payload.cellHeight });
+    const options = { ...payload.series };
+    if (payload.palette && typeof cell.spec.color === 'number') {
+        options[COLOR_OPTION[payload.type] || 'color'] = payload.palette[cell.spec.color];
+    }
+    const series = chart[ADD_SERIES[payload.type]](options);
+    cell.points = cell.points || unpack(cell.spec.packed, cell.blob);
+    series.setData(cell.points);
+    chart.timeScale().fitContent();
+    cell.chart = chart;
+}
+
+function hideCell(cell) {
+    if (!cell.chart) return;
+    cell.chart.remove();
+    cell.chart = null;
+}
+
+function clearGrid() {
+    if (!grid) return;
+    grid.observer.disconnect();
+    grid.cells.forEach(hideCell);
+    grid = null;
+}
+
+function mountGrid(payload, blob) {
+    clearGrid();
+    panes.forEach(({ chart }) => chart.remove());
+    panes = [];
+    root.innerHTML = '';
+    const container = document.createElement('div');
+    container.style.cssText = `display: grid; grid-template-columns: repeat(${payload.columns}, minmax(0, 1fr)); gap: 8px;`;
+    root.appendChild(container);
+    const cells = payload.cells.map((spec) => {
+        const element = document.createElement('div');
+        element.style.cssText = 'font: 12px sans-serif; color: #333;';
+        const header = document.createElement('div');
+        header.style.cssText = 'display: flex; justify-content: space-between; white-space: nowrap;';
+        const title = document.createElement('b');
+        title.textContent = spec.title;
+        const caption = document.createElement('span');
+        caption.textContent = spec.caption;
+        header.append(title, caption);
+        // Fixed height, so the grid (and frame height) doesn't depend on which charts exist
+        const plot = document.createElement('div');
+        plot.style.height = `${payload.cellHeight}px`;
+        element.append(header, plot);
+        container.appendChild(element);
+        return { spec, blob, element, plot, chart: null, points: null };
+    });
+    const byElement = new Map(cells.map((cell) => [cell.element, cell]));
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach((entry) => {
+            const cell = byElement.get(entry.target);
+            if (entry.isIntersecting) showCell(cell, payload);
+            else hideCell(cell);
+        });
+    }, { rootMargin: GRID_MARGIN });
+    cells.forEach((cell) => observer.observe(cell.element));
+    grid = { cells, observer };
+}
+
+window.addEventListener('resize', () => {
+    if (!grid) return;
+    grid.cells.forEach((cell) => {
+        if (cell.chart) cell.chart.applyOptions({ width: cell.plot.clientWidth });
+    });
+});
+
+function render(args) {
+    const payload = args.payload;
+    if (payload.version === version) return;  // unchanged payload on an unrelated rerun
+    decoded.clear();
+    if (payload.mode === 'grid') {
+        mountGrid(payload, args.buffers);
+    } else if (payload.mode === 'full') {
+        clearGrid();
+        history = payload.history === undefined ? null : payload.history;
+        mount(payload.charts, payload.blocks, args.buffers);
+    } else if (payload.base !== version) {
+        // We missed earlier payloads (e.g. this frame was just remounted)
+        send('resync', requestId());
+        return;
+    } else {
+        history = payload.history === undefined ? null : payload.history;
+        applyDelta(payload.charts, args.buffers);
+    }
+    version = payload.version;
+    decoded.clear();
+    pageRequested = false;
+    post('streamlit:setFrameHeight', { height: root.scrollHeight });
+}
+
+window.addEventListener('message', (event) => {
+    if (event.data && event.data.type === 'streamlit:render') render(event.data.args);
+});
+post('streamlit:componentReady', { apiVersion: 1 });
@@ -0,0 +1,212 @@
+"""Process-pool backend for per-symbol indicator pipelines (screeners, watchlists).
+
+Indicator loops run under the GIL, so a 300-symbol screener computed on the
+script thread uses one core. ``IndicatorPool.submit`` splits the symbols
+into chunks and runs each chunk's whole pipeline in a worker process:
+fetch through the worker's own ``BarCache`` (the Parquet tier is shared
+on disk), clean, then compute a ``batch_indicators`` function vectorized
+over the chunk.
+
+Results don't come back as pickled DataFrames. A worker writes the chunk's
+time axis and output matrix into one ``multiprocessing.shared_memory`` block
+and returns only its name and layout. The parent copies the block out and
+unlinks it as soon as the chunk completes, in a future callback, so results
+accumulate on the ``Job`` even while no script run is waiting on it.
+
+``Job.cancel`` drops chunks that haven't started, and discards (and
+unlinks) the results of chunks already running. Small chunks keep the
+discarded work short when the user changes the selection.
+"""
+import multiprocessing
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import bar_cache
+import batch_indicators
+import time_axis
+
+DEFAULT_CHUNK_SIZE = 16
+
+# One symbol's outputs on its own bars: ``time`` (epoch seconds) and ``{name: array}``
+SymbolSeries = namedtuple('SymbolSeries', ['symbol', 'time', 'columns'])
+
+_cache = None
+
+
+def _worker_cache():
+    # Per worker process; reused by every chunk the worker runs
+    global _cache
+    if _cache is None:
+        _cache = bar_cache.BarCache()
+    return _cache
+
+
+def clean(df):
+    """Sorted bars with unique timestamps and a close on every bar."""
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+    return df[df['Close'].notna()]
+
+
+def run_chunk(symbols, interval, period, indicator, params, cache=None):
+    """Fetch, clean and compute ``indicator`` for ``symbols``; outputs in shared memory.
+
+    Returns ``None`` when no symbol has bars, else a dict with the block
+    ``name``, the ``symbols`` it holds (in row order), the number of bars
+    ``n`` and the output ``columns`` (``'close'`` first).
+    """
+    cache = cache or _worker_cache()
+    frames = {symbol: clean(df) for symbol, df in cache.get_many(symbols, interval, period).items()}
+    frames = {symbol: df for symbol, df in frames.items() if len(df)}
+    if not frames:
+        return None
+    times, present, closes = batch_indicators.frame_matrix(frames)
+    outputs = {'close': closes}
+    outputs.update(getattr(batch_indicators, indicator)(closes, *params))
+    seconds = time_axis.epoch_seconds(times)
+
+    n = len(seconds)
+    block = shared_memory.SharedMemory(create=True, size=8 * n * (1 + len(outputs) * len(present)))
+    try:
+        np.ndarray(n, dtype=np.int64, buffer=block.buf)[:] = seconds
+        matrix = np.ndarray((len(outputs), len(present), n), dtype=np.float64, buffer=block.buf, offset=8 * n)
+        for i, values in enumerate(outputs.values()):
+            matrix[i] = values
+        del matrix  # release the buffer export so the block can close
+    finally:
+        block.close()
+    return {'name': block.name, 'symbols': present, 'n': n, 'columns': list(outputs)}
+
+
+def read_chunk(layout):
+    """``{symbol: SymbolSeries}`` copied out of a ``run_chunk`` block, which is then unlinked."""
+    block = shared_memory.SharedMemory(name=layout['name'])
+    try:
+        n, symbols, columns = layout['n'], layout['symbols'], layout['columns']
+        times = np.ndarray(n, dtype=np.int64, buffer=block.buf).copy()
+        matrix = np.ndarray((len(columns), len(symbols), n), dtype=np.float64, buffer=block.buf, offset=8 * n).copy()
+    finally:
+        block.close()
+        block.unlink()
+    out = {}
+    for row, symbol in enumerate(symbols):
+        keep = ~np.isnan(matrix[0, row])  # the symbol's own bars
+        out[symbol] = SymbolSeries(symbol, times[keep], {col: matrix[i, row][keep] for i, col in enumerate(columns)})
+    return out
+
+
+def discard_chunk(layout):
+    """Unlink a ``run_chunk`` block without reading it."""
+    block = shared_memory.SharedMemory(name=layout['name'])
+    block.close()
+    block.unlink()
+
+
+class Job:
+    """One submitted watchlist: chunk futures plus the results collected so far."""
+
+    def __init__(self, chunks, futures):
+        self.chunks = chunks
+        self.symbols = [symbol for chunk in chunks for symbol in chunk]
+        self.futures = futures
+        self.errors = []
+        self._results = {}
+        self._lock = threading.Lock()
+        self._collected = threading.Condition(self._lock)
+        self._finished = 0  # chunks whose results have been collected (or dropped)
+        self._cancelled = False
+        for future in futures:
+            future.add_done_callback(self._collect)
+
+    def _collect(self, future):
+        # Runs on the executor's thread as each chunk finishes. A future is done
+        # before its callbacks run, so completion is counted here, not on the futures
+        try:
+            self._read(future)
+        finally:
+            with self._collected:
+                self._finished += 1
+                self._collected.notify_all()
+
+    def _read(self, future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            with self._lock:
+                self.errors.append(error)
+            return
+        layout = future.result()
+        if layout is None:
+            return
+        with self._lock:
+            if self._cancelled:
+                discard_chunk(layout)
+                return
+            self._results.update(read_chunk(layout))
+
+    def cancel(self):
+        """Drop unstarted chunks and discard the results of running ones."""
+        with self._lock:
+            self._cancelled = True
+        for future in self.futures:
+            future.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def done(self):
+        """Whether every chunk has finished and its results are collected."""
+        with self._lock:
+            return self._finished == len(self.futures)
+
+    def wait(self, timeout=None):
+        """Wait up to ``timeout`` seconds; returns whether every chunk is done."""
+        with self._collected:
+            return self._collected.wait_for(lambda: self._finished == len(self.futures), timeout)
+
+    def progress(self):
+        """Fraction of chunks done."""
+        with self._lock:
+            return self._finished / len(self.futures) if self.futures else 1.0
+
+    def results(self):
+        """``{symbol: SymbolSeries}`` for the symbols computed so far, in watchlist order."""
+        with self._lock:
+            return {symbol: self._results[symbol] for symbol in self.symbols if symbol in self._results}
+
+    @property
+    def missing(self):
+        """Symbols of finished chunks that came back without bars (or whose chunk failed)."""
+        results = self.results()
+        return [
+            symbol
+            for chunk, future in zip(self.chunks, self.futures) if future.done() and not future.cancelled()
+            for symbol in chunk if symbol not in results
+        ]
+
+
+class IndicatorPool:
+    """Worker processes running ``run_chunk``; share one per app process."""
+
+    def __init__(self, max_workers=None):
+        # spawn: forking a process that runs Streamlit's threads is unsafe
+        self.executor = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                                            mp_context=multiprocessing.get_context('spawn'))
+
+    def submit(self, symbols, interval='1d', period='1y', indicator='macd', params=(12, 26, 9),
+               chunk_size=DEFAULT_CHUNK_SIZE):
+        """Start computing ``batch_indicators.<indicator>(closes, *params)`` for ``symbols``."""
+        symbols = list(dict.fromkeys(symbols))
+        chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+        futures = [self.executor.submit(run_chunk, chunk, interval, period, indicator, tuple(params))
+                   for chunk in chunks]
+        return Job(chunks, futures)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
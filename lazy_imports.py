@@ -0,0 +1,79 @@
+"""Deferred imports for heavy data and indicator libraries.
+
+Streamlit re-executes the app module on every rerun, and a cold start pays
+for every top-level import even when the selected chart is a static one.
+``lazy_import`` returns a stand-in that imports the real module on first
+attribute access, and ``requires`` marks a chart function with the modules it
+needs so they are loaded up front when (and only when) that chart runs.
+"""
+import functools
+import importlib
+import threading
+
+_proxies = {}
+_lock = threading.RLock()
+
+
+class LazyModule:
+    """Module stand-in that imports ``name`` the first time it is used."""
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            with _lock:
+                module = self.__dict__['_module']
+                if module is None:
+                    module = importlib.import_module(self.__dict__['_name'])
+                    self.__dict__['_module'] = module
+        return module
+
+    @property
+    def loaded(self):
+        return self.__dict__['_module'] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+def lazy_import(name):
+    """Return the shared lazy stand-in for module ``name``."""
+    with _lock:
+        proxy = _proxies.get(name)
+        if proxy is None:
+            proxy = _proxies[name] = LazyModule(name)
+    return proxy
+
+
+def load(*names):
+    """Import ``names`` now and return the real modules."""
+    return [lazy_import(name)._load() for name in names]
+
+
+def requires(*names):
+    """Decorator: import ``names`` when the decorated function is first called.
+
+    The module names are kept on ``fn.__requires__`` so tooling (see
+    ``benchmarks.py imports``) can tell what each chart entry pulls in.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            load(*names)
+            return fn(*args, **kwargs)
+        wrapper.__requires__ = names
+        return wrapper
+    return decorator
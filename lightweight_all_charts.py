@@ -1,33 +1,252 @@
+import os
+import sys
+
 import streamlit as st
 from streamlit_lightweight_charts import renderLightweightCharts
-import json
-import numpy as np
-import yfinance as yf
-import pandas as pd
-import pandas_ta as ta
+
+import chart_component
+import metrics
+from chart_spec import ChartSpec, SeriesSpec
+from lazy_imports import lazy_import, requires
+
+# Data and indicator libraries are imported on first use, so static charts
+# don't pay for them on a cold start
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+bar_cache = lazy_import('bar_cache')
+batch_indicators = lazy_import('batch_indicators')
+csv_ingest = lazy_import('csv_ingest')
+downsampling = lazy_import('downsampling')
+frames = lazy_import('frames')
+indicator_pool = lazy_import('indicator_pool')
+live_feed = lazy_import('live_feed')
+memory_cache = lazy_import('memory_cache')
+payload_cache = lazy_import('payload_cache')
+pyramid = lazy_import('pyramid')
+serializers = lazy_import('serializers')
+streaming_indicators = lazy_import('streaming_indicators')
+time_axis = lazy_import('time_axis')
 
 # Colors for candlestick and MACD charts
 COLOR_BULL = 'rgba(38,166,154,0.9)'  # Green color for bullish
 COLOR_BEAR = 'rgba(239,83,80,0.9)'   # Red color for bearish
 
-# Set page configuration
-st.set_page_config(page_title="Lightweight Charts Dashboard", layout="wide")
-
-# Sidebar for chart selection
-st.sidebar.title("Select a Chart")
-chart_options = [
-    "Price and Volume Series Chart",
-    "Overlaid Series with Markers",
-    "Multipane Chart with Pandas",
-    "Multipane Chart (Intraday) from CSV",
-    "Line Chart",
-    "Area Chart",
-    "Histogram Chart",
-    "Bar Chart",
-    "Candlestick Chart",
-    "Baseline Chart"
-]
-selected_chart = st.sidebar.selectbox("Choose a chart to display:", chart_options)
+# Per-bar colors are sent as codes into these palettes (see serializers.color_codes)
+VOLUME_PALETTE = [COLOR_BULL, COLOR_BEAR]     # 1: bar closed below its open
+MACD_HIST_PALETTE = [COLOR_BEAR, COLOR_BULL]  # 1: histogram above zero
+
+# Byte-bounded memory shared by the bar and payload caches of every session
+# (CACHE_MAX_MB, 256 MB by default)
+@st.cache_resource
+def get_memory_cache():
+    return memory_cache.MemoryCache()
+
+# Process-wide bar cache shared by every session (memory -> Parquet -> Yahoo)
+@st.cache_resource
+def get_bar_cache():
+    return bar_cache.BarCache(memory=get_memory_cache())
+
+# Checkpointed indicator state/outputs, stored alongside the cached bars
+@st.cache_resource
+def get_indicator_store():
+    return streaming_indicators.IndicatorStore(get_bar_cache().store.root)
+
+# Render-ready chart series, reused across reruns and sessions while their bars are unchanged
+@st.cache_resource
+def get_payload_cache():
+    return payload_cache.PayloadCache(get_memory_cache())
+
+# Worker processes for screener-sized indicator runs, shared by every session
+@st.cache_resource
+def get_indicator_pool():
+    return indicator_pool.IndicatorPool()
+
+# Remote CSVs can't be fingerprinted like local files, so cache the parsed frame per URL
+@st.cache_data(ttl=3600, max_entries=4)
+def read_remote_csv(url, columns=None):
+    metrics.annotate(cache='miss')
+    return pd.read_csv(url, skiprows=0, usecols=columns, parse_dates=['datetime'], skip_blank_lines=True)
+
+# MACD(12, 26, 9) in the intraday CSV's column names
+def intraday_macd(close):
+    macd = batch_indicators.macd(close[None, :], 12, 26, 9)
+    return {
+        'macd_fast': macd['MACD_12_26_9'][0],
+        'macd_slow': macd['MACDs_12_26_9'][0],
+        'macd_hist': macd['MACDh_12_26_9'][0],
+    }
+
+# Latest timeframe pyramid per intraday source, outside the memory cache's byte
+# budget (a multi-GB CSV's pyramid would not fit it); builds are locked per source
+@st.cache_resource
+def get_pyramid_cache():
+    return pyramid.PyramidCache()
+
+# Pyramid for ``source`` at its local file version; switching timeframe is then a
+# dict lookup instead of a resample. Remote sources have no fingerprint, so they
+# are rebuilt once their parsed CSV (read_remote_csv) expires
+def get_intraday_pyramid(source, fingerprint=None):
+    ttl = None if fingerprint is not None else 3600
+    return get_pyramid_cache().get(source, fingerprint, lambda: build_intraday_pyramid(source, fingerprint), ttl=ttl)
+
+# Epoch-second times in place of the datetime column, and prices as float32 where
+# they fit, so every level is aggregated in float32 (first/max/min/last are exact)
+def intraday_frame(df):
+    df['time'] = time_axis.epoch_seconds(df.pop(csv_ingest.INTRADAY_DATE_COLUMN))
+    return frames.downcast(df, ['open', 'high', 'low', 'close'])
+
+# Only OHLCV is read (MACD is recomputed per level). Local files are read back from
+# their Parquet cache a batch of row groups at a time and narrowed as they come,
+# so the float64 file is never held whole; the pyramid's base level still holds
+# every bar. ``ingest_kwargs`` (e.g. cache_dir) go to csv_ingest for local files
+def build_intraday_pyramid(source, fingerprint=None, **ingest_kwargs):
+    metrics.annotate(cache='miss')
+    schema = {col: csv_ingest.INTRADAY_SCHEMA[col] for col in pyramid.OHLCV_AGG}
+    with metrics.stage('load') as m:
+        if fingerprint is not None:
+            parts = [intraday_frame(batch) for batch in csv_ingest.iter_batches(source, schema=schema, **ingest_kwargs)]
+            df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        else:
+            df = intraday_frame(read_remote_csv(source, [csv_ingest.INTRADAY_DATE_COLUMN, *schema]))
+        time_axis.validate(df['time'].to_numpy())
+        m['rows'] = len(df)
+    # Volume sums and MACD are narrowed per level once built
+    with metrics.stage('indicators'):
+        levels = pyramid.Pyramid.build(df, indicators=intraday_macd)
+    for level in levels.levels.values():
+        frames.downcast(level)
+    return levels
+
+# Live tick feed shared by every session: a local TCP feed (LIVE_FEED=host:port,
+# see `python live_feed.py serve`) or the built-in fake generator. It runs while
+# a live chart polls it, and reconnects after errors (see LiveFeed.poll)
+@st.cache_resource
+def get_live_feed():
+    address = os.environ.get('LIVE_FEED')
+    if address:
+        host, port = address.rsplit(':', 1)
+        source = lambda: live_feed.socket_ticks(host, int(port))
+    else:
+        rate = int(os.environ.get('LIVE_FAKE_RATE', 50_000))
+        source = lambda: live_feed.fake_ticks(rate)
+    return live_feed.LiveFeed(source)
+
+# Static chart/series options for the multipane charts, built and serialized
+# once per process; the three panes share one chart options block
+@st.cache_resource
+def multipane_specs():
+    chart_options = {
+        "width": 800,
+        "height": 400,
+        "layout": {
+            "background": {"type": "solid", "color": "white"},
+            "textColor": "black"
+        },
+        "grid": {
+            "vertLines": {"color": "rgba(197, 203, 206, 0.5)"},
+            "horzLines": {"color": "rgba(197, 203, 206, 0.5)"}
+        },
+        "priceScale": {"borderColor": "rgba(197, 203, 206, 0.8)"},
+        "timeScale": {"borderColor": "rgba(197, 203, 206, 0.8)", "barSpacing": 15}
+    }
+
+    return (
+        ChartSpec(chart_options, [
+            SeriesSpec('Candlestick', {"upColor": COLOR_BULL, "downColor": COLOR_BEAR, "borderVisible": False,
+                                       "wickUpColor": COLOR_BULL, "wickDownColor": COLOR_BEAR})
+        ]),
+        ChartSpec(chart_options, [
+            SeriesSpec('Histogram', {"color": '#26a69a', "priceFormat": {"type": 'volume'}, "priceScaleId": ""},
+                       palette=VOLUME_PALETTE)
+        ]),
+        ChartSpec(chart_options, [
+            SeriesSpec('Line', {"color": 'blue', "lineWidth": 2}),
+            SeriesSpec('Line', {"color": 'green', "lineWidth": 2}),
+            SeriesSpec('Histogram', {"color": 'red', "lineWidth": 1}, palette=MACD_HIST_PALETTE)
+        ]),
+    )
+
+@st.cache_resource
+def multipane_intraday_specs():
+    chartMultipaneOptions = {
+        "width": 800,
+        "height": 400,
+        "layout": {
+            "background": {"type": "solid", "color": "white"},
+            "textColor": "black"
+        },
+        "grid": {
+            "vertLines": {"color": "rgba(197, 203, 206, 0.5)"},
+            "horzLines": {"color": "rgba(197, 203, 206, 0.5)"}
+        },
+        "crosshair": {
+            "mode": 0
+        },
+        "priceScale": {"borderColor": "rgba(197, 203, 206, 0.8)"},
+        "timeScale": {
+            "borderColor": "rgba(197, 203, 206, 0.8)",
+            "barSpacing": 10,
+            "minBarSpacing": 8,
+            "timeVisible": True,
+            "secondsVisible": False,
+        },
+        "watermark": {
+            "visible": True,
+            "fontSize": 48,
+            "horzAlign": 'center',
+            "vertAlign": 'center',
+            "color": 'rgba(171, 71, 188, 0.3)',
+            "text": 'Intraday',
+        }
+    }
+
+    seriesCandlestickChart = [
+        SeriesSpec('Candlestick', {
+            "upColor": COLOR_BULL,
+            "downColor": COLOR_BEAR,
+            "borderVisible": False,
+            "wickUpColor": COLOR_BULL,
+            "wickDownColor": COLOR_BEAR
+        })
+    ]
+
+    seriesVolumeChart = [
+        SeriesSpec('Histogram', {
+            "priceFormat": {
+                "type": 'volume',
+            },
+            "color": '#26a69a',
+            "priceScaleId": ""  # Overlay setting
+        }, price_scale={
+            "scaleMargins": {
+                "top": 0,
+                "bottom": 0,
+            },
+            "alignLabels": False
+        }, palette=VOLUME_PALETTE)
+    ]
+
+    seriesMACDchart = [
+        SeriesSpec('Line', {"color": 'blue', "lineWidth": 2}),
+        SeriesSpec('Line', {"color": 'green', "lineWidth": 2}),
+        SeriesSpec('Histogram', {"color": 'red', "lineWidth": 1}, palette=MACD_HIST_PALETTE)
+    ]
+
+    return (
+        ChartSpec(chartMultipaneOptions, seriesCandlestickChart),
+        ChartSpec(chartMultipaneOptions, seriesVolumeChart),
+        ChartSpec(chartMultipaneOptions, seriesMACDchart),
+    )
+
+# The live chart shares the intraday panes, with seconds on the time axis
+@st.cache_resource
+def live_specs():
+    intraday = multipane_intraday_specs()
+    options = intraday[0].options.value
+    options = dict(options, timeScale=dict(options['timeScale'], secondsVisible=True),
+                   watermark=dict(options['watermark'], text='Live'))
+    return tuple(ChartSpec(options, spec.series) for spec in intraday)
 
 # Function Definitions for Each Chart
 
@@ -196,277 +415,321 @@ def overlaid_series_with_markers():
         }
     ], 'overlaid')
 
-def multipane_chart_with_pandas():
-    # Define colors
-    COLOR_BULL = 'rgba(38,166,154,0.9)'  # Green color for bullish candles
-    COLOR_BEAR = 'rgba(239,83,80,0.9)'   # Red color for bearish candles
+def build_multipane_series(symbol, interval, period, macd_params, width, bars=None, indicators=None):
+    """Render-ready (candles, volume, macd, signal, histogram) ``serializers.Columns``, or ``None`` after an error.
 
-    # Fetch historical data using Yahoo Finance
-    @st.cache_data
+    ``bars`` and ``indicators`` default to the process-wide bar cache and indicator store.
+    """
+    bars = bars if bars is not None else get_bar_cache()
+    indicators = indicators if indicators is not None else get_indicator_store()
+
+    # Fetch historical data using Yahoo Finance, through the tiered bar cache;
+    # only the rendered columns are copied out of it
     def fetch_stock_data():
-        ticker = yf.Ticker("AAPL")
-        data = ticker.history(period='6mo', interval='1d')  # Increased period to 6 months for more data
-        return data[['Open', 'High', 'Low', 'Close', 'Volume']]
+        return bars.get(symbol, interval=interval, period=period, columns=['Open', 'High', 'Low', 'Close', 'Volume'])
 
     # Load the data
-    df = fetch_stock_data()
+    with metrics.stage('fetch') as m:
+        df = fetch_stock_data()
+        m['rows'] = len(df)
 
     # Check if data is available and sufficient
     if df.empty or len(df) < 26:
         st.error("Not enough data available to generate the chart.")
-        return
-
-    # Data Preprocessing: Reset index and convert Date column to datetime
-    df.reset_index(inplace=True)
-
-    # Convert 'Date' to datetime, handling any parsing errors
-    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-    df.dropna(subset=['Date'], inplace=True)  # Drop rows where date conversion failed
-
-    # Format 'time' column to string format for charting
-    df['time'] = df['Date'].dt.strftime('%Y-%m-%d')
-
-    # Add colors for bullish and bearish candlesticks
-    df['color'] = np.where(df['Open'] > df['Close'], COLOR_BEAR, COLOR_BULL)
-
-    # Calculate MACD using pandas_ta
+        return None
+
+    with metrics.stage('transform'):
+        # Convert the Date index to datetime, dropping bars whose date fails to parse
+        dates = pd.to_datetime(df.index, errors='coerce')
+        if dates.hasnans:
+            df, dates = df[~dates.isna()], dates[~dates.isna()]
+
+        # Encode 'time' as epoch seconds of each bar's wall-clock date (vectorized, no strftime)
+        try:
+            times = time_axis.validate(time_axis.epoch_seconds(dates))
+        except ValueError as e:
+            st.error(f"Error encoding the time axis: {e}")
+            return None
+
+    # Calculate MACD (pandas_ta definition) with the streaming engine, resuming
+    # from the checkpoint stored next to the cached bars
+    suffix = '_'.join(map(str, macd_params))
     try:
-        macd = ta.macd(df['Close'], fast=6, slow=12, signal=5)
+        with metrics.stage('indicators'):
+            macd = indicators.compute(
+                (symbol, interval, period, f'MACD_{suffix}'),
+                lambda: streaming_indicators.IndicatorEngine([streaming_indicators.MACD(*macd_params)]),
+                dates, df['Close'],
+            )
         if macd is None or macd.empty:
             raise ValueError("MACD calculation returned an empty DataFrame.")
-        
-        # Assign MACD values to the DataFrame
-        df['MACD'] = macd['MACD_6_12_5']
-        df['MACD_Signal'] = macd['MACDs_6_12_5']
-        df['MACD_Hist'] = macd['MACDh_6_12_5']
     except Exception as e:
         st.error(f"Error calculating MACD: {e}")
-        return
-
-    # Drop rows with NaN values in the MACD columns
-    df.dropna(subset=['MACD', 'MACD_Signal', 'MACD_Hist'], inplace=True)
-
-    # Convert DataFrame to JSON format for the charts
-    try:
-        candles = json.loads(df[['time', 'Open', 'High', 'Low', 'Close']].to_json(orient='records'))
-        volume = json.loads(df[['time', 'Volume']].rename(columns={'Volume': 'value'}).to_json(orient='records'))
-    except ValueError as e:
-        st.error(f"Error converting DataFrame to JSON: {e}")
-        return
-
-    try:
-        macd_fast = json.loads(df[['time', 'MACD']].rename(columns={'MACD': 'value'}).to_json(orient='records'))
-        macd_signal = json.loads(df[['time', 'MACD_Signal']].rename(columns={'MACD_Signal': 'value'}).to_json(orient='records'))
-        macd_hist = json.loads(df[['time', 'MACD_Hist']].rename(columns={'MACD_Hist': 'value'}).to_json(orient='records'))
-    except ValueError as e:
-        st.error(f"Error converting MACD data to JSON: {e}")
-        return
-
-    # Chart configuration
-    chart_options = {
-        "width": 800,
-        "height": 400,
-        "layout": {
-            "background": {"type": "solid", "color": "white"},
-            "textColor": "black"
-        },
-        "grid": {
-            "vertLines": {"color": "rgba(197, 203, 206, 0.5)"},
-            "horzLines": {"color": "rgba(197, 203, 206, 0.5)"}
-        },
-        "priceScale": {"borderColor": "rgba(197, 203, 206, 0.8)"},
-        "timeScale": {"borderColor": "rgba(197, 203, 206, 0.8)", "barSpacing": 15}
-    }
-
-    # Define the data series for the charts
-    series_candlestick = [
-        {"type": 'Candlestick', "data": candles, 
-         "options": {"upColor": COLOR_BULL, "downColor": COLOR_BEAR, "borderVisible": False, 
-                     "wickUpColor": COLOR_BULL, "wickDownColor": COLOR_BEAR}}
-    ]
-
-    series_volume = [
-        {"type": 'Histogram', "data": volume, 
-         "options": {"color": '#26a69a', "priceFormat": {"type": 'volume'}, "priceScaleId": ""}}
-    ]
-
-    series_macd = [
-        {"type": 'Line', "data": macd_fast, "options": {"color": 'blue', "lineWidth": 2}},
-        {"type": 'Line', "data": macd_signal, "options": {"color": 'green', "lineWidth": 2}},
-        {"type": 'Histogram', "data": macd_hist, "options": {"color": 'red', "lineWidth": 1}}
-    ]
-
-    # Render the charts using renderLightweightCharts
-    st.subheader("Multipane Financial Chart - AAPL Stock")
-    renderLightweightCharts([
-        {"chart": chart_options, "series": series_candlestick},
-        {"chart": chart_options, "series": series_volume},
-        {"chart": chart_options, "series": series_macd}
-    ], 'multipane')
-
+        return None
+
+    # One frame with just the rendered columns, floats as float32 where the price
+    # precision allows; the MACD warm-up rows are skipped with a slice, not a copy
+    with metrics.stage('frame'):
+        df = frames.lean_frame(times, {
+            'Open': df['Open'].to_numpy(),
+            'High': df['High'].to_numpy(),
+            'Low': df['Low'].to_numpy(),
+            'Close': df['Close'].to_numpy(),
+            'Volume': df['Volume'].to_numpy(),
+            'MACD': macd[f'MACD_{suffix}'].to_numpy(),
+            'MACD_Signal': macd[f'MACDs_{suffix}'].to_numpy(),
+            'MACD_Hist': macd[f'MACDh_{suffix}'].to_numpy(),
+        })
+        df = frames.skip_warmup(df, ['MACD', 'MACD_Signal', 'MACD_Hist'])
+
+    # Reduce to the pixel budget of the panes' width, keeping panes aligned
+    if width is not None:
+        with metrics.stage('downsample') as m:
+            df = downsampling.downsample_frame(df, downsampling.bar_budget(width), {
+                'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum',
+                'MACD': 'minmax', 'MACD_Signal': 'minmax', 'MACD_Hist': 'minmax',
+            })
+            m['rows'] = len(df)
+
+    # The chart series, as columns the transport packs without building records
+    with metrics.stage('serialize') as m:
+        m['rows'] = len(df)
+        try:
+            candles = serializers.frame_ohlc_columns(df, columns=('Open', 'High', 'Low', 'Close'))
+            volume = serializers.frame_line_columns(
+                df, 'Volume', colors=serializers.color_codes(df['Open'].to_numpy() > df['Close'].to_numpy()))
+        except ValueError as e:
+            st.error(f"Error converting DataFrame to chart series: {e}")
+            return None
+
+        try:
+            macd_fast = serializers.frame_line_columns(df, 'MACD')
+            macd_signal = serializers.frame_line_columns(df, 'MACD_Signal')
+            macd_hist = serializers.frame_line_columns(
+                df, 'MACD_Hist', colors=serializers.color_codes(df['MACD_Hist'].to_numpy() > 0))
+        except ValueError as e:
+            st.error(f"Error converting MACD data to chart series: {e}")
+            return None
+    return candles, volume, macd_fast, macd_signal, macd_hist
+
+@requires('numpy', 'pandas', 'bar_cache', 'downsampling', 'frames', 'memory_cache', 'payload_cache', 'serializers', 'streaming_indicators', 'time_axis')
+def multipane_chart_with_pandas():
+    symbol, interval, period, macd_params = "AAPL", '1d', '6mo', (6, 12, 5)  # 6 months for more data
+    # Downsampled to the 800px-wide panes unless turned off
+    width = 800 if st.session_state.get('downsample_to_width', True) else None
+
+    # The render-ready series are memoized per input and bars version: when the
+    # bars haven't changed, a rerun skips fetching, MACD and serialization
+    key = payload_cache.PayloadKey('multipane_chart_with_pandas', type(get_bar_cache().provider).__name__,
+                                   symbol, interval, period, (('MACD',) + macd_params, width))
+    with metrics.stage('memo') as m:
+        version = get_bar_cache().version(symbol, interval=interval, period=period)
+        series = get_payload_cache().get(key, version)
+        m['cache'] = 'miss' if series is None else 'hit'
+    if series is None:
+        series = build_multipane_series(symbol, interval, period, macd_params, width)
+        if series is None:
+            return
+        get_payload_cache().put(key, version, series)
+    candles, volume, macd_fast, macd_signal, macd_hist = series
+
+    # Render the charts; reruns only send bars that changed since the last render
+    st.subheader(f"Multipane Financial Chart - {symbol} Stock")
+    candlestick_pane, volume_pane, macd_pane = multipane_specs()
+    with metrics.stage('render'):
+        chart_component.render_charts([
+            candlestick_pane.bind(candles),
+            volume_pane.bind(volume),
+            macd_pane.bind(macd_fast, macd_signal, macd_hist)
+        ], 'multipane')
+
+def build_intraday_series(df, width=None):
+    """Render-ready (candles, volume, macd, signal, histogram) ``serializers.Columns`` for bars of a pyramid level.
+
+    ``width`` reduces them to the pixel budget of panes that wide, keeping
+    panes aligned. Returns ``None`` after an error.
+    """
+    if width is not None:
+        with metrics.stage('downsample') as m:
+            df = downsampling.downsample_frame(df, downsampling.bar_budget(width), {
+                'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum',
+                'macd_fast': 'minmax', 'macd_slow': 'minmax', 'macd_hist': 'minmax',
+            })
+            m['rows'] = len(df)
+
+    # The chart series, as columns the transport packs without building records
+    with metrics.stage('serialize') as m:
+        m['rows'] = len(df)
+        try:
+            candles = serializers.frame_ohlc_columns(df)
+            volume = serializers.frame_line_columns(
+                df, 'volume', colors=serializers.color_codes(df['open'].to_numpy() > df['close'].to_numpy()))
+            macd_fast = serializers.frame_line_columns(df, 'macd_fast')
+            macd_slow = serializers.frame_line_columns(df, 'macd_slow')
+            macd_hist = serializers.frame_line_columns(
+                df, 'macd_hist', colors=serializers.color_codes(df['macd_hist'].to_numpy() > 0))
+        except (KeyError, ValueError) as e:
+            st.error(f"Error converting DataFrame to chart series: {e}")
+            return None
+    return candles, volume, macd_fast, macd_slow, macd_hist
+
+@requires('numpy', 'pandas', 'batch_indicators', 'csv_ingest', 'downsampling', 'frames', 'pyramid', 'serializers', 'time_axis')
 def multipane_chart_intraday_from_csv():
-    COLOR_BULL = 'rgba(38,166,154,0.9)'  # #26a69a
-    COLOR_BEAR = 'rgba(239,83,80,0.9)'  # #ef5350
-
     CSVFILE = 'https://github.com/freyastreamlit/streamlit-lightweight-charts/blob/main/examples/MultiPaneChartsFromCSV.csv?raw=true'
 
+    # A local export (INTRADAY_CSV) goes through the cached, schema-typed ingestion path
+    csv_path = os.environ.get('INTRADAY_CSV', CSVFILE)
+
+    # Every timeframe is aggregated (with its own MACD) once per source; bar times are
+    # validated as UNIX timestamps on the way in
     try:
-        df = pd.read_csv(CSVFILE, skiprows=0, parse_dates=['datetime'], skip_blank_lines=True)
+        with metrics.stage('fetch', cache='hit'):
+            fingerprint = csv_ingest.file_fingerprint(csv_path) if os.path.exists(csv_path) else None
+            levels = get_intraday_pyramid(csv_path, fingerprint)
     except Exception as e:
         st.error(f"Error reading CSV file: {e}")
         return
 
+    timeframe = st.radio("Timeframe", levels.labels, horizontal=True, key='intraday_timeframe')
+    # Skip the MACD warm-up bars; this and every later step reads slices (views)
+    # of the level shared by every session, and never writes to them
+    df = frames.skip_warmup(levels.level(timeframe), ['macd_slow'])
+
     # Check if data is sufficient
     if df.empty or len(df) < 26:
-        st.error("Not enough data in CSV to generate the chart.")
+        st.error("Not enough data in CSV to generate the chart at this timeframe.")
         return
 
-    # Convert 'datetime' to UNIX timestamp
-    try:
-        df['time'] = df['datetime'].view('int64') // 10**9  # UNIX timestamp
-    except Exception as e:
-        st.error(f"Error converting datetime to UNIX timestamp: {e}")
+    # Paging sends full-resolution bars a page at a time as the chart is scrolled
+    # back; otherwise reduce to the pixel budget of the 800px-wide panes
+    history = width = None
+    if st.session_state.get('page_history', False):
+        with metrics.stage('page') as m:
+            history = chart_component.page_window('multipane_csv', df['time'].to_numpy())
+            df = df.iloc[history:]
+            m['rows'] = len(df)
+    elif st.session_state.get('downsample_to_width', True):
+        width = 800
+    series = build_intraday_series(df, width)
+    if series is None:
         return
+    candles, volume, macd_fast, macd_slow, macd_hist = series
 
-    df['color'] = np.where(df['open'] > df['close'], COLOR_BEAR, COLOR_BULL)  # bull or bear
-
-    # Export to JSON format
-    try:
-        candles = json.loads(
-            df.filter(['time', 'open', 'high', 'low', 'close'], axis=1)
-              .to_json(orient="records")
-        )
-
-        volume = json.loads(
-            df.filter(['time', 'volume'], axis=1)
-              .rename(columns={"volume": "value"})
-              .to_json(orient="records")
-        )
-
-        macd_fast = json.loads(
-            df.filter(['time', 'macd_fast'], axis=1)
-              .rename(columns={"macd_fast": "value"})
-              .to_json(orient="records")
-        )
-
-        macd_slow = json.loads(
-            df.filter(['time', 'macd_slow'], axis=1)
-              .rename(columns={"macd_slow": "value"})
-              .to_json(orient="records")
-        )
-
-        df['color'] = np.where(df['macd_hist'] > 0, COLOR_BULL, COLOR_BEAR)  # MACD histogram color
-        macd_hist = json.loads(
-            df.filter(['time', 'macd_hist'], axis=1)
-              .rename(columns={"macd_hist": "value"})
-              .to_json(orient="records")
-        )
-    except ValueError as e:
-        st.error(f"Error converting DataFrame to JSON: {e}")
+    # Render the charts; reruns only send bars that changed since the last render
+    st.subheader("Multipane Chart (Intraday) from CSV")
+    candlestick_pane, volume_pane, macd_pane = multipane_intraday_specs()
+    with metrics.stage('render'):
+        chart_component.render_charts([
+            candlestick_pane.bind(candles),
+            volume_pane.bind(volume),
+            macd_pane.bind(macd_fast, macd_slow, macd_hist)
+        ], 'multipane_csv', history=history)
+
+# Charts refresh at most this often in live mode, however fast ticks arrive
+LIVE_FRAME_INTERVAL = 0.25
+
+@st.fragment(run_every=LIVE_FRAME_INTERVAL)
+def live_panes(feed):
+    bars = feed.poll()
+    if feed.error is not None:
+        st.error(f"Live feed stopped: {feed.error} (reconnecting)")
+    if len(bars['time']) < 2:
+        st.info("Waiting for ticks...")
         return
 
-    # Chart configuration
-    chartMultipaneOptions = {
-        "width": 800,
-        "height": 400,
-        "layout": {
-            "background": {"type": "solid", "color": "white"},
-            "textColor": "black"
-        },
-        "grid": {
-            "vertLines": {"color": "rgba(197, 203, 206, 0.5)"},
-            "horzLines": {"color": "rgba(197, 203, 206, 0.5)"}
-        },
-        "crosshair": {
-            "mode": 0
-        },
-        "priceScale": {"borderColor": "rgba(197, 203, 206, 0.8)"},
-        "timeScale": {
-            "borderColor": "rgba(197, 203, 206, 0.8)",
-            "barSpacing": 10,
-            "minBarSpacing": 8,
-            "timeVisible": True,
-            "secondsVisible": False,
-        },
-        "watermark": {
-            "visible": True,
-            "fontSize": 48,
-            "horzAlign": 'center',
-            "vertAlign": 'center',
-            "color": 'rgba(171, 71, 188, 0.3)',
-            "text": 'Intraday',
-        }
-    }
-
-    seriesCandlestickChart = [
-        {
-            "type": 'Candlestick',
-            "data": candles,
-            "options": {
-                "upColor": COLOR_BULL,
-                "downColor": COLOR_BEAR,
-                "borderVisible": False,
-                "wickUpColor": COLOR_BULL,
-                "wickDownColor": COLOR_BEAR
-            }
-        }
-    ]
+    # Only the open bar changes between frames, so reruns send it (and any new bar) as a delta
+    times = bars['time']
+    macd = intraday_macd(bars['close'])
+    candles = serializers.ohlc_columns(times, bars['open'], bars['high'], bars['low'], bars['close'])
+    volume = serializers.line_columns(times, bars['volume'], serializers.color_codes(bars['open'] > bars['close']))
+
+    candlestick_pane, volume_pane, macd_pane = live_specs()
+    chart_component.render_charts([
+        candlestick_pane.bind(candles),
+        volume_pane.bind(volume),
+        macd_pane.bind(serializers.line_columns(times, macd['macd_fast']),
+                       serializers.line_columns(times, macd['macd_slow']),
+                       serializers.line_columns(times, macd['macd_hist'], serializers.color_codes(macd['macd_hist'] > 0)))
+    ], 'live')
+    st.caption(f"{len(times):,} bars from {feed.aggregator.ticks:,} ticks ({feed.tick_rate():,.0f} ticks/s)")
+
+@requires('numpy', 'batch_indicators', 'live_feed', 'serializers')
+def live_ticks_chart():
+    st.subheader("Live Ticks (1-second bars)")
+    live_panes(get_live_feed())
+
+SCREENER_WATCHLIST = (
+    "AAPL MSFT NVDA AMZN GOOGL META TSLA AVGO JPM V MA UNH XOM JNJ WMT PG HD COST ABBV MRK "
+    "KO PEP ADBE CRM NFLX AMD INTC CSCO ORCL QCOM TXN IBM BA CAT GE HON LMT DIS NKE MCD"
+)
+
+@requires('numpy', 'indicator_pool')
+def macd_screener():
+    st.subheader("MACD Screener")
+    text = st.text_area("Watchlist (symbols separated by spaces or commas)", SCREENER_WATCHLIST,
+                        key='screener_symbols')
+    period = st.selectbox("Period", ['6mo', '1y', '2y', '5y'], index=1, key='screener_period')
+    symbols = list(dict.fromkeys(text.replace(',', ' ').upper().split()))
+    if not symbols:
+        st.info("Add symbols to the watchlist.")
+        return
 
-    seriesVolumeChart = [
-        {
-            "type": 'Histogram',
-            "data": volume,
-            "options": {
-                "priceFormat": {
-                    "type": 'volume',
-                },
-                "color": '#26a69a',
-                "priceScaleId": ""  # Overlay setting
-            },
-            "priceScale": {
-                "scaleMargins": {
-                    "top": 0,
-                    "bottom": 0,
-                },
-                "alignLabels": False
-            }
-        }
-    ]
+    # The job outlives reruns; a changed watchlist or period cancels it and starts another
+    key = (tuple(symbols), period)
+    previous = st.session_state.get('_screener_job')
+    if previous is not None and previous[0] == key and not previous[1].cancelled:
+        job = previous[1]
+    else:
+        if previous is not None:
+            previous[1].cancel()
+        job = get_indicator_pool().submit(symbols, interval='1d', period=period)
+        st.session_state['_screener_job'] = (key, job)
+
+    with metrics.stage('indicators') as m:
+        if not job.done():
+            progress = st.progress(0.0, text=f"Computing MACD for {len(symbols)} symbols...")
+            while not job.wait(0.2):
+                progress.progress(job.progress(), text=f"Computing MACD for {len(symbols)} symbols...")
+            progress.empty()
+            m['cache'] = 'miss'
+        else:
+            m['cache'] = 'hit'
+        results = job.results()
+        m['rows'] = len(results)
+
+    rows = []
+    for symbol, series in results.items():
+        columns = series.columns
+        rows.append({
+            'symbol': symbol,
+            'close': round(float(columns['close'][-1]), 2),
+            'MACD': round(float(columns['MACD_12_26_9'][-1]), 3),
+            'signal': round(float(columns['MACDs_12_26_9'][-1]), 3),
+            'histogram': round(float(columns['MACDh_12_26_9'][-1]), 3),
+            'bars': len(series.time),
+        })
+    # Strongest histogram first; symbols still warming up (NaN) last
+    rows.sort(key=lambda row: np.nan_to_num(row['histogram'], nan=-np.inf), reverse=True)
+    if job.missing:
+        st.warning(f"No data for: {', '.join(job.missing)}")
+    if job.errors:
+        st.error(f"{len(job.errors)} chunk(s) failed: {job.errors[0]}")
+    if not rows:
+        return
 
-    seriesMACDchart = [
-        {
-            "type": 'Line',
-            "data": macd_fast,
-            "options": {
-                "color": 'blue',
-                "lineWidth": 2
-            }
-        },
-        {
-            "type": 'Line',
-            "data": macd_slow,
-            "options": {
-                "color": 'green',
-                "lineWidth": 2
+    # Sparklines of every symbol's closes, in one component instance rather than an iframe each
+    with metrics.stage('render'):
+        chart_component.render_grid([
+            {
+                'title': row['symbol'],
+                'caption': f"{row['close']:,.2f}",
+                'color': int(row['histogram'] > 0),
+                'time': results[row['symbol']].time,
+                'values': results[row['symbol']].columns['close'],
             }
-        },
-        {
-            "type": 'Histogram',
-            "data": macd_hist,
-            "options": {
-                "color": 'red',
-                "lineWidth": 1
-            }
-        }
-    ]
-
-    # Render the charts using renderLightweightCharts
-    st.subheader("Multipane Chart (Intraday) from CSV")
-    renderLightweightCharts([
-        {"chart": chartMultipaneOptions, "series": seriesCandlestickChart},
-        {"chart": chartMultipaneOptions, "series": seriesVolumeChart},
-        {"chart": chartMultipaneOptions, "series": seriesMACDchart}
-    ], 'multipane_csv')
+            for row in rows
+        ], 'screener_grid', columns=6, palette=MACD_HIST_PALETTE)
+    st.dataframe(rows, hide_index=True)
 
 def line_chart():
     chartOptions = {
@@ -551,25 +814,27 @@ def histogram_chart():
         }
     }
 
+    # Per-bar colors are codes into the series palette: 1 marks a red bar
     seriesHistogramChart = [{
         "type": 'Histogram',
         "data": [
-            { "value": 1, "time": 1642425322 },
-            { "value": 8, "time": 1642511722 },
-            { "value": 10, "time": 1642598122 },
-            { "value": 20, "time": 1642684522 },
-            { "value": 3, "time": 1642770922, "color": 'red' },
-            { "value": 43, "time": 1642857322 },
-            { "value": 41, "time": 1642943722, "color": 'red' },
-            { "value": 43, "time": 1643030122 },
-            { "value": 56, "time": 1643116522 },
-            { "value": 46, "time": 1643202922, "color": 'red' }
+            { "value": 1, "time": 1642425322, "color": 0 },
+            { "value": 8, "time": 1642511722, "color": 0 },
+            { "value": 10, "time": 1642598122, "color": 0 },
+            { "value": 20, "time": 1642684522, "color": 0 },
+            { "value": 3, "time": 1642770922, "color": 1 },
+            { "value": 43, "time": 1642857322, "color": 0 },
+            { "value": 41, "time": 1642943722, "color": 1 },
+            { "value": 43, "time": 1643030122, "color": 0 },
+            { "value": 56, "time": 1643116522, "color": 0 },
+            { "value": 46, "time": 1643202922, "color": 1 }
         ],
-        "options": { "color": '#26a69a' }
+        "options": { "color": '#26a69a' },
+        "palette": ['#26a69a', 'red']
     }]
 
     st.subheader("Histogram Chart with Watermark")
-    renderLightweightCharts([
+    chart_component.render_charts([
         {
             "chart": chartOptions,
             "series": seriesHistogramChart
@@ -707,6 +972,8 @@ chart_functions = {
     "Overlaid Series with Markers": overlaid_series_with_markers,
     "Multipane Chart with Pandas": multipane_chart_with_pandas,
     "Multipane Chart (Intraday) from CSV": multipane_chart_intraday_from_csv,
+    "Live Ticks": live_ticks_chart,
+    "MACD Screener": macd_screener,
     "Line Chart": line_chart,
     "Area Chart": area_chart,
     "Histogram Chart": histogram_chart,
@@ -715,23 +982,79 @@ chart_functions = {
     "Baseline Chart": baseline_chart
 }
 
-# Display the selected chart
-if selected_chart in chart_functions:
-    chart_functions[selected_chart]()
-else:
-    st.write("Please select a chart from the sidebar.")
-
-# Optional: Add an About section
-st.sidebar.markdown("---")
-st.sidebar.header("About")
-st.sidebar.info("""
+# Sidebar table of the stages timed during this rerun
+def show_diagnostics(records):
+    with st.sidebar.expander("Diagnostics", expanded=True):
+        st.table([
+            {
+                'stage': record['stage'],
+                'ms': round(record['seconds'] * 1000, 1),
+                'rows': record.get('rows'),
+                'bytes': record.get('bytes'),
+                'cache': record.get('cache'),
+            }
+            for record in records
+        ])
+        # Shared memory cache (bars and payloads), if a chart has used it yet
+        if 'memory_cache' in sys.modules:
+            stats = get_memory_cache().stats()
+            st.caption(f"Memory cache: {stats['entries']} entries, "
+                       f"{stats['bytes'] / 2**20:.1f} of {stats['max_bytes'] / 2**20:.0f} MB")
+            st.table([dict(kind=kind, **counts) for kind, counts in stats['classes'].items()])
+
+
+def main():
+    # Set page configuration
+    st.set_page_config(page_title="Lightweight Charts Dashboard", layout="wide")
+
+    # Sidebar for chart selection
+    st.sidebar.title("Select a Chart")
+    selected_chart = st.sidebar.selectbox("Choose a chart to display:", list(chart_functions))
+    st.sidebar.checkbox(
+        "Downsample to chart width", value=True, key='downsample_to_width',
+        help="Reduce large series to about one bar per 2 pixels of chart width before rendering."
+    )
+    st.sidebar.checkbox(
+        "Page history on scroll", value=False, key='page_history',
+        help="Intraday chart: send only the newest bars at full resolution and load older pages as you scroll left."
+    )
+    diagnostics = st.sidebar.checkbox(
+        "Show diagnostics", value=False, key='diagnostics',
+        help="Time each stage of the selected chart (fetch, indicators, serialize, render) on every rerun."
+    )
+
+    # Display the selected chart; stage timings are collected when diagnostics are
+    # shown or logged (METRICS_LOG, see `python metrics.py summary`)
+    if selected_chart in chart_functions:
+        if diagnostics or metrics.DEFAULT_LOG:
+            with metrics.collect(selected_chart) as records:
+                with metrics.stage('total'):
+                    chart_functions[selected_chart]()
+            if diagnostics:
+                show_diagnostics(records)
+        else:
+            chart_functions[selected_chart]()
+    else:
+        st.write("Please select a chart from the sidebar.")
+
+    # Optional: Add an About section
+    st.sidebar.markdown("---")
+    st.sidebar.header("About")
+    st.sidebar.info("""
 This Streamlit application showcases various financial charts using the [Lightweight Charts](https://github.com/tradingview/lightweight-charts) library wrapped by the [streamlit-lightweight-charts](https://github.com/freyastreamlit/streamlit-lightweight-charts) package.
 
 **Features**:
 - Interactive and performant financial charts
 - Multiple chart types: Line, Area, Histogram, Bar, Candlestick, Baseline, and more
-- Data sourced from Yahoo Finance and CSV files
+- Data sourced from Yahoo Finance, CSV files and a live tick feed
+- A MACD screener computed across worker processes
 - Customizable layouts and styles
 
 **Developed by**: [Freyastreamlit](https://github.com/freyastreamlit)
 """)
+
+
+# Streamlit runs the app as __main__; importing it (e.g. from benchmarks.py)
+# only defines the chart functions
+if __name__ == '__main__':
+    main()
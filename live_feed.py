@@ -0,0 +1,251 @@
+"""Live tick ingestion: asyncio consumer, tick-to-bar aggregation.
+
+A ``LiveFeed`` runs an asyncio event loop in a daemon thread, so the
+Streamlit script thread never waits on the network. The loop consumes batches
+of ticks from a source and folds them into OHLCV bars with a
+``BarAggregator``. The chart reads it with ``poll()`` at its own (throttled)
+frame rate, which also restarts a feed that failed and keeps it running: a
+feed nobody has polled for a while stops itself.
+
+Ticks travel as NumPy structured arrays (``TICK_DTYPE``: time, price, size).
+Sources are async generators of such batches:
+
+* ``fake_ticks`` is a local random-walk generator, by default at 50k ticks/s.
+* ``socket_ticks`` reads the same records as raw little-endian bytes from a
+  TCP feed; ``python live_feed.py serve`` runs a fake feed server.
+
+Aggregation is vectorized per batch. Ticks are bucketed by bar start, and
+each run of equal buckets is reduced with ``reduceat`` (first/max/min/last/
+sum). The first run is merged into the open bar. Late ticks (before the
+open bar) are counted into the open bar rather than reopening closed ones.
+"""
+import argparse
+import asyncio
+import contextlib
+import threading
+import time
+
+import numpy as np
+
+TICK_DTYPE = np.dtype([('time', '<f8'), ('price', '<f8'), ('size', '<f8')])
+BAR_COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+
+class BarAggregator:
+    """Folds tick batches into ``bar_seconds`` bars, keeping at most ``max_bars``.
+
+    When full, the oldest half is dropped in one slice, so appends stay
+    amortized O(1). Safe to use from the feed thread and the script thread.
+    """
+
+    def __init__(self, bar_seconds=1, max_bars=3_600):
+        self.bar_seconds = bar_seconds
+        self.max_bars = max_bars
+        self.columns = {name: np.empty(max_bars, dtype=np.int64 if name == 'time' else np.float64)
+                        for name in BAR_COLUMNS}
+        self.length = 0  # bars stored, including the open (last) one
+        self.ticks = 0
+        self.lock = threading.Lock()
+
+    def _append(self, bars):
+        n = len(bars['time'])
+        if self.length + n > self.max_bars:
+            keep = max(min(self.length, self.max_bars - n, self.max_bars // 2), 0)
+            drop_new = max(n - self.max_bars, 0)
+            for name, column in self.columns.items():
+                column[:keep] = column[self.length - keep:self.length]
+            self.length = keep
+            bars = {name: values[drop_new:] for name, values in bars.items()}
+            n -= drop_new
+        for name, column in self.columns.items():
+            column[self.length:self.length + n] = bars[name]
+        self.length += n
+
+    def add(self, ticks):
+        """Aggregate one time-ordered batch of ``TICK_DTYPE`` ticks."""
+        if not len(ticks):
+            return
+        price, size = ticks['price'], ticks['size']
+        buckets = (ticks['time'] // self.bar_seconds).astype(np.int64) * self.bar_seconds
+        with self.lock:
+            self.ticks += len(ticks)
+            # Late ticks land in the newest bar instead of reopening closed ones
+            if self.length:
+                np.maximum(buckets, self.columns['time'][self.length - 1], out=buckets)
+            buckets = np.maximum.accumulate(buckets)
+            starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+            ends = np.append(starts[1:], len(buckets))
+            bars = {
+                'time': buckets[starts],
+                'open': price[starts],
+                'high': np.maximum.reduceat(price, starts),
+                'low': np.minimum.reduceat(price, starts),
+                'close': price[ends - 1],
+                'volume': np.add.reduceat(size, starts),
+            }
+            if self.length and bars['time'][0] == self.columns['time'][self.length - 1]:
+                # First run continues the open bar
+                last = self.length - 1
+                cols = self.columns
+                cols['high'][last] = max(cols['high'][last], bars['high'][0])
+                cols['low'][last] = min(cols['low'][last], bars['low'][0])
+                cols['close'][last] = bars['close'][0]
+                cols['volume'][last] += bars['volume'][0]
+                bars = {name: values[1:] for name, values in bars.items()}
+            if len(bars['time']):
+                self._append(bars)
+
+    def snapshot(self):
+        """Copies of the stored bars (the last one still open) as ``{column: array}``."""
+        with self.lock:
+            return {name: column[:self.length].copy() for name, column in self.columns.items()}
+
+
+async def fake_ticks(rate=50_000, interval=0.02, price=100.0, volatility=2e-5, seed=None):
+    """Random-walk ticks at about ``rate`` per second, in batches every ``interval`` seconds."""
+    rng = np.random.default_rng(seed)
+    last = time.time()
+    while True:
+        await asyncio.sleep(interval)
+        now = time.time()
+        n = rng.poisson(rate * (now - last))
+        ticks = np.empty(n, dtype=TICK_DTYPE)
+        ticks['time'] = np.sort(rng.uniform(last, now, n))
+        ticks['price'] = price * np.exp(np.cumsum(rng.normal(0, volatility, n)))
+        ticks['size'] = rng.integers(1, 500, n)
+        if n:
+            price = ticks['price'][-1]
+        last = now
+        yield ticks
+
+
+async def socket_ticks(host, port, read_size=1 << 16):
+    """Tick batches from a TCP feed sending raw ``TICK_DTYPE`` records."""
+    reader, writer = await asyncio.open_connection(host, port)
+    pending = b''
+    try:
+        while True:
+            data = await reader.read(read_size)
+            if not data:
+                return
+            pending += data
+            whole = len(pending) - len(pending) % TICK_DTYPE.itemsize
+            if whole:
+                yield np.frombuffer(pending[:whole], dtype=TICK_DTYPE)
+                pending = pending[whole:]
+    finally:
+        writer.close()
+
+
+class LiveFeed:
+    """Consumes ``source()`` into ``aggregator`` on a background asyncio loop.
+
+    ``poll()`` restarts the consumer if its source failed or ended (after a
+    failure, at most once per ``retry_delay`` seconds); the bars collected so
+    far are kept.
+    The consumer stops by itself once nothing has polled it for
+    ``idle_timeout`` seconds, and the next ``poll()`` starts it again.
+    """
+
+    def __init__(self, source, aggregator=None, idle_timeout=30.0, retry_delay=2.0):
+        self.source = source
+        self.aggregator = aggregator or BarAggregator()
+        self.idle_timeout = idle_timeout
+        self.retry_delay = retry_delay
+        self.error = None
+        self._thread = None
+        self._loop = None
+        self._task = None
+        self._started = time.time()
+        self._start_ticks = 0
+        self._polled = time.monotonic()
+        self._ended = None  # when the consumer last stopped (monotonic)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self.error = None
+            self._started = time.time()
+            self._start_ticks = self.aggregator.ticks
+            self._polled = time.monotonic()
+            self._thread = threading.Thread(target=self._run, name='live-feed', daemon=True)
+            self._thread.start()
+        return self
+
+    def poll(self):
+        """``snapshot()``, (re)starting the consumer first if it isn't running."""
+        self._polled = time.monotonic()
+        if not self.running and (self.error is None or self._polled - self._ended >= self.retry_delay):
+            self.start()
+        return self.snapshot()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self._consume())
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            self._loop.close()
+            self._ended = time.monotonic()
+
+    async def _consume(self):
+        async with contextlib.aclosing(self.source()) as source:
+            async for ticks in source:
+                self.aggregator.add(ticks)
+                if time.monotonic() - self._polled > self.idle_timeout:
+                    return  # no reader left
+
+    def stop(self, timeout=5):
+        if self._loop is not None and self._task is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def snapshot(self):
+        return self.aggregator.snapshot()
+
+    def tick_rate(self):
+        """Average ticks per second since the last ``start``."""
+        return (self.aggregator.ticks - self._start_ticks) / max(time.time() - self._started, 1e-9)
+
+
+async def serve(host='127.0.0.1', port=9100, rate=50_000):
+    """Serve ``fake_ticks`` to every client as raw ``TICK_DTYPE`` records."""
+    async def handle(reader, writer):
+        try:
+            async for ticks in fake_ticks(rate):
+                writer.write(ticks.tobytes())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help='run a fake tick feed on a local TCP port')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=9100)
+    serve_parser.add_argument('--rate', type=int, default=50_000, help='ticks per second')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.rate))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
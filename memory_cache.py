@@ -0,0 +1,139 @@
+"""Process-wide in-memory cache bounded by bytes, not entries.
+
+``MemoryCache`` holds the bar frames of the ``BarCache`` memory tier and the
+render-ready series of the ``PayloadCache`` for every session. Its memory
+stays under ``max_bytes`` no matter how many symbols users browse:
+
+* Each entry's size is estimated when it is stored (``sizeof``: DataFrames by
+  ``memory_usage(deep=True)``, arrays by ``nbytes``, record lists from a
+  sample). Storing past the budget drops expired entries first, then the
+  least recently used ones. A value larger than the whole budget isn't kept
+  and is counted as a rejection.
+* Every entry belongs to a data class with its own TTL (``DEFAULT_TTLS``:
+  intraday bars go stale sooner than daily ones). Expired entries are misses.
+* All access goes through one lock, so concurrent sessions can share it.
+* ``stats()`` reports hits, misses, evictions, expirations and rejections per class,
+  plus entry count and bytes held.
+
+The budget defaults to ``CACHE_MAX_MB`` (256 MB).
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = int(os.environ.get('CACHE_MAX_MB', 256)) * 2**20
+
+# Seconds an entry of each data class stays fresh (None: until evicted)
+DEFAULT_TTLS = {'intraday': 300, 'daily': 1800, 'default': None}
+
+# Record lists longer than this are sized from their first SAMPLE items
+SAMPLE = 64
+
+
+def data_class(interval):
+    """``'intraday'`` for minute/hour bar intervals, else ``'daily'``."""
+    return 'intraday' if interval.endswith(('m', 'h')) else 'daily'
+
+
+def sizeof(value):
+    """Approximate bytes held by ``value`` (frames, arrays, records and containers of them)."""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(index=True, deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        if len(value) > SAMPLE:
+            sample = sum(sizeof(item) for item in value[:SAMPLE])
+            return sys.getsizeof(value) + sample * len(value) // SAMPLE
+        return sys.getsizeof(value) + sum(sizeof(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class MemoryCache:
+    """Thread-safe, size-aware LRU with per-class TTLs and counters."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttls=None, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.clock = clock
+        self.bytes = 0
+        self._entries = OrderedDict()  # key -> (value, size, kind, expires)
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def _count(self, kind, event):
+        counts = self._counts.setdefault(kind, {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'rejections': 0})
+        counts[event] += 1
+
+    def _drop(self, key, event=None):
+        _, size, kind, _ = self._entries.pop(key)
+        self.bytes -= size
+        if event:
+            self._count(kind, event)
+
+    def get(self, key, default=None, kind='default', accept=None):
+        """Value stored under ``key`` unless expired; ``kind`` labels the miss counter.
+
+        A value failing ``accept(value)`` (e.g. built from older bars) is
+        left in place but counted and returned as a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[3] is not None and self.clock() >= entry[3]:
+                self._drop(key, 'expirations')
+                entry = None
+            if entry is None or (accept is not None and not accept(entry[0])):
+                self._count(kind, 'misses')
+                return default
+            self._entries.move_to_end(key)
+            self._count(entry[2], 'hits')
+            return entry[0]
+
+    def put(self, key, value, kind='default', size=None):
+        """Store ``value`` as data class ``kind``, evicting to stay under ``max_bytes``."""
+        size = sizeof(value) if size is None else size
+        ttl = self.ttls.get(kind, self.ttls['default'])
+        expires = None if ttl is None else self.clock() + ttl
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                self._count(kind, 'rejections')  # would evict everything and still not fit
+                return
+            self._entries[key] = (value, size, kind, expires)
+            self.bytes += size
+            if self.bytes > self.max_bytes:
+                now = self.clock()
+                for old, (_, _, _, old_expires) in list(self._entries.items()):
+                    if old_expires is not None and now >= old_expires:
+                        self._drop(old, 'expirations')
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)), 'evictions')
+
+    def invalidate(self, predicate=None):
+        """Drop every entry (or those whose key matches ``predicate``)."""
+        with self._lock:
+            for key in list(self._entries):
+                if predicate is None or predicate(key):
+                    self._drop(key)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """``{'entries', 'bytes', 'max_bytes', 'classes': {kind: {hits, misses, evictions, expirations, rejections}}}``."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'classes': {kind: dict(counts) for kind, counts in self._counts.items()},
+            }
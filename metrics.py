@@ -0,0 +1,182 @@
+"""Per-rerun stage timing for the chart functions.
+
+The dashboard wraps each hot-path stage of a chart in ``stage``:
+
+    with metrics.stage('fetch') as m:
+        df = get_bar_cache().get(...)
+        m['rows'] = len(df)
+
+Each stage records its wall time plus optional ``rows``, ``bytes`` and
+``cache`` (``'hit'``, ``'partial'`` or ``'miss'``). Library code can
+annotate the stage it runs under with ``annotate(cache=...)`` without
+knowing who is measuring.
+
+Stages are only recorded inside ``collect(chart)``. The recorder lives in a
+``contextvars.ContextVar``, so concurrent Streamlit sessions, each in its own
+script thread, don't mix records. Outside ``collect``, ``stage`` and
+``annotate`` cost almost nothing.
+
+``collect(chart, log=path)`` appends the records as JSON lines.
+``python metrics.py summary LOG`` prints per-chart, per-stage percentiles,
+and ``python metrics.py serve LOG`` exposes the same summary as JSON on a
+local HTTP endpoint.
+"""
+import argparse
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+
+DEFAULT_LOG = os.environ.get('METRICS_LOG') or None
+
+_records = contextvars.ContextVar('metrics_records', default=None)
+_current = contextvars.ContextVar('metrics_stage', default=None)
+_log_lock = threading.Lock()
+
+
+def active():
+    """Whether stages are being recorded (e.g. to skip computing payload sizes)."""
+    return _records.get() is not None
+
+
+@contextlib.contextmanager
+def collect(chart, log=DEFAULT_LOG):
+    """Record every ``stage`` run inside the block; yields the list of records."""
+    records = []
+    token = _records.set(records)
+    try:
+        yield records
+    finally:
+        _records.reset(token)
+        for record in records:
+            record['chart'] = chart
+        if log and records:
+            write(records, log)
+
+
+@contextlib.contextmanager
+def stage(name, **fields):
+    """Time the block as stage ``name``; yields a dict for ``rows``/``bytes``/``cache``."""
+    records = _records.get()
+    if records is None:
+        yield {}
+        return
+    record = dict(fields, stage=name, ts=time.time())
+    token = _current.set(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['seconds'] = time.perf_counter() - start
+        _current.reset(token)
+        records.append(record)
+
+
+def annotate(**fields):
+    """Add fields (e.g. ``cache='hit'``) to the innermost running stage, if any."""
+    record = _current.get()
+    if record is not None:
+        record.update(fields)
+
+
+def write(records, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    lines = ''.join(json.dumps(record, default=str) + '\n' for record in records)
+    with _log_lock, open(path, 'a') as f:
+        f.write(lines)
+
+
+def read(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _percentile(values, q):
+    # Linear interpolation between closest ranks, like numpy's default
+    values = sorted(values)
+    pos = (len(values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def summarize(records):
+    """``{chart: {stage: {count, p50, p95, max, rows, bytes, hit_rate}}}`` over ``records``."""
+    grouped = {}
+    for record in records:
+        grouped.setdefault(record['chart'], {}).setdefault(record['stage'], []).append(record)
+    summary = {}
+    for chart, stages in grouped.items():
+        for name, runs in stages.items():
+            seconds = [run['seconds'] for run in runs]
+            caches = [run['cache'] for run in runs if 'cache' in run]
+            summary.setdefault(chart, {})[name] = {
+                'count': len(runs),
+                'p50': _percentile(seconds, 0.5),
+                'p95': _percentile(seconds, 0.95),
+                'max': max(seconds),
+                'rows': runs[-1].get('rows'),
+                'bytes': runs[-1].get('bytes'),
+                'hit_rate': caches.count('hit') / len(caches) if caches else None,
+            }
+    return summary
+
+
+def _print_summary(summary):
+    print(f"{'chart':<38} {'stage':<11} {'runs':>5} {'p50':>9} {'p95':>9} {'rows':>9} {'bytes':>11} {'hits':>5}")
+    for chart, stages in summary.items():
+        for name, s in stages.items():
+            hits = '-' if s['hit_rate'] is None else f"{s['hit_rate']:.0%}"
+            print(f"{chart:<38} {name:<11} {s['count']:>5} {s['p50']:>8.4f}s {s['p95']:>8.4f}s "
+                  f"{s['rows'] if s['rows'] is not None else '-':>9} "
+                  f"{s['bytes'] if s['bytes'] is not None else '-':>11} {hits:>5}")
+
+
+def serve(path, host='127.0.0.1', port=9101):
+    """Serve ``summarize(read(path))`` as JSON at ``/metrics`` (re-read per request)."""
+    import http.server
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') != '/metrics':
+                self.send_error(404)
+                return
+            body = json.dumps(summarize(read(path)) if os.path.exists(path) else {}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    print(f"Serving {path} summary at http://{host}:{port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    summary_parser = commands.add_parser('summary', help='print per-stage percentiles from a metrics log')
+    summary_parser.add_argument('log', nargs='?', default=DEFAULT_LOG)
+    serve_parser = commands.add_parser('serve', help='serve the summary as JSON on a local port')
+    serve_parser.add_argument('log', nargs='?', default=DEFAULT_LOG)
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=9101)
+    args = parser.parse_args()
+    if not args.log:
+        parser.error("no metrics log given (pass a path or set METRICS_LOG)")
+    if args.command == 'summary':
+        _print_summary(summarize(read(args.log)))
+    else:
+        serve(args.log, args.host, args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Bulk, concurrent multi-symbol bar downloads.
+
+``fetch_many`` splits the symbols into batches, requests each batch with one
+bulk call (``provider.history_many``) on a bounded thread pool and retries
+failed batches with jittered exponential backoff. It returns one result per
+symbol, in input order, with every frame reindexed onto a shared time axis
+and the seconds spent fetching that symbol: a bulk call's time (and that of
+failed attempts and backoff) is split evenly among its symbols, so latencies
+compare with single-symbol requests whatever the batch size.
+
+Any bar_cache provider works; one without ``history_many`` is called per
+symbol inside its batch. ``bar_cache.FakeProvider`` (with optional latency
+and injected failures) stands in for the network in tests.
+"""
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from lazy_imports import lazy_import
+
+bar_cache = lazy_import('bar_cache')
+
+FetchResult = namedtuple('FetchResult', ['symbol', 'frame', 'latency', 'attempts', 'error'])
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_WORKERS = 4
+
+
+def backoff_delay(attempt, base=0.5, cap=8.0, rng=random):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return rng.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _history_many(provider, symbols, interval, period, start):
+    # ``({symbol: frame}, {symbol: seconds})``
+    if hasattr(provider, 'history_many'):
+        began = time.perf_counter()
+        frames = provider.history_many(symbols, interval, period=period, start=start)
+        return frames, dict.fromkeys(symbols, (time.perf_counter() - began) / len(symbols))
+    frames, latencies = {}, {}
+    for symbol in symbols:
+        began = time.perf_counter()
+        frames[symbol] = provider.history(symbol, interval, period=period, start=start)
+        latencies[symbol] = time.perf_counter() - began
+    return frames, latencies
+
+
+def _fetch_batch(provider, symbols, interval, period, start, retries, base_delay, sleep):
+    began = time.perf_counter()
+    error = None
+    for attempt in range(retries + 1):
+        tried = time.perf_counter()
+        try:
+            frames, latencies = _history_many(provider, symbols, interval, period, start)
+            break
+        except Exception as e:  # network errors surface as many different types
+            error = e
+            if attempt < retries:
+                sleep(backoff_delay(attempt, base_delay))
+    else:
+        frames, tried = {}, time.perf_counter()
+        latencies = dict.fromkeys(symbols, 0.0)
+    # Failed attempts and backoff before the final one are shared by the whole batch
+    waited = (tried - began) / len(symbols)
+    results = {}
+    for symbol in symbols:
+        frame = frames.get(symbol)
+        latency = waited + latencies[symbol]
+        if frame is None or frame.empty:
+            results[symbol] = FetchResult(symbol, None, latency, attempt + 1, error or LookupError(f"No data for {symbol}"))
+        else:
+            results[symbol] = FetchResult(symbol, frame, latency, attempt + 1, None)
+    return results
+
+
+def align(results):
+    """Reindex every successful frame onto the union of their timestamps."""
+    frames = [r.frame for r in results.values() if r.frame is not None]
+    if not frames:
+        return results
+    index = frames[0].index
+    for frame in frames[1:]:
+        index = index.union(frame.index)
+    return {
+        symbol: r._replace(frame=r.frame.reindex(index)) if r.frame is not None else r
+        for symbol, r in results.items()
+    }
+
+
+def fetch_many(symbols, interval='1d', period=None, start=None, provider=None,
+               batch_size=DEFAULT_BATCH_SIZE, max_workers=DEFAULT_WORKERS,
+               retries=3, base_delay=0.5, aligned=True, sleep=time.sleep):
+    """Fetch bars for ``symbols``; returns ``{symbol: FetchResult}`` in input order."""
+    if provider is None:
+        provider = bar_cache.default_provider()
+    symbols = list(dict.fromkeys(symbols))
+    batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(_fetch_batch, provider, batch, interval, period, start, retries, base_delay, sleep)
+            for batch in batches
+        ]
+        for future in futures:
+            results.update(future.result())
+    results = {symbol: results[symbol] for symbol in symbols}
+    return align(results) if aligned else results
+
+
+def latency_report(results):
+    """``(symbol, latency seconds, attempts, error)`` rows, slowest first."""
+    rows = [(r.symbol, r.latency, r.attempts, None if r.error is None else str(r.error)) for r in results.values()]
+    return sorted(rows, key=lambda row: row[1], reverse=True)
@@ -1,10 +1,12 @@
 import streamlit as st
 from streamlit_lightweight_charts import renderLightweightCharts
-import json
 import numpy as np
-import yfinance as yf
 import pandas as pd
-import pandas_ta as ta
+
+import bar_cache
+import serializers
+import streaming_indicators
+import time_axis
 
 # Colors for candlestick and MACD charts
 COLOR_BULL = 'rgba(38,166,154,0.9)'  # Green color for bullish
@@ -12,11 +14,19 @@ COLOR_BEAR = 'rgba(239,83,80,0.9)'   # Red color for bearish
 
 st.set_page_config(page_title="Multipane Financial Chart", layout="wide")
 
-# Fetch historical data for the AAPL stock using Yahoo Finance
-@st.cache_data
+# Process-wide bar cache shared by every session (memory -> Parquet -> Yahoo)
+@st.cache_resource
+def get_bar_cache():
+    return bar_cache.BarCache()
+
+# Checkpointed indicator state/outputs, stored alongside the cached bars
+@st.cache_resource
+def get_indicator_store():
+    return streaming_indicators.IndicatorStore(get_bar_cache().store.root)
+
+# Fetch historical data for the AAPL stock using Yahoo Finance, through the bar cache
 def get_stock_data():
-    ticker = yf.Ticker("AAPL")
-    df = ticker.history(period='3mo', interval='1d')
+    df = get_bar_cache().get("AAPL", interval='1d', period='3mo')
     return df[['Open', 'High', 'Low', 'Close', 'Volume']]
 
 df = get_stock_data()
@@ -29,17 +39,26 @@ if df.empty or len(df) < 26:  # MACD needs at least 26 data points
 # Reset the index to turn the DateTimeIndex into a column
 df.reset_index(inplace=True)
 
-# Ensure the 'Date' column is of datetime type and convert to string format
+# Ensure the 'Date' column is of datetime type and encode it as epoch seconds
 df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
 df.dropna(subset=['Date'], inplace=True)
-df['time'] = df['Date'].dt.strftime('%Y-%m-%d')
+try:
+    df['time'] = time_axis.validate(time_axis.epoch_seconds(df['Date']))
+except ValueError as e:
+    st.error(f"Error encoding the time axis: {e}")
+    st.stop()
 
 # Add colors for bullish and bearish candlesticks
 df['color'] = np.where(df['Open'] > df['Close'], COLOR_BEAR, COLOR_BULL)
 
-# Calculate MACD using pandas_ta
+# Calculate MACD (pandas_ta definition) with the streaming engine, resuming
+# from the checkpoint stored next to the cached bars
 try:
-    macd_df = ta.macd(df['Close'], fast=6, slow=12, signal=5)
+    macd_df = get_indicator_store().compute(
+        ('AAPL', '1d', '3mo', 'MACD_6_12_5'),
+        lambda: streaming_indicators.IndicatorEngine([streaming_indicators.MACD(6, 12, 5)]),
+        df['Date'], df['Close'],
+    )
     if macd_df is None or macd_df.empty:
         raise ValueError("MACD calculation returned an empty DataFrame.")
     
@@ -57,18 +76,18 @@ except Exception as e:
 # Drop any rows with NaN values in the MACD columns
 df.dropna(subset=['MACD', 'MACD_Signal', 'MACD_Hist'], inplace=True)
 
-# Convert data to JSON format required by streamlit_lightweight_charts
+# Convert DataFrame columns to the record lists used by the charts
 try:
-    candles = json.loads(df[['time', 'Open', 'High', 'Low', 'Close']].to_json(orient="records"))
-    volume = json.loads(df[['time', 'Volume']].rename(columns={"Volume": "value"}).to_json(orient="records"))
+    candles = serializers.frame_ohlc_records(df, columns=('Open', 'High', 'Low', 'Close'))
+    volume = serializers.frame_line_records(df, 'Volume')
 except ValueError as e:
-    st.error(f"Error converting DataFrame to JSON: {e}")
+    st.error(f"Error converting DataFrame to chart records: {e}")
     st.stop()
 
-# Convert the MACD, MACD Signal, and MACD Histogram to JSON format
-macd_fast = json.loads(df[['time', 'MACD']].rename(columns={"MACD": "value"}).to_json(orient="records"))
-macd_signal = json.loads(df[['time', 'MACD_Signal']].rename(columns={"MACD_Signal": "value"}).to_json(orient="records"))
-macd_hist = json.loads(df[['time', 'MACD_Hist']].rename(columns={"MACD_Hist": "value"}).to_json(orient="records"))
+# Convert the MACD, MACD Signal, and MACD Histogram to chart records
+macd_fast = serializers.frame_line_records(df, 'MACD')
+macd_signal = serializers.frame_line_records(df, 'MACD_Signal')
+macd_hist = serializers.frame_line_records(df, 'MACD_Hist')
 
 # Generate colors for the MACD histogram
 df['color'] = np.where(df['MACD_Hist'] > 0, COLOR_BULL, COLOR_BEAR)
@@ -0,0 +1,52 @@
+"""Time-window lookups for viewport paging.
+
+In paging mode a chart is sent only its newest page of bars. When the user
+scrolls close to the oldest loaded bar, the frontend asks for the page
+before it, sized to the visible range plus a prefetch margin. The server
+keeps the full, sorted time column and finds window edges by binary search,
+so a lookup costs O(log n) however much history there is.
+"""
+from lazy_imports import lazy_import
+
+# Loaded on first use: chart_component imports this module for every chart
+np = lazy_import('numpy')
+
+DEFAULT_PAGE_SIZE = 1_000
+
+
+class TimeIndex:
+    """Binary-search lookups over a sorted (strictly increasing) time column."""
+
+    def __init__(self, times):
+        self.times = np.asarray(times)
+
+    def __len__(self):
+        return len(self.times)
+
+    def locate(self, time):
+        """Index of the first bar at or after ``time``."""
+        return int(np.searchsorted(self.times, time, side='left'))
+
+    def window(self, start=None, end=None):
+        """``slice`` of the bars with ``start <= time <= end`` (``None`` is open-ended)."""
+        lo = 0 if start is None else self.locate(start)
+        hi = len(self.times) if end is None else int(np.searchsorted(self.times, end, side='right'))
+        return slice(lo, hi)
+
+    def time_at(self, i):
+        return self.times[i].item()
+
+
+def page_start(index, loaded_from=None, before=None, bars=0, page_size=DEFAULT_PAGE_SIZE):
+    """Index of the oldest bar to send.
+
+    ``loaded_from`` is the time of the oldest bar already sent (``None`` on the
+    first render, which gets the newest ``page_size`` bars). A page request
+    moves the window to ``max(page_size, bars)`` bars before the time
+    ``before``; the window never shrinks.
+    """
+    n = len(index)
+    start = max(n - page_size, 0) if loaded_from is None else index.locate(loaded_from)
+    if before is not None:
+        start = min(start, max(index.locate(before) - max(page_size, int(bars)), 0))
+    return start
@@ -0,0 +1,44 @@
+"""Process-wide memo of render-ready chart series.
+
+A chart's series (the record lists handed to ``chart_component.render_charts``)
+depend only on its inputs: data source, symbol, interval, period, indicator
+parameters and render options, plus the bars themselves. ``PayloadCache``
+keeps the last result per ``PayloadKey`` together with the bars' version
+(``BarCache.version``). A rerun whose key and version match reuses it and
+skips the fetch, date handling, indicators and serialization.
+
+Invalidation is explicit: a new version replaces the entry for its key, and
+``invalidate`` drops entries per symbol/interval like ``BarCache.invalidate``.
+Entries live in a byte-bounded ``memory_cache.MemoryCache`` (which the bar
+cache may share) and expire with their data class. Cached series are shared
+by every session, so callers must not modify them.
+"""
+from collections import namedtuple
+
+import memory_cache
+
+# ``params`` holds everything else the series depend on (indicator parameters, downsampling width...)
+PayloadKey = namedtuple('PayloadKey', ['chart', 'source', 'symbol', 'interval', 'period', 'params'])
+
+
+class PayloadCache:
+    """Last built series per key, for the bars version they were built from."""
+
+    def __init__(self, memory=None):
+        self.memory = memory if memory is not None else memory_cache.MemoryCache()
+
+    def get(self, key, version):
+        """Series cached for ``key`` at ``version``, else ``None``."""
+        entry = self.memory.get(key, kind=memory_cache.data_class(key.interval),
+                                accept=lambda entry: entry[0] == version)
+        return None if entry is None else entry[1]
+
+    def put(self, key, version, series):
+        self.memory.put(key, (version, series), memory_cache.data_class(key.interval))
+
+    def invalidate(self, symbol=None, interval=None):
+        """Drop entries (all, per symbol or per symbol/interval)."""
+        self.memory.invalidate(lambda key: (
+            isinstance(key, PayloadKey)
+            and (symbol is None or key.symbol == symbol) and (interval is None or key.interval == interval)
+        ))
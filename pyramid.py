@@ -0,0 +1,125 @@
+"""Multi-resolution OHLCV pyramid for instant timeframe switching.
+
+``Pyramid.build`` aggregates base bars into every coarser timeframe once
+(1m -> 5m -> 15m -> 1h -> 1d). Each level is built from the coarsest level
+already built whose width divides its own, rather than from the base bars:
+buckets are aligned to the epoch, so every coarse bar is then exactly a run
+of finer ones. A level whose width isn't a multiple of the base bar size
+(5m over 2m bars, 15m over 10m bars) is left out, since some base bars
+would straddle two of its buckets. Bucketing is a single vectorized pass over the sorted epoch
+seconds: open is the first bar, high the max, low the min, close the last
+bar and volume the sum. Indicators are then computed on each level's own
+closes, since a 5m MACD is not an aggregate of 1m MACD values.
+
+After the build, switching timeframe is a dict lookup (``Pyramid.level``).
+``PyramidCache`` keeps the latest pyramid per source for the whole process.
+"""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import downsampling
+
+# Timeframe label -> bar width in seconds; each width divides the next
+LEVELS = {'1m': 60, '5m': 300, '15m': 900, '1h': 3600, '1d': 86400}
+OHLCV_AGG = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+
+def bar_seconds(times):
+    """Most common step between consecutive epoch-second ``times``."""
+    steps = np.diff(np.asarray(times, dtype=np.int64))
+    if not len(steps):
+        return 0
+    values, counts = np.unique(steps, return_counts=True)
+    return int(values[counts.argmax()])
+
+
+def aggregate(frame, seconds, agg=OHLCV_AGG, time_col='time'):
+    """Re-bucket ``frame`` (sorted epoch-second ``time_col``) into ``seconds``-wide bars.
+
+    Each bar is stamped with the start of its bucket; only ``time_col`` and
+    the ``agg`` columns are kept.
+    """
+    times = frame[time_col].to_numpy(dtype=np.int64)
+    buckets = times - times % seconds
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    columns = {time_col: buckets[starts]}
+    for col, how in agg.items():
+        columns[col] = downsampling.REDUCERS[how](frame[col].to_numpy(), starts)
+    return pd.DataFrame(columns)
+
+
+class Pyramid:
+    """Bars at several timeframes, keyed by label (``'1m'``, ``'5m'``, ...)."""
+
+    def __init__(self, levels):
+        self.levels = dict(levels)
+
+    @property
+    def labels(self):
+        return list(self.levels)
+
+    def level(self, label):
+        """Frame for timeframe ``label``; shared, so copy before modifying it."""
+        return self.levels[label]
+
+    @classmethod
+    def build(cls, frame, indicators=None, widths=LEVELS, agg=OHLCV_AGG, time_col='time'):
+        """Aggregate ``frame`` into every level of ``widths`` that is a multiple of its own bar size.
+
+        ``frame`` holds sorted, unique epoch seconds in ``time_col``.
+        ``indicators`` maps a level's close array to ``{column: array}`` added to
+        that level.
+        """
+        step = bar_seconds(frame[time_col])
+        base_label = next((label for label, width in widths.items() if width == step), f"{step}s")
+        base = frame[[time_col, *agg]].reset_index(drop=True)
+        levels = {base_label: base}
+        built = {step: base}  # width -> level
+        for label, width in sorted(widths.items(), key=lambda item: item[1]):
+            if width <= step or width % step:
+                continue
+            source = built[max(w for w in built if width % w == 0)]
+            levels[label] = built[width] = aggregate(source, width, agg, time_col)
+        if indicators is not None:
+            for level in levels.values():
+                for col, values in indicators(level['close'].to_numpy()).items():
+                    level[col] = values
+        return cls(levels)
+
+
+class PyramidCache:
+    """Latest ``Pyramid`` per source, held outside any byte budget.
+
+    A multi-GB source yields a pyramid larger than a size-bounded cache would
+    keep, and rebuilding it on every rerun is what the pyramid avoids. So each
+    source keeps exactly one pyramid, replaced when its ``version`` (e.g. the
+    file fingerprint) changes or its optional ``ttl`` runs out; memory grows
+    with the number of sources, not their history. Builds are serialized per
+    source, so concurrent sessions build a source once while other sources
+    build in parallel.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._entries = {}  # source -> (version, expires, pyramid)
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, source, version, build, ttl=None):
+        """Pyramid of ``source`` at ``version``, calling ``build()`` if it isn't held."""
+        with self._lock:
+            lock = self._locks.setdefault(source, threading.Lock())
+        with lock:
+            entry = self._entries.get(source)
+            if entry is not None and entry[0] == version and (entry[1] is None or self.clock() < entry[1]):
+                return entry[2]
+            self._entries.pop(source, None)  # let the old pyramid go before building the new one
+            levels = build()
+            self._entries[source] = (version, None if ttl is None else self.clock() + ttl, levels)
+            return levels
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,196 @@
+"""Direct column-to-record serializers for renderLightweightCharts.
+
+The charts used to build every series with
+``json.loads(df[[...]].rename(...).to_json(orient="records"))``, which copies
+the frame, encodes it to a JSON string and decodes it again into a list of
+dicts. The helpers here go straight from NumPy columns to the same list of
+``{"time", "value"}`` / ``{"time", "open", "high", "low", "close"}`` records.
+
+Per-point colors are palette codes rather than color strings: ``color_codes``
+turns conditions such as ``open > close`` into small integers, sent as each
+point's ``color``. The series' ``SeriesSpec(palette=...)`` maps them to colors
+on the client.
+
+For ``chart_component.render_charts`` the ``*_columns`` variants skip the
+records altogether: they return ``Columns``, which the binary transport packs
+straight from the arrays. Record lists remain for ``renderLightweightCharts``.
+"""
+import hashlib
+import json
+
+import numpy as np
+
+import transport
+
+OHLC_KEYS = ('open', 'high', 'low', 'close')
+
+
+def time_column(values):
+    """Return the time column as a list of plain Python str/int values."""
+    arr = np.asarray(values)
+    if arr.dtype.kind == 'M':
+        # Naive datetime64 -> UNIX seconds, which the charts accept directly
+        arr = arr.astype('datetime64[s]').astype(np.int64)
+    return arr.tolist()
+
+
+def _float32_decimals(arr):
+    # float32 -> float64 at the fewest significant digits (7 to 9) that read back
+    # as the same float32, so a float32 price serializes as the decimal it stands
+    # for (100.01, not 100.01000213623047)
+    values = arr.astype(np.float64)
+    magnitude = np.floor(np.log10(np.abs(values), where=values != 0, out=np.zeros_like(values)))
+    out = values.copy()
+    with np.errstate(invalid='ignore', over='ignore'):  # inf/NaN never match and keep their value
+        for digits in (9, 8, 7):
+            scale = 10.0 ** (digits - 1 - magnitude)
+            rounded = np.rint(values * scale) / scale
+            exact = rounded.astype(np.float32) == arr
+            out[exact] = rounded[exact]
+    return out
+
+
+def value_column(values):
+    """Return a numeric column as a list, with NaN mapped to None (JSON null)."""
+    arr = np.asarray(values)
+    if arr.dtype == np.float32:
+        arr = _float32_decimals(arr)
+    out = arr.tolist()
+    if arr.dtype.kind == 'f':
+        missing = np.flatnonzero(np.isnan(arr))
+        for i in missing.tolist():
+            out[i] = None
+    return out
+
+
+def color_codes(*conditions):
+    """Palette index per point: ``i + 1`` for the first true ``conditions[i]``, else 0."""
+    conditions = [np.asarray(c, dtype=bool) for c in conditions]
+    codes = np.zeros(conditions[0].shape, dtype=np.uint8)
+    for i, condition in reversed(list(enumerate(conditions))):
+        codes[condition] = i + 1
+    return codes
+
+
+def line_records(time, values, colors=None):
+    """Build ``[{"time": t, "value": v}, ...]`` for Line/Area/Histogram/Baseline series.
+
+    ``colors`` adds a per-point ``color``: palette codes from ``color_codes``.
+    """
+    if colors is not None:
+        return [{'time': t, 'value': v, 'color': c}
+                for t, v, c in zip(time_column(time), value_column(values), np.asarray(colors).tolist())]
+    return [{'time': t, 'value': v} for t, v in zip(time_column(time), value_column(values))]
+
+
+def ohlc_records(time, open_, high, low, close):
+    """Build ``[{"time", "open", "high", "low", "close"}, ...]`` for Candlestick/Bar series."""
+    return [
+        {'time': t, 'open': o, 'high': h, 'low': l, 'close': c}
+        for t, o, h, l, c in zip(
+            time_column(time),
+            value_column(open_),
+            value_column(high),
+            value_column(low),
+            value_column(close),
+        )
+    ]
+
+
+def records(time, columns):
+    """Build records with arbitrary extra keys; ``columns`` maps key -> array."""
+    keys = ('time',) + tuple(columns)
+    cols = [time_column(time)] + [value_column(v) for v in columns.values()]
+    return [dict(zip(keys, row)) for row in zip(*cols)]
+
+
+def frame_line_records(df, value_col, time_col='time', colors=None):
+    """``line_records`` over two DataFrame columns, without slicing the frame."""
+    return line_records(df[time_col].to_numpy(), df[value_col].to_numpy(), colors)
+
+
+def frame_ohlc_records(df, columns=OHLC_KEYS, time_col='time'):
+    """``ohlc_records`` over DataFrame columns given in open/high/low/close order."""
+    o, h, l, c = (df[col].to_numpy() for col in columns)
+    return ohlc_records(df[time_col].to_numpy(), o, h, l, c)
+
+
+class Columns:
+    """One series as NumPy columns: ``time`` plus ``{key: array}``.
+
+    ``pack`` turns the arrays straight into transport buffers, with no record
+    per point; ``records`` builds the equivalent record list, for the small
+    per-bar updates and the JSON transport. A NaN leaves its field out of the
+    point, so a point without a value is a whitespace point (as in
+    ``transport.unpack``). Slicing by rows returns ``Columns`` of views.
+    """
+    __slots__ = ('time', 'columns')
+
+    def __init__(self, time, columns):
+        time = np.asarray(time)
+        if time.dtype.kind == 'M':
+            time = time.astype('datetime64[s]').astype(np.int64)
+        self.time = time
+        self.columns = {key: np.asarray(values) for key, values in columns.items()}
+
+    def __len__(self):
+        return len(self.time)
+
+    def __getitem__(self, rows):
+        return Columns(self.time[rows], {key: values[rows] for key, values in self.columns.items()})
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + self.time.nbytes + sum(values.nbytes for values in self.columns.values())
+
+    def time_at(self, i):
+        return self.time[i].item()
+
+    def locate(self, time):
+        """Row of the first point at or after ``time``."""
+        return int(np.searchsorted(self.time, time))
+
+    def records(self):
+        keys = ('time', *self.columns)
+        columns = [self.time.tolist()] + [value_column(values) for values in self.columns.values()]
+        return [{key: value for key, value in zip(keys, row) if value is not None} for row in zip(*columns)]
+
+    def digest(self):
+        """Hash of the column contents, to tell whether two ``Columns`` hold the same points."""
+        digest = hashlib.blake2b(digest_size=16)
+        for key, values in (('time', self.time), *self.columns.items()):
+            digest.update(f"{key}:{values.dtype}".encode())
+            digest.update(json.dumps(values.tolist()).encode() if values.dtype == object
+                          else np.ascontiguousarray(values))
+        return digest.hexdigest()
+
+    def pack(self, buffers, value_dtype='float64'):
+        """``transport.pack_columns`` descriptor; float32 values travel as the decimals they stand for."""
+        columns = {
+            key: _float32_decimals(values) if values.dtype == np.float32 and value_dtype == 'float64' else values
+            for key, values in self.columns.items()
+        }
+        return transport.pack_columns(self.time, columns, buffers, value_dtype)
+
+
+def line_columns(time, values, colors=None):
+    """``line_records`` as ``Columns``."""
+    columns = {'value': values}
+    if colors is not None:
+        columns['color'] = colors
+    return Columns(time, columns)
+
+
+def ohlc_columns(time, open_, high, low, close):
+    """``ohlc_records`` as ``Columns``."""
+    return Columns(time, {'open': open_, 'high': high, 'low': low, 'close': close})
+
+
+def frame_line_columns(df, value_col, time_col='time', colors=None):
+    """``frame_line_records`` as ``Columns``."""
+    return line_columns(df[time_col].to_numpy(), df[value_col].to_numpy(), colors)
+
+
+def frame_ohlc_columns(df, columns=OHLC_KEYS, time_col='time'):
+    """``frame_ohlc_records`` as ``Columns``."""
+    o, h, l, c = (df[col].to_numpy() for col in columns)
+    return ohlc_columns(df[time_col].to_numpy(), o, h, l, c)
@@ -0,0 +1,438 @@
+"""Stateful indicators with O(1) per-bar updates and on-disk checkpoints.
+
+Each indicator keeps just enough state to fold in one more bar, follows the
+pandas_ta definitions (so ``MACD(6, 12, 5)`` reproduces ``ta.macd(close, 6,
+12, 5)`` bar for bar) and names its outputs like pandas_ta does.
+
+``IndicatorEngine`` drives a set of indicators over ``(time, close)`` bars.
+The newest bar is provisional: feeding the same timestamp again replaces it,
+which is how the bar cache re-delivers a still-forming last bar.
+``IndicatorStore`` checkpoints engine state and outputs next to the cached
+bars, so appending bars only costs the new bars. A full (re)build runs
+``IndicatorEngine.run_batch``, which seeds indicators that have a ``batch``
+method (EMA, MACD) from the vectorized ``batch_indicators`` kernels instead
+of the per-bar loop.
+"""
+import json
+import math
+import os
+import tempfile
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+import batch_indicators
+import metrics
+
+NAN = float('nan')
+
+# Per-key locks of IndicatorStore are striped over this many locks
+LOCK_STRIPES = 64
+
+
+class EMA:
+    """pandas_ta ``ema``: seeded with the SMA of the first ``length`` values."""
+
+    def __init__(self, length):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.columns = [f"EMA_{length}"]
+        self.count = 0
+        self.total = 0.0
+        self.value = NAN
+
+    @property
+    def ready(self):
+        return self.count >= self.length
+
+    def update(self, x):
+        if self.count < self.length:
+            self.count += 1
+            self.total += x
+            if self.count == self.length:
+                self.value = self.total / self.length
+        else:
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return (self.value,)
+
+    def batch(self, x):
+        """Outputs for the gap-free values ``x`` from a fresh state, vectorized; keeps the final state."""
+        x = np.asarray(x, dtype=np.float64)
+        out = batch_indicators.ema(x[None, :], self.length)[0]
+        self.count = min(len(x), self.length)
+        self.total = float(np.cumsum(x[:self.count])[-1]) if self.count else 0.0  # summed in order, as update does
+        self.value = float(out[-1]) if len(x) >= self.length else NAN
+        return out[:, None]
+
+    def state(self):
+        return {'count': self.count, 'total': self.total, 'value': self.value}
+
+    def load(self, state):
+        self.count, self.total, self.value = state['count'], state['total'], state['value']
+
+
+class MACD:
+    """pandas_ta ``macd``: ``MACD_f_s_g``, ``MACDh_f_s_g`` and ``MACDs_f_s_g``."""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast, self.slow, self.signal = EMA(fast), EMA(slow), EMA(signal)
+        suffix = f"{fast}_{slow}_{signal}"
+        self.columns = [f"MACD_{suffix}", f"MACDh_{suffix}", f"MACDs_{suffix}"]
+
+    def update(self, x):
+        (fast,) = self.fast.update(x)
+        (slow,) = self.slow.update(x)
+        if not (self.fast.ready and self.slow.ready):
+            return NAN, NAN, NAN
+        macd = fast - slow
+        # The signal EMA starts at the first valid MACD value, as in pandas_ta
+        (signal,) = self.signal.update(macd)
+        return macd, macd - signal, signal
+
+    def batch(self, x):
+        """Outputs for the gap-free values ``x`` from a fresh state, vectorized; keeps the final state."""
+        fast, slow = self.fast.batch(x)[:, 0], self.slow.batch(x)[:, 0]
+        out = np.full((len(fast), 3), NAN)
+        first = max(self.fast.length, self.slow.length) - 1  # first bar with both EMAs ready
+        if len(fast) > first:
+            line = fast[first:] - slow[first:]
+            signal = self.signal.batch(line)[:, 0]
+            out[first:] = np.column_stack([line, line - signal, signal])
+        return out
+
+    def state(self):
+        return {'fast': self.fast.state(), 'slow': self.slow.state(), 'signal': self.signal.state()}
+
+    def load(self, state):
+        self.fast.load(state['fast'])
+        self.slow.load(state['slow'])
+        self.signal.load(state['signal'])
+
+
+class RMA:
+    """Wilder's moving average as pandas_ta computes it: ``ewm(alpha=1/n, min_periods=n)``."""
+
+    def __init__(self, length):
+        self.length = length
+        self.decay = 1 - 1.0 / length
+        self.weighted = 0.0
+        self.weights = 0.0
+        self.count = 0
+
+    def update(self, x):
+        # adjust=True EWM as a running ratio of weighted sum to total weight
+        self.weighted = x + self.decay * self.weighted
+        self.weights = 1 + self.decay * self.weights
+        self.count += 1
+        return self.weighted / self.weights if self.count >= self.length else NAN
+
+    def state(self):
+        return {'weighted': self.weighted, 'weights': self.weights, 'count': self.count}
+
+    def load(self, state):
+        self.weighted, self.weights, self.count = state['weighted'], state['weights'], state['count']
+
+
+class RSI:
+    """pandas_ta ``rsi`` (``RSI_n``)."""
+
+    def __init__(self, length=14):
+        self.gain, self.loss = RMA(length), RMA(length)
+        self.columns = [f"RSI_{length}"]
+        self.prev = None
+
+    def update(self, x):
+        if self.prev is None:
+            self.prev = x
+            return (NAN,)
+        change, self.prev = x - self.prev, x
+        gain = self.gain.update(max(change, 0.0))
+        loss = self.loss.update(-min(change, 0.0))
+        total = gain + loss
+        return (100.0 * gain / total if total else NAN,)
+
+    def state(self):
+        return {'gain': self.gain.state(), 'loss': self.loss.state(), 'prev': self.prev}
+
+    def load(self, state):
+        self.gain.load(state['gain'])
+        self.loss.load(state['loss'])
+        self.prev = state['prev']
+
+
+class RollingMinMax:
+    """Rolling minimum and maximum over ``window`` bars (``MIN_n``, ``MAX_n``).
+
+    Monotonic deques of ``(bar number, value)`` give amortized O(1) updates.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.columns = [f"MIN_{window}", f"MAX_{window}"]
+        self.count = 0
+        self.lows = deque()
+        self.highs = deque()
+
+    def update(self, x):
+        i = self.count
+        self.count += 1
+        while self.lows and self.lows[-1][1] >= x:
+            self.lows.pop()
+        while self.highs and self.highs[-1][1] <= x:
+            self.highs.pop()
+        self.lows.append((i, x))
+        self.highs.append((i, x))
+        for q in (self.lows, self.highs):
+            if q[0][0] <= i - self.window:
+                q.popleft()
+        if self.count < self.window:
+            return NAN, NAN
+        return self.lows[0][1], self.highs[0][1]
+
+    def state(self):
+        return {'count': self.count, 'lows': [list(p) for p in self.lows], 'highs': [list(p) for p in self.highs]}
+
+    def load(self, state):
+        self.count = state['count']
+        self.lows = deque(tuple(p) for p in state['lows'])
+        self.highs = deque(tuple(p) for p in state['highs'])
+
+
+class Bollinger:
+    """pandas_ta ``bbands`` lower/mid/upper bands (``BBL``, ``BBM``, ``BBU``)."""
+
+    def __init__(self, length=20, std=2.0, ddof=0):
+        self.length, self.std, self.ddof = length, float(std), ddof
+        suffix = f"{length}_{float(std)}"
+        self.columns = [f"BBL_{suffix}", f"BBM_{suffix}", f"BBU_{suffix}"]
+        self.values = deque()
+        self.total = 0.0
+        self.squares = 0.0
+
+    def update(self, x):
+        self.values.append(x)
+        self.total += x
+        self.squares += x * x
+        if len(self.values) > self.length:
+            old = self.values.popleft()
+            self.total -= old
+            self.squares -= old * old
+        n = len(self.values)
+        if n < self.length:
+            return NAN, NAN, NAN
+        mid = self.total / n
+        variance = max(self.squares - n * mid * mid, 0.0) / (n - self.ddof)
+        width = self.std * math.sqrt(variance)
+        return mid - width, mid, mid + width
+
+    def state(self):
+        return {'values': list(self.values), 'total': self.total, 'squares': self.squares}
+
+    def load(self, state):
+        self.values = deque(state['values'])
+        self.total, self.squares = state['total'], state['squares']
+
+
+class IndicatorEngine:
+    """Feed ``(time, close)`` bars to a list of indicators.
+
+    The last bar stays provisional: a repeated timestamp rolls the state back
+    to before that bar and applies the new values instead.
+    """
+
+    def __init__(self, indicators):
+        self.indicators = list(indicators)
+        self.columns = [col for ind in self.indicators for col in ind.columns]
+        self.last_time = None
+        self._committed = None
+
+    def _snapshot(self):
+        return [ind.state() for ind in self.indicators]
+
+    def _restore(self, snapshot):
+        for ind, state in zip(self.indicators, snapshot):
+            ind.load(json.loads(json.dumps(state)))  # deep copy of plain data
+
+    def update(self, time, close):
+        """Apply one bar and return its outputs, in ``columns`` order."""
+        if time == self.last_time:
+            self._restore(self._committed)
+        else:
+            self._committed = self._snapshot()
+            self.last_time = time
+        close = float(close)
+        if math.isnan(close):
+            return [NAN] * len(self.columns)
+        return [value for ind in self.indicators for value in ind.update(close)]
+
+    def run(self, times, closes):
+        """Apply many bars; returns a DataFrame of outputs indexed by ``times``."""
+        rows = [self.update(t, c) for t, c in zip(times, closes)]
+        return pd.DataFrame(rows, index=pd.Index(times, name='time'), columns=self.columns, dtype=np.float64)
+
+    def run_batch(self, times, closes):
+        """``run`` on a fresh engine, vectorized when every indicator has ``batch``.
+
+        All bars but the last go through the indicators' ``batch``; the last
+        one goes through ``update``, so it stays provisional as after ``run``.
+        Closes with gaps (NaN) fall back to ``run``.
+        """
+        times = np.asarray(times, dtype=np.int64)
+        closes = np.asarray(closes, dtype=np.float64)
+        if len(times) < 2 or np.isnan(closes).any() or not all(hasattr(ind, 'batch') for ind in self.indicators):
+            return self.run(times.tolist(), closes.tolist())
+        head = np.hstack([ind.batch(closes[:-1]) for ind in self.indicators])
+        last = self.update(times[-1].item(), closes[-1].item())
+        values = np.vstack([head, np.asarray(last, dtype=np.float64)[None, :]])
+        return pd.DataFrame(values, index=pd.Index(times, name='time'), columns=self.columns)
+
+    def state(self):
+        """Checkpoint: state before the provisional last bar, plus its timestamp."""
+        return {'columns': self.columns, 'last_time': self.last_time, 'committed': self._committed}
+
+    def load(self, state):
+        """Resume from ``state()``; the caller then re-feeds bars from ``last_time`` on."""
+        if state['columns'] != self.columns:
+            raise ValueError("Checkpoint was written by a different set of indicators")
+        self._restore(state['committed'])
+        self.last_time = None
+        self._committed = None
+
+
+def to_epoch_ns(times):
+    """Timestamps (naive or tz-aware, any resolution) -> int64 UTC nanoseconds."""
+    return pd.DatetimeIndex(times).as_unit('ns').asi8
+
+
+class IndicatorStore:
+    """Checkpointed indicator outputs under ``root``.
+
+    ``root`` is normally the bar store's directory (``BarCache.store.root``),
+    which is per provider, so outputs from different providers never mix.
+
+    ``compute`` reuses the stored outputs for bars it has already seen and
+    feeds only the rest through the engine, starting from the stored state.
+    Indicators like the EMA depend on every bar since the first, so this only
+    happens when the stored series starts at the requested window's first
+    bar; a window that starts elsewhere is recomputed and replaces it.
+    Outputs are a base Parquet file plus small appended segments (listed in
+    the state file), so a few new bars don't rewrite the whole history; past
+    ``MAX_SEGMENTS`` they are compacted into a new base.
+
+    Sessions are threads of one process, so each key takes one of
+    ``LOCK_STRIPES`` locks, and every file is written under a unique
+    temporary name and renamed into place.
+    """
+
+    MAX_SEGMENTS = 32
+
+    def __init__(self, root):
+        self.root = root
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def _key_lock(self, key):
+        return self._locks[hash(key) % LOCK_STRIPES]
+
+    def _paths(self, key):
+        base = os.path.join(self.root, '_'.join(str(part).replace('/', '_') for part in key))
+        return f"{base}.indicators.parquet", f"{base}.indicators.json"
+
+    def _replace(self, path, write):
+        # Unique temp file next to ``path``, then an atomic rename
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        os.close(fd)
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def read(self, key):
+        """``(outputs, state)`` as stored, or ``(None, None)``."""
+        outputs_path, state_path = self._paths(key)
+        if not (os.path.exists(outputs_path) and os.path.exists(state_path)):
+            return None, None
+        with open(state_path) as f:
+            state = json.load(f)
+        parts = [pd.read_parquet(outputs_path)]
+        parts += [pd.read_parquet(os.path.join(self.root, name)) for name in state.get('segments', [])]
+        outputs = pd.concat(parts) if len(parts) > 1 else parts[0]
+        # Each segment starts by re-running the provisional last bar of the one before
+        return outputs[~outputs.index.duplicated(keep='last')], state
+
+    def _write_state(self, state_path, state):
+        def dump(path):
+            with open(path, 'w') as f:
+                json.dump(state, f)
+        self._replace(state_path, dump)
+
+    def write(self, key, outputs, state):
+        """Store ``outputs`` as the new base, dropping any segments."""
+        os.makedirs(self.root, exist_ok=True)
+        outputs_path, state_path = self._paths(key)
+        _, old = self.read(key) if os.path.exists(state_path) else (None, None)
+        self._replace(outputs_path, outputs.to_parquet)
+        self._write_state(state_path, dict(state, segments=[]))
+        for name in (old or {}).get('segments', []):
+            os.remove(os.path.join(self.root, name))
+
+    def append(self, key, fresh, state, previous):
+        """Add ``fresh`` rows as a segment after ``previous`` (the stored state)."""
+        segments = previous.get('segments', [])
+        outputs_path, state_path = self._paths(key)
+        name = f"{os.path.basename(outputs_path)[:-len('.parquet')]}.{len(segments) + 1}.parquet"
+        self._replace(os.path.join(self.root, name), fresh.to_parquet)
+        self._write_state(state_path, dict(state, segments=segments + [name]))
+
+    def compute(self, key, factory, times, closes):
+        """Outputs of ``factory()``'s engine for these bars, aligned to the input rows.
+
+        ``key`` identifies the series, its window and the parameters, e.g.
+        ``('AAPL', '1d', '6mo', 'MACD_6_12_5')``; windows of one series that
+        start on different bars need different keys to both be reused. When ``times`` is a Series the
+        result shares its index.
+        """
+        index = getattr(times, 'index', None)
+        times = to_epoch_ns(times)
+        closes = np.asarray(closes, dtype=np.float64)
+        engine = factory()
+        with self._key_lock(key):
+            stored, state = self.read(key)
+            resumable = (
+                stored is not None and len(times)
+                and state['columns'] == engine.columns
+                and state['last_time'] is not None
+                and stored.index[0] == times[0]
+            )
+            start = int(np.searchsorted(times, state['last_time'])) if resumable else 0
+            if resumable and start < len(times) and times[start] == state['last_time']:
+                metrics.annotate(cache='hit' if start == len(times) - 1 else 'partial')
+                if start == len(times) - 1 and closes[-1] == state.get('last_close'):
+                    outputs = stored  # no new bars and the last one unchanged: nothing to write
+                else:
+                    engine.load(state)
+                    fresh = engine.run(times[start:].tolist(), closes[start:].tolist())
+                    outputs = pd.concat([stored[stored.index < state['last_time']], fresh])
+                    checkpoint = dict(engine.state(), last_close=closes[-1].item())
+                    if len(state.get('segments', [])) < self.MAX_SEGMENTS:
+                        self.append(key, fresh, checkpoint, state)
+                    else:
+                        self.write(key, outputs, checkpoint)
+            else:
+                metrics.annotate(cache='miss')
+                outputs = engine.run_batch(times, closes)
+                last_close = closes[-1].item() if len(closes) else None
+                self.write(key, outputs, dict(engine.state(), last_close=last_close))
+        result = outputs.reindex(times)
+        result.index = index if index is not None else pd.RangeIndex(len(times))
+        return result
+
+
+def macd_frame(close, fast=12, slow=26, signal=9):
+    """One-shot streaming equivalent of ``ta.macd`` for a close Series."""
+    engine = IndicatorEngine([MACD(fast, slow, signal)])
+    values = [engine.update(i, c) for i, c in enumerate(np.asarray(close, dtype=np.float64).tolist())]
+    return pd.DataFrame(values, index=getattr(close, 'index', None), columns=engine.columns)
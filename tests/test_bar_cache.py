@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import bar_cache
+
+NOW = '2024-06-28 16:00'
+
+
+def make_cache(root, now=NOW, memory=None):
+    provider = bar_cache.FakeProvider(now=now)
+    return bar_cache.BarCache(provider, bar_cache.BarStore(str(root)), memory), provider
+
+
+def test_get_fetches_once_then_serves_from_memory(tmp_path):
+    cache, provider = make_cache(tmp_path)
+    first = cache.get('AAPL', '1d', '6mo')
+    assert provider.calls == [('AAPL', '1d', '6mo', None)]
+    assert first.index[-1] == pd.Timestamp('2024-06-28')
+    pd.testing.assert_frame_equal(cache.get('AAPL', '1d', '6mo'), first)
+    assert len(provider.calls) == 1
+    # A copy: callers can't corrupt the cached bars
+    first['Close'] = 0.0
+    assert (cache.get('AAPL', '1d', '6mo')['Close'] > 0).all()
+
+
+def test_refresh_appends_only_new_bars(tmp_path):
+    cache, _ = make_cache(tmp_path)
+    before = cache.get('AAPL', '1d', '6mo')
+
+    # A new process (empty memory tier) a few days later tops the disk tier up
+    cache, provider = make_cache(tmp_path, now='2024-07-03 16:00')
+    after = cache.get('AAPL', '1d', '6mo')
+    assert provider.calls == [('AAPL', '1d', None, before.index[-1])]
+    assert after.index.is_unique and after.index.is_monotonic_increasing
+    assert after.index[-1] == pd.Timestamp('2024-07-03')
+    full = bar_cache.FakeProvider(now='2024-07-03 16:00').history('AAPL', '1d', start=before.index[0])
+    pd.testing.assert_frame_equal(after, full.loc[after.index[0]:], check_freq=False)
+
+
+def test_refresh_refetches_when_disk_does_not_cover_period(tmp_path):
+    cache, _ = make_cache(tmp_path)
+    cache.get('AAPL', '1d', '1mo')
+    cache, provider = make_cache(tmp_path)
+    bars = cache.get('AAPL', '1d', '1y')
+    assert provider.calls == [('AAPL', '1d', '1y', None)]
+    assert bars.index[0] <= pd.Timestamp('2023-07-05')
+
+
+def test_version_changes_with_bars(tmp_path):
+    cache, _ = make_cache(tmp_path)
+    version = cache.version('AAPL', '1d', '6mo')
+    assert cache.version('AAPL', '1d', '6mo') == version
+    cache, _ = make_cache(tmp_path, now='2024-07-03 16:00')
+    assert cache.version('AAPL', '1d', '6mo') != version
+
+
+def test_get_many_serves_memory_and_fetches_the_rest(tmp_path):
+    cache, provider = make_cache(tmp_path)
+    cache.get('AAPL', '1d', '6mo')
+    provider.calls.clear()
+    bars = cache.get_many(['AAPL', 'MSFT'], '1d', '6mo', sleep=lambda s: None)
+    assert list(bars) == ['AAPL', 'MSFT']
+    assert [call[0] for call in provider.calls] == ['MSFT']
+    pd.testing.assert_frame_equal(bars['AAPL'], cache.get('AAPL', '1d', '6mo'))
+
+
+def frame(start, end):
+    index = pd.date_range(start, end, freq='D', name='Date')
+    return pd.DataFrame({'Close': range(len(index))}, index=index, dtype=float)
+
+
+@pytest.mark.parametrize('period, expected', [
+    (None, True),
+    ('1mo', True),
+    ('6mo', True),    # starts within the 7-day slack
+    ('1y', False),
+    ('max', False),
+])
+def test_covers(period, expected):
+    assert bar_cache.covers(frame('2024-01-05', '2024-07-01'), period) is expected
+
+
+def test_covers_empty_frame():
+    assert not bar_cache.covers(frame('2024-01-02', '2024-01-01'), None)
+
+
+def test_trim_to_period():
+    df = frame('2024-01-01', '2024-07-01')
+    assert bar_cache.trim_to_period(df, '1mo').index[0] == pd.Timestamp('2024-06-01')
+    assert bar_cache.trim_to_period(df, '1wk').index.tolist() == list(pd.date_range('2024-06-24', '2024-07-01'))
+    assert bar_cache.trim_to_period(df, 'max') is df
+    assert bar_cache.trim_to_period(df, None) is df
+
+
+def test_period_offset_rejects_unknown_periods():
+    assert bar_cache.period_offset('2y') == pd.DateOffset(years=2)
+    with pytest.raises(ValueError):
+        bar_cache.period_offset('2 years')
+
+
+@pytest.mark.parametrize('period', [None, '1mo', '6mo', 'max'])
+def test_version_describes_the_bars_get_returns(tmp_path, period):
+    cache, _ = make_cache(tmp_path)
+    bars = cache.get('AAPL', '1d', period)
+    assert cache.version('AAPL', '1d', period) == (
+        len(bars), bars.index[0], bars.index[-1], bar_cache.last_row_bytes(bars))
+
+
+def test_default_store_is_per_provider(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_cache, 'DEFAULT_DIR', str(tmp_path))
+    fake = bar_cache.BarCache(bar_cache.FakeProvider(now=NOW))
+    assert fake.store.root == str(tmp_path / 'fake')
+    fake.get('AAPL', '1d', '6mo')
+    assert os.listdir(tmp_path) == ['fake']
+
+
+def test_store_write_leaves_no_temp_file_on_error(tmp_path):
+    store = bar_cache.BarStore(str(tmp_path))
+    with pytest.raises(Exception):
+        store.write('AAPL', '1d', pd.DataFrame({'bad': [object()]}))
+    assert os.listdir(tmp_path) == []
+
+
+def test_get_many_and_get_fetch_a_symbol_once(tmp_path):
+    provider = bar_cache.FakeProvider(now=NOW, latency=0.1)
+    cache = bar_cache.BarCache(provider, bar_cache.BarStore(str(tmp_path)))
+    thread = threading.Thread(target=cache.get_many, args=(['AAPL', 'MSFT'], '1d', '6mo'))
+    thread.start()
+    time.sleep(0.02)  # get_many holds the AAPL stripe while it downloads
+    cache.get('AAPL', '1d', '6mo')
+    thread.join()
+    assert sorted(call[0] for call in provider.calls) == ['AAPL', 'MSFT']
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+import batch_indicators
+
+
+def test_series_records_keeps_warmup_bars_as_whitespace():
+    times = np.array([10, 20, 30, 40])
+    values = np.array([np.nan, np.nan, 1.5, -2.0])
+    records = batch_indicators.series_records(times, values, np.array([0, 0, 1, 2], dtype=np.uint8))
+    assert [r['time'] for r in records] == [10, 20, 30, 40]
+    assert records[:2] == [{'time': 10}, {'time': 20}]
+    assert records[2:] == [{'time': 30, 'value': 1.5, 'color': 1}, {'time': 40, 'value': -2.0, 'color': 2}]
+
+
+def test_rsi_matches_wilder_ewm_per_row():
+    closes = 100 + np.cumsum(np.random.default_rng(0).normal(size=(2, 300)), axis=1)
+    closes[1, :20] = np.nan  # shorter history
+    for row, out in zip(closes, batch_indicators.rsi(closes, 14)):
+        change = pd.Series(row).dropna().diff()
+        gain = change.clip(lower=0).ewm(alpha=1 / 14, min_periods=14).mean()
+        loss = (-change).clip(lower=0).ewm(alpha=1 / 14, min_periods=14).mean()
+        np.testing.assert_allclose(out[~np.isnan(row)], 100 * gain / (gain + loss), equal_nan=True)
@@ -0,0 +1,58 @@
+import os
+import re
+from html.parser import HTMLParser
+
+from streamlit.testing.v1 import AppTest
+
+import chart_assets
+import chart_component
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Sources(HTMLParser):
+    """``src`` of every <script> and ``href`` of every <link> in a page."""
+
+    def __init__(self, html):
+        super().__init__()
+        self.found = []
+        self.feed(html)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'script' and attrs.get('src'):
+            self.found.append(attrs['src'])
+        elif tag == 'link' and attrs.get('href'):
+            self.found.append(attrs['href'])
+
+
+def assert_local(sources):
+    remote = [src for src in sources if re.match(r'(https?:)?//', src)]
+    assert remote == []
+
+
+def test_no_remote_script_references():
+    assert chart_assets.remote_references() == []
+    assert chart_assets.library_version() is not None
+
+
+def test_component_page_loads_vendored_library():
+    with open(os.path.join(chart_assets.FRONTEND_DIR, 'index.html'), encoding='utf-8') as f:
+        sources = Sources(f.read()).found
+    assert_local(sources)
+    paths = [os.path.normpath(os.path.join(chart_assets.FRONTEND_DIR, src)) for src in sources]
+    assert chart_assets.LIBRARY_PATH in paths
+    assert all(os.path.exists(path) for path in paths)
+
+
+def test_html_page_loads_library_from_component():
+    at = AppTest.from_file(os.path.join(HERE, 'app.py')).run()
+    (page,) = [el.proto.srcdoc for el in at.main if hasattr(el.proto, 'srcdoc')]
+    sources = Sources(page).found
+    assert_local(sources)
+    # The page references the component's copy rather than inlining 160KB per render
+    assert sources == [chart_component.library_url()]
+    assert chart_assets.library_source()[:200] not in page
+    prefix = f"component/{chart_component._component.name}/"
+    assert sources[0].startswith(prefix)
+    assert os.path.join(chart_assets.FRONTEND_DIR, sources[0][len(prefix):]) == chart_assets.LIBRARY_PATH
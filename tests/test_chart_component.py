@@ -0,0 +1,137 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+import chart_component
+import serializers
+import transport
+
+
+def bars(n, start=0, value=1.0):
+    return [{'time': start + i, 'value': value + i} for i in range(n)]
+
+
+def delta(old, new):
+    return chart_component._series_delta(new, chart_component._summary(old))
+
+
+def test_appended_bars_are_sent_as_updates():
+    old = bars(5)
+    assert delta(old, bars(7)) == {'update': bars(7)[5:]}
+    assert delta(old, old) == {'update': []}
+
+
+def test_replaced_last_bar_is_resent():
+    old = bars(5)
+    new = old[:-1] + [{'time': 4, 'value': 99.0}]
+    assert delta(old, new) == {'update': [new[-1]]}
+    new.append({'time': 5, 'value': 1.0})
+    assert delta(old, new) == {'update': new[-2:]}
+
+
+def test_mid_history_change_falls_back_to_set_data():
+    old = bars(5)
+    new = bars(6)
+    new[2] = {'time': 2, 'value': -1.0}
+    assert delta(old, new) == {'set': new}
+    # A bar dropped from the middle keeps the length and both ends
+    gapped = old[:2] + old[3:] + bars(1, start=5)
+    assert delta(old, gapped) == {'set': gapped}
+
+
+def test_older_page_is_prepended():
+    new = bars(15)
+    old = new[10:]
+    assert delta(old, new) == {'update': [], 'prepend': new[:10]}
+    changed = bars(15)
+    changed[12] = {'time': 12, 'value': 0.0}
+    assert delta(old, changed) == {'set': changed}
+
+
+def test_build_payload_full_then_delta():
+    series = [{'type': 'Line', 'data': bars(3)}]
+    charts = [{'chart': {}, 'series': series}]
+    payload, state = chart_component.build_payload(charts, {})
+    assert payload['mode'] == 'full' and payload['version'] == 1
+
+    series[0]['data'] = bars(4)
+    payload, state = chart_component.build_payload(charts, state)
+    assert payload == {'mode': 'delta', 'version': 2, 'base': 1,
+                       'charts': [{'series': [{'update': [bars(4)[-1]]}]}]}
+
+    payload, state = chart_component.build_payload(charts, state)
+    assert payload['charts'] == [] and payload['version'] == 2
+
+
+def columns(n, start=0):
+    return serializers.line_columns(np.arange(start, start + n), np.arange(n, dtype=np.float64) + 1.0,
+                                    np.arange(n, dtype=np.uint8) % 2)
+
+
+def test_columns_deltas_match_records():
+    old = columns(5)
+    assert delta(old, columns(7)) == {'update': columns(7)[5:].records()}
+    new = columns(6)
+    new.columns['value'][4] = 99.0
+    assert delta(old, new) == {'update': new[4:].records()}
+    new.columns['value'][2] = -1.0
+    assert delta(old, new) == {'set': new}
+
+
+def test_columns_pack_like_records():
+    data = serializers.frame_ohlc_columns(pd.DataFrame({
+        'time': [1, 2, 3], 'open': np.float32([1.1, 2.2, np.nan]), 'high': [2.0, 3.0, 4.0],
+        'low': [0.5, 1.5, 2.5], 'close': [1.5, 2.5, 3.5],
+    }))
+    charts = [{'chart': {}, 'series': [{'type': 'Candlestick', 'data': data}]}]
+    payload, _ = chart_component.build_payload(charts, {})
+    packed, blob = chart_component.pack_payload(payload)
+    points = transport.unpack(packed['charts'][0]['series'][0]['packed'], blob)
+    assert points == data.records() == [
+        {'time': 1, 'open': 1.1, 'high': 2.0, 'low': 0.5, 'close': 1.5},
+        {'time': 2, 'open': 2.2, 'high': 3.0, 'low': 1.5, 'close': 2.5},
+        {'time': 3, 'high': 4.0, 'low': 2.5, 'close': 3.5},
+    ]
+    assert chart_component.records_payload(payload)['charts'][0]['series'][0]['data'] == points
+
+
+def test_grid_payload_layout():
+    times = np.arange(1700000000, 1700000000 + 4 * 60, 60)
+    cells = [
+        {'time': times, 'values': np.array([1.0, 2.0, np.nan, 4.0]), 'title': 'AAA', 'caption': '+1%', 'color': 0},
+        {'time': times, 'values': np.array([0.1, 0.2, 0.3, 0.4]), 'title': 'BBB', 'color': 1},
+    ]
+    payload, blob = chart_component.build_grid_payload(cells, columns=6, palette=['green', 'red'])
+    assert (payload['mode'], payload['columns'], payload['cellHeight'], payload['type']) == ('grid', 6, 80, 'Line')
+    assert payload['chart'] is chart_component.GRID_CHART_OPTIONS
+    assert payload['palette'] == ['green', 'red']
+    assert [(c['title'], c['caption'], c['color']) for c in payload['cells']] == [('AAA', '+1%', 0), ('BBB', '', 1)]
+    first, second = (transport.unpack(c['packed'], blob) for c in payload['cells'])
+    assert [p['time'] for p in first] == times.tolist()
+    assert [p.get('value') for p in first] == [1.0, 2.0, None, 4.0]
+    assert [p['value'] for p in second] == [np.float32(v) for v in (0.1, 0.2, 0.3, 0.4)]
+    # Sparklines travel as float32, and cells on the same bars share one time buffer
+    assert payload['cells'][0]['packed']['columns']['value']['dtype'] == 'float32'
+    assert payload['cells'][0]['packed']['time'] == payload['cells'][1]['packed']['time']
+    assert len(blob) == 4 * 4 + 2 * 4 * 4
+
+
+def test_panes_on_one_time_axis_share_the_time_buffer():
+    n = 50
+    times = np.arange(1700000000, 1700000000 + 60 * n, 60)
+    prices = np.linspace(100.0, 110.0, n)
+    candles = serializers.ohlc_columns(times, prices, prices + 1, prices - 1, prices + 0.5)
+    volume = serializers.line_columns(times, np.full(n, 1000.0), serializers.color_codes(prices > 105))
+    macd = serializers.line_columns(times, np.sin(np.arange(n)))
+    charts = [
+        {'chart': {}, 'series': [{'type': 'Candlestick', 'data': candles}, {'type': 'Histogram', 'data': volume}]},
+        {'chart': {}, 'series': [{'type': 'Line', 'data': macd}]},
+    ]
+    payload, _ = chart_component.build_payload(charts, {})
+    packed, blob = chart_component.pack_payload(payload)
+    series = [s['packed'] for pane in packed['charts'] for s in pane['series']]
+    assert len({json.dumps(s['time']) for s in series}) == 1
+    # One int32 time column, four OHLC + volume + MACD float64 columns and the uint8 colors
+    assert len(blob) == n * 4 + 6 * n * 8 + n + (-n % 8)
+    assert transport.unpack(series[1], blob) == volume.records()
@@ -0,0 +1,18 @@
+import gc
+
+import chart_spec
+
+
+def test_blocks_are_interned_while_in_use():
+    options = {'layout': {'textColor': 'black'}}
+    spec = chart_spec.SeriesSpec('Line', options)
+    assert chart_spec.block(dict(options)) is spec.options
+    assert chart_spec.block(None) is None
+
+
+def test_unused_blocks_are_released():
+    before = len(chart_spec._BLOCKS)
+    for i in range(1000):
+        chart_spec.block({'value': i})
+    gc.collect()
+    assert len(chart_spec._BLOCKS) <= before
@@ -0,0 +1,68 @@
+import os
+
+import pandas as pd
+import pytest
+
+import csv_ingest
+
+SCHEMA = {'open': 'float64', 'close': 'float64'}
+
+
+def write_csv(path, rows):
+    with open(path, 'w') as f:
+        f.write('datetime,open,close\n')
+        f.writelines(f"{row}\n" for row in rows)
+
+
+def test_ingest_caches_parquet(tmp_path):
+    path = tmp_path / 'bars.csv'
+    write_csv(path, [f"2024-01-02 09:{30 + i}:00,{i}.0,{i}.5" for i in range(5)])
+    cache_dir = str(tmp_path / 'cache')
+    df = csv_ingest.load(str(path), schema=SCHEMA, cache_dir=cache_dir, chunksize=2)
+    assert len(df) == 5 and df['datetime'].iloc[0] == pd.Timestamp('2024-01-02 09:30')
+    assert [name.endswith('.parquet') for name in os.listdir(cache_dir)] == [True]
+    assert csv_ingest.ingest(str(path), schema=SCHEMA, cache_dir=cache_dir) == \
+        os.path.join(cache_dir, os.listdir(cache_dir)[0])
+
+
+def test_failed_conversion_leaves_no_temp_file(tmp_path):
+    path = tmp_path / 'bars.csv'
+    # The bad date is in the second chunk, after the Parquet writer has started
+    write_csv(path, ['2024-01-02 09:30:00,1.0,1.5', '2024-01-02 09:31:00,2.0,2.5', 'not a date,3.0,3.5'])
+    cache_dir = tmp_path / 'cache'
+    with pytest.raises(ValueError):
+        csv_ingest.ingest(str(path), schema=SCHEMA, cache_dir=str(cache_dir), chunksize=2)
+    assert os.listdir(cache_dir) == []
+
+
+def test_unreadable_csv_leaves_no_temp_file(tmp_path):
+    path = tmp_path / 'bars.csv'
+    path.write_text('')
+    cache_dir = tmp_path / 'cache'
+    with pytest.raises(pd.errors.EmptyDataError):
+        csv_ingest.ingest(str(path), schema=SCHEMA, cache_dir=str(cache_dir))
+    assert os.listdir(cache_dir) == []
+
+
+def test_new_version_replaces_old_conversions(tmp_path):
+    path = tmp_path / 'bars.csv'
+    other = tmp_path / 'other' / 'bars.csv'
+    other.parent.mkdir()
+    cache_dir = str(tmp_path / 'cache')
+    write_csv(path, ['2024-01-02 09:30:00,1.0,1.5'])
+    write_csv(other, ['2024-01-02 09:30:00,1.0,1.5'])
+    csv_ingest.ingest(str(other), schema=SCHEMA, cache_dir=cache_dir)
+    csv_ingest.ingest(str(path), schema=SCHEMA, cache_dir=cache_dir)
+    # Another schema of the same version is a separate, current conversion
+    csv_ingest.ingest(str(path), schema={'open': 'float64'}, cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 3
+
+    write_csv(path, ['2024-01-02 09:30:00,1.0,1.5', '2024-01-02 09:31:00,2.0,2.5'])
+    os.utime(path, ns=(0, 10**18))
+    target = csv_ingest.ingest(str(path), schema=SCHEMA, cache_dir=cache_dir)
+    # Both conversions of the old version are gone; the other file's one stays
+    assert sorted(os.listdir(cache_dir)) == sorted([
+        os.path.basename(target),
+        os.path.basename(csv_ingest.cache_path(str(other), SCHEMA, 'datetime', 'ISO8601', cache_dir)),
+    ])
+    assert len(csv_ingest.load(str(path), schema=SCHEMA, cache_dir=cache_dir)) == 2
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import downsampling
+
+
+@pytest.mark.parametrize('n, buckets', [(10, 3), (1000, 400), (1001, 400), (7, 7)])
+def test_bucket_starts_cover_rows_contiguously(n, buckets):
+    starts = downsampling.bucket_starts(n, buckets)
+    sizes = np.diff(np.append(starts, n))
+    assert starts[0] == 0 and len(starts) == buckets
+    assert sizes.sum() == n and sizes.min() >= 1
+    assert sizes.max() - sizes.min() <= 1
+
+
+def bars(n):
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(size=n))
+    return pd.DataFrame({
+        'time': np.arange(n) * 60, 'open': close + 0.1, 'high': close + 1, 'low': close - 1,
+        'close': close, 'volume': rng.integers(1, 100, n), 'macd': np.sin(np.arange(n) / 50),
+    })
+
+
+AGG = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum', 'macd': 'minmax'}
+
+
+def test_downsample_frame_aggregates_on_bucket_boundaries():
+    df = bars(1001)
+    out = downsampling.downsample_frame(df, 400, AGG)
+    starts = downsampling.bucket_starts(1001, 400)
+    ends = np.append(starts[1:], 1001)
+    assert len(out) == 400
+    assert out['time'].tolist() == df['time'].iloc[starts].tolist()
+    for i in (0, 1, 200, 399):
+        bucket = df.iloc[starts[i]:ends[i]]
+        assert out['open'][i] == bucket['open'].iloc[0] and out['close'][i] == bucket['close'].iloc[-1]
+        assert out['high'][i] == bucket['high'].max() and out['low'][i] == bucket['low'].min()
+        assert out['volume'][i] == bucket['volume'].sum()
+
+
+def test_downsample_frame_keeps_first_and_last_points():
+    df = bars(5000)
+    out = downsampling.downsample_frame(df, downsampling.bar_budget(800), AGG)
+    assert out['time'].iloc[0] == df['time'].iloc[0] and out['open'].iloc[0] == df['open'].iloc[0]
+    assert out['close'].iloc[-1] == df['close'].iloc[-1]
+    assert out['macd'].max() == df['macd'].max() and out['macd'].min() == df['macd'].min()
+    assert out['high'].max() == df['high'].max() and out['low'].min() == df['low'].min()
+    assert out['volume'].sum() == df['volume'].sum()
+
+
+def test_single_bar_spike_survives():
+    df = bars(5000)
+    df.loc[3210, 'macd'] = 50.0
+    df.loc[1234, 'macd'] = -50.0
+    out = downsampling.downsample_frame(df, downsampling.bar_budget(800), AGG)
+    assert len(out) == 400
+    assert out['macd'].max() == 50.0 and out['macd'].min() == -50.0
+    # Each pair of rows holds its buckets' extremes in the order they occurred
+    starts = downsampling.bucket_starts(5000, 400)[::2]
+    for i in (0, 160, 199):
+        bucket = df['macd'].iloc[starts[i]:starts[i + 1] if i + 1 < len(starts) else None]
+        expected = [bucket.min(), bucket.max()] if bucket.idxmin() < bucket.idxmax() else [bucket.max(), bucket.min()]
+        assert out['macd'].iloc[2 * i:2 * i + 2].tolist() == expected
+
+
+def test_downsample_frame_leaves_short_input():
+    df = bars(100)
+    assert downsampling.downsample_frame(df, 400, AGG) is df
+
+
+def test_bar_budget():
+    assert downsampling.bar_budget(800) == 400
+    assert downsampling.bar_budget(None) == downsampling.DEFAULT_WIDTH // downsampling.PIXELS_PER_BAR
+    assert downsampling.bar_budget(1) == 3
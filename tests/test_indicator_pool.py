@@ -0,0 +1,90 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+import bar_cache
+import indicator_pool
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    # Spawned workers build their bar cache from the environment
+    monkeypatch.setenv('BAR_PROVIDER', 'fake')
+    monkeypatch.setenv('BAR_CACHE_DIR', str(tmp_path))
+    return tmp_path
+
+
+def inline_cache(root, provider=None):
+    provider = provider or bar_cache.FakeProvider()
+    return bar_cache.BarCache(provider, bar_cache.BarStore(os.path.join(root, bar_cache.provider_name(provider))))
+
+
+def shared_blocks():
+    return {name for name in os.listdir('/dev/shm') if name.startswith('psm_')} if os.path.isdir('/dev/shm') else set()
+
+
+def test_read_chunk_unlinks_the_block(tmp_path):
+    layout = indicator_pool.run_chunk(['AAPL', 'MSFT'], '1d', '6mo', 'macd', (12, 26, 9), cache=inline_cache(str(tmp_path)))
+    series = indicator_pool.read_chunk(layout)
+    assert list(series) == ['AAPL', 'MSFT']
+    assert list(series['AAPL'].columns) == ['close', 'MACD_12_26_9', 'MACDh_12_26_9', 'MACDs_12_26_9']
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=layout['name'])
+
+
+def test_pool_matches_inline_run_chunk(cache_dir):
+    symbols = [f"S{i}" for i in range(5)]
+    pool = indicator_pool.IndicatorPool(max_workers=1)
+    try:
+        job = pool.submit(symbols, '1d', '6mo', 'macd', (12, 26, 9), chunk_size=2)
+        assert job.wait(120) and job.progress() == 1.0
+    finally:
+        pool.shutdown()
+    assert job.errors == [] and job.missing == []
+    results = job.results()
+    assert list(results) == symbols
+    cache = inline_cache(str(cache_dir))
+    for chunk in job.chunks:
+        expected = indicator_pool.read_chunk(indicator_pool.run_chunk(chunk, '1d', '6mo', 'macd', (12, 26, 9), cache=cache))
+        for symbol, series in expected.items():
+            np.testing.assert_array_equal(results[symbol].time, series.time)
+            for col, values in series.columns.items():
+                np.testing.assert_allclose(results[symbol].columns[col], values, equal_nan=True)
+
+
+def test_cancel_stops_outstanding_chunks(cache_dir):
+    before = shared_blocks()
+    pool = indicator_pool.IndicatorPool(max_workers=1)
+    try:
+        job = pool.submit([f"C{i}" for i in range(40)], '1d', '1y', chunk_size=1)
+        job.cancel()
+        job.wait(120)
+    finally:
+        pool.shutdown()
+    assert job.cancelled
+    assert sum(future.cancelled() for future in job.futures) > 0
+    assert len(job.results()) < 40
+    assert shared_blocks() == before  # discarded chunks were unlinked too
+
+
+class BrokenProvider(bar_cache.FakeProvider):
+    # 'BAD' comes back without a Close column
+    def history(self, symbol, interval, period=None, start=None):
+        df = super().history(symbol, interval, period=period, start=start)
+        return df.drop(columns='Close') if symbol == 'BAD' else df
+
+
+def test_failing_symbol_lands_in_errors(tmp_path):
+    cache = inline_cache(str(tmp_path), BrokenProvider())
+    chunks = [['AAPL'], ['BAD'], ['MSFT']]
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        futures = [executor.submit(indicator_pool.run_chunk, chunk, '1d', '6mo', 'macd', (12, 26, 9), cache)
+                   for chunk in chunks]
+        job = indicator_pool.Job(chunks, futures)
+        assert job.wait(60)
+    assert len(job.errors) == 1 and isinstance(job.errors[0], KeyError)
+    assert list(job.results()) == ['AAPL', 'MSFT']
+    assert job.missing == ['BAD']
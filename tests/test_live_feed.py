@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import numpy as np
+
+import live_feed
+
+
+def ticks(t, price):
+    batch = np.empty(1, dtype=live_feed.TICK_DTYPE)
+    batch['time'], batch['price'], batch['size'] = t, price, 1
+    return batch
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_aggregator_folds_ticks_into_bars():
+    aggregator = live_feed.BarAggregator(bar_seconds=1)
+    batch = np.zeros(4, dtype=live_feed.TICK_DTYPE)
+    batch['time'] = [10.1, 10.5, 11.2, 10.9]  # the late tick joins the open bar
+    batch['price'] = [1.0, 3.0, 2.0, 0.5]
+    batch['size'] = 1
+    aggregator.add(batch)
+    bars = aggregator.snapshot()
+    assert bars['time'].tolist() == [10, 11]
+    assert bars['high'].tolist() == [3.0, 2.0] and bars['low'].tolist() == [1.0, 0.5]
+    assert bars['volume'].tolist() == [2.0, 2.0]
+
+
+def test_poll_restarts_after_an_error():
+    attempts = []
+
+    async def source():
+        attempts.append(len(attempts))
+        yield ticks(100 + len(attempts), 1.0)
+        if len(attempts) == 1:
+            raise ConnectionError('dropped')
+        while True:
+            await asyncio.sleep(0.01)
+            yield ticks(200, 2.0)
+
+    feed = live_feed.LiveFeed(source, retry_delay=0.05)
+    feed.poll()
+    wait_for(lambda: feed.error is not None)
+    assert not feed.running and isinstance(feed.error, ConnectionError)
+    wait_for(lambda: feed.poll() is not None and len(attempts) == 2)
+    assert feed.error is None
+    wait_for(lambda: len(feed.snapshot()['time']) == 3)  # bars from before the error are kept
+    feed.stop()
+
+
+def test_feed_stops_when_not_polled():
+    async def source():
+        while True:
+            await asyncio.sleep(0.01)
+            yield ticks(time.time(), 1.0)
+
+    feed = live_feed.LiveFeed(source, idle_timeout=0.1)
+    feed.poll()
+    assert feed.running
+    wait_for(lambda: not feed.running)
+    assert feed.error is None
+    feed.poll()
+    assert feed.running
+    feed.stop()
@@ -0,0 +1,15 @@
+import pytest
+
+import benchmarks
+
+
+@pytest.fixture(scope='module')
+def environ(tmp_path_factory):
+    return benchmarks.memory_environ(str(tmp_path_factory.mktemp('memory')))
+
+
+@pytest.mark.parametrize('chart, options', list(benchmarks.MEMORY_BUDGETS))
+def test_chart_within_memory_budget(environ, chart, options):
+    traced = benchmarks.trace_memory(chart, options, environ)
+    for run, budget in benchmarks.MEMORY_BUDGETS[chart, options].items():
+        assert traced[run] <= budget, f"{chart} {dict(options)} {run}: {traced[run]:,} > {budget:,} bytes"
@@ -0,0 +1,73 @@
+import numpy as np
+
+import memory_cache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def block(kb):
+    return np.zeros(kb * 1024, dtype=np.uint8)
+
+
+def test_put_evicts_least_recently_used_past_max_bytes():
+    cache = memory_cache.MemoryCache(max_bytes=3 * 1024)
+    for key in 'abc':
+        cache.put(key, block(1))
+    cache.get('a')  # 'b' is now the least recently used
+    cache.put('d', block(1))
+    assert cache.get('b') is None
+    assert all(cache.get(key) is not None for key in 'acd')
+    assert cache.bytes == 3 * 1024
+    assert cache.stats()['classes']['default']['evictions'] == 1
+
+
+def test_ttl_is_per_data_class():
+    clock = Clock()
+    cache = memory_cache.MemoryCache(max_bytes=2**20, ttls={'intraday': 10, 'daily': 100}, clock=clock)
+    cache.put('1m', block(1), 'intraday')
+    cache.put('1d', block(1), 'daily')
+    cache.put('spec', block(1))
+    clock.now = 50
+    assert cache.get('1m', kind='intraday') is None
+    assert cache.get('1d', kind='daily') is not None
+    clock.now = 10_000
+    assert cache.get('1d', kind='daily') is None
+    assert cache.get('spec') is not None  # the default class never expires
+    classes = cache.stats()['classes']
+    assert classes['intraday']['expirations'] == 1 and classes['daily']['expirations'] == 1
+    assert cache.bytes == 1024
+
+
+def test_expired_entries_are_dropped_before_live_ones():
+    clock = Clock()
+    cache = memory_cache.MemoryCache(max_bytes=2 * 1024, ttls={'intraday': 10}, clock=clock)
+    cache.put('old', block(1), 'intraday')
+    cache.put('daily', block(1), 'daily')
+    clock.now = 20
+    cache.put('new', block(1), 'intraday')
+    assert cache.get('daily', kind='daily') is not None
+    assert cache.stats()['classes']['intraday']['evictions'] == 0
+
+
+def test_oversize_value_is_rejected_and_counted():
+    cache = memory_cache.MemoryCache(max_bytes=1024)
+    cache.put('small', block(1))
+    cache.put('big', block(2), 'intraday')
+    assert cache.get('big', kind='intraday') is None
+    assert cache.get('small') is not None  # nothing was evicted to make room
+    assert cache.stats()['classes']['intraday']['rejections'] == 1
+
+
+def test_get_with_accept_counts_a_miss_but_keeps_the_entry():
+    cache = memory_cache.MemoryCache(max_bytes=2**20)
+    cache.put('k', (1, block(1)))
+    assert cache.get('k', accept=lambda entry: entry[0] == 2) is None
+    assert cache.get('k', accept=lambda entry: entry[0] == 1) is not None
+    counts = cache.stats()['classes']['default']
+    assert counts['misses'] == 1 and counts['hits'] == 1
@@ -0,0 +1,61 @@
+import threading
+
+import metrics
+
+
+def test_stage_outside_collect_records_nothing():
+    assert not metrics.active()
+    with metrics.stage('fetch') as m:
+        m['rows'] = 10
+        metrics.annotate(cache='hit')
+
+
+def test_nested_stages_annotate_innermost():
+    with metrics.collect('chart', log=None) as records:
+        with metrics.stage('render') as outer:
+            with metrics.stage('fetch', rows=5):
+                metrics.annotate(cache='miss')
+            metrics.annotate(bytes=100)
+            outer['rows'] = 5
+    assert [r['stage'] for r in records] == ['fetch', 'render']  # in completion order
+    fetch, render = records
+    assert fetch['cache'] == 'miss' and 'bytes' not in fetch
+    assert render['bytes'] == 100 and 'cache' not in render
+    assert render['seconds'] >= fetch['seconds']
+    assert all(r['chart'] == 'chart' for r in records)
+
+
+def test_concurrent_collects_keep_separate_records():
+    barrier = threading.Barrier(2)
+    results = {}
+
+    def run(chart):
+        with metrics.collect(chart, log=None) as records:
+            for i in range(3):
+                with metrics.stage(f'{chart}-{i}'):
+                    barrier.wait(timeout=5)  # interleave the two threads' stages
+                    metrics.annotate(cache=chart)
+        results[chart] = records
+
+    threads = [threading.Thread(target=run, args=(chart,)) for chart in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for chart in ('a', 'b'):
+        assert [r['stage'] for r in results[chart]] == [f'{chart}-{i}' for i in range(3)]
+        assert all(r['chart'] == chart and r['cache'] == chart for r in results[chart])
+    assert not metrics.active()
+
+
+def test_log_and_summarize(tmp_path):
+    log = tmp_path / 'metrics.jsonl'
+    for cache in ('hit', 'miss', 'hit'):
+        with metrics.collect('chart', log=str(log)):
+            with metrics.stage('fetch', rows=3):
+                metrics.annotate(cache=cache)
+    summary = metrics.summarize(metrics.read(log))
+    fetch = summary['chart']['fetch']
+    assert fetch['count'] == 3 and fetch['rows'] == 3
+    assert fetch['hit_rate'] == 2 / 3
+    assert fetch['p50'] <= fetch['p95'] <= fetch['max']
@@ -0,0 +1,93 @@
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+import bar_cache
+import multi_fetch
+
+NOW = '2024-06-28 16:00'
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    rng = random.Random(0)
+    for attempt in range(10):
+        delays = [multi_fetch.backoff_delay(attempt, base=0.5, cap=8.0, rng=rng) for _ in range(200)]
+        assert 0 <= min(delays) and max(delays) <= min(8.0, 0.5 * 2 ** attempt)
+    assert max(delays) > 4.0  # jitter spans the capped range
+
+
+def test_fetch_many_retries_with_backoff():
+    provider = bar_cache.FakeProvider(now=NOW, fail_first=2)
+    sleeps = []
+    results = multi_fetch.fetch_many(['AAPL', 'MSFT', 'AAPL'], period='1mo', provider=provider,
+                                     retries=3, base_delay=0.5, sleep=sleeps.append)
+    assert list(results) == ['AAPL', 'MSFT']
+    assert all(r.frame is not None and r.error is None and r.attempts == 3 for r in results.values())
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.5 and 0 <= sleeps[1] <= 1.0
+
+
+def test_fetch_many_reports_failure_after_retries():
+    provider = bar_cache.FakeProvider(now=NOW, fail_first=100)
+    sleeps = []
+    results = multi_fetch.fetch_many(['AAPL', 'MSFT'], period='1mo', provider=provider, batch_size=1,
+                                     retries=2, sleep=sleeps.append)
+    for r in results.values():
+        assert r.frame is None and r.attempts == 3 and isinstance(r.error, ConnectionError)
+    assert len(sleeps) == 4  # two batches, two backoffs each
+    assert len(provider.calls) == 6
+
+
+def test_fetch_many_batches_in_input_order():
+    provider = bar_cache.FakeProvider(now=NOW)
+    symbols = [f"S{i}" for i in range(7)]
+    results = multi_fetch.fetch_many(symbols, period='5d', provider=provider, batch_size=3, max_workers=2)
+    assert list(results) == symbols
+    assert sorted(call[0] for call in provider.calls) == sorted(symbols)
+
+
+def result(symbol, dates):
+    index = pd.DatetimeIndex(dates, name='Date')
+    return multi_fetch.FetchResult(symbol, pd.DataFrame({'Close': np.arange(len(index), dtype=float)}, index=index),
+                                   0.0, 1, None)
+
+
+def test_align_reindexes_onto_union():
+    failed = multi_fetch.FetchResult('C', None, 0.0, 4, ConnectionError())
+    aligned = multi_fetch.align({
+        'A': result('A', ['2024-01-01', '2024-01-03']),
+        'B': result('B', ['2024-01-02', '2024-01-03']),
+        'C': failed,
+    })
+    union = pd.DatetimeIndex(['2024-01-01', '2024-01-02', '2024-01-03'])
+    assert (aligned['A'].frame.index == union).all() and (aligned['B'].frame.index == union).all()
+    np.testing.assert_array_equal(aligned['A'].frame['Close'], [0.0, np.nan, 1.0])
+    np.testing.assert_array_equal(aligned['B'].frame['Close'], [np.nan, 0.0, 1.0])
+    assert aligned['C'] is failed
+
+
+def test_align_without_frames():
+    failed = {'C': multi_fetch.FetchResult('C', None, 0.0, 1, LookupError())}
+    assert multi_fetch.align(failed) is failed
+
+
+class BulkProvider:
+    def __init__(self, latency):
+        self.latency = latency
+        self.bars = bar_cache.FakeProvider(now=NOW)
+
+    def history_many(self, symbols, interval, period=None, start=None):
+        time.sleep(self.latency)
+        return {symbol: self.bars.history(symbol, interval, period=period, start=start) for symbol in symbols}
+
+
+def test_latency_is_per_symbol():
+    symbols = ['A', 'B', 'C', 'D']
+    # One call per symbol: each result has its own call's time, not the batch's
+    per_symbol = multi_fetch.fetch_many(symbols, period='5d', provider=bar_cache.FakeProvider(now=NOW, latency=0.05))
+    # One bulk call: its time is shared by the batch
+    bulk = multi_fetch.fetch_many(symbols, period='5d', provider=BulkProvider(latency=0.2))
+    for r in [*per_symbol.values(), *bulk.values()]:
+        assert 0.045 <= r.latency < 0.15
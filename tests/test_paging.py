@@ -0,0 +1,49 @@
+import numpy as np
+
+import paging
+
+TIMES = np.arange(100, 200) * 60  # bars 6000, 6060, ... 11940
+
+
+def test_window_boundaries_are_inclusive():
+    index = paging.TimeIndex(TIMES)
+    assert index.window(6060, 6180) == slice(1, 4)
+    # Times between bars snap inwards
+    assert index.window(6061, 6179) == slice(2, 3)
+    assert index.window() == slice(0, 100)
+    assert index.window(end=6000) == slice(0, 1)
+    assert index.window(start=11940) == slice(99, 100)
+    # Outside the data: empty at the near end
+    assert index.window(0, 5999) == slice(0, 0)
+    assert index.window(20000, None) == slice(100, 100)
+
+
+def test_first_page_is_the_newest_bars():
+    index = paging.TimeIndex(TIMES)
+    assert paging.page_start(index, page_size=30) == 70
+    # The window stays put on reruns without a page request
+    assert paging.page_start(index, loaded_from=index.time_at(70), page_size=30) == 70
+
+
+def test_page_request_extends_the_window_back():
+    index = paging.TimeIndex(TIMES)
+    start = paging.page_start(index, index.time_at(70), before=index.time_at(70), page_size=30)
+    assert start == 40
+    # A wide visible range asks for more than a page
+    assert paging.page_start(index, index.time_at(40), before=index.time_at(40), bars=35, page_size=30) == 5
+    # A request for an already loaded range never shrinks the window
+    assert paging.page_start(index, index.time_at(40), before=index.time_at(90), page_size=30) == 40
+
+
+def test_last_page_stops_at_the_oldest_bar():
+    index = paging.TimeIndex(TIMES)
+    assert paging.page_start(index, index.time_at(5), before=index.time_at(5), page_size=30) == 0
+    assert paging.page_start(index, index.time_at(0), before=index.time_at(0), page_size=30) == 0
+
+
+def test_window_wider_than_the_data():
+    index = paging.TimeIndex(TIMES)
+    assert paging.page_start(index, page_size=1000) == 0
+    assert paging.page_start(index, index.time_at(0), before=index.time_at(50), bars=5000) == 0
+    empty = paging.TimeIndex(np.array([], dtype=np.int64))
+    assert paging.page_start(empty) == 0 and empty.window() == slice(0, 0)
@@ -0,0 +1,47 @@
+import numpy as np
+
+import bar_cache
+import payload_cache
+
+NOW = '2024-06-28 16:00'
+
+
+def key(symbol='AAPL', interval='1d'):
+    return payload_cache.PayloadKey('chart', 'fake', symbol, interval, '6mo', (6, 12, 5))
+
+
+def test_hit_only_for_the_same_key_and_version():
+    cache = payload_cache.PayloadCache()
+    cache.put(key(), (1, 'a'), ['series'])
+    assert cache.get(key(), (1, 'a')) == ['series']
+    assert cache.get(key(), (2, 'a')) is None
+    assert cache.get(key('MSFT'), (1, 'a')) is None
+    # A new version replaces the entry
+    cache.put(key(), (2, 'a'), ['newer'])
+    assert cache.get(key(), (1, 'a')) is None
+    assert cache.get(key(), (2, 'a')) == ['newer']
+
+
+def test_invalidate_per_symbol():
+    cache = payload_cache.PayloadCache()
+    cache.put(key('AAPL'), 1, ['a'])
+    cache.put(key('MSFT'), 1, ['m'])
+    cache.invalidate(symbol='AAPL')
+    assert cache.get(key('AAPL'), 1) is None
+    assert cache.get(key('MSFT'), 1) == ['m']
+
+
+class GappyProvider(bar_cache.FakeProvider):
+    # The last bar has no volume yet, like a bar still forming
+    def history(self, *args, **kwargs):
+        df = super().history(*args, **kwargs)
+        df['Volume'] = df['Volume'].astype(float)
+        df.iloc[-1, df.columns.get_loc('Volume')] = np.nan
+        return df
+
+
+def test_version_with_nan_in_last_bar_still_hits(tmp_path):
+    bars = bar_cache.BarCache(GappyProvider(now=NOW), bar_cache.BarStore(str(tmp_path)))
+    cache = payload_cache.PayloadCache()
+    cache.put(key(), bars.version('AAPL', '1d', '6mo'), ['series'])
+    assert cache.get(key(), bars.version('AAPL', '1d', '6mo')) == ['series']
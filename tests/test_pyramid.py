@@ -0,0 +1,90 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import pyramid
+
+
+def bars(step, count, start=1_700_000_040):
+    times = start - start % step + step * np.arange(count, dtype=np.int64)
+    close = np.arange(count, dtype=float)
+    return pd.DataFrame({'time': times, 'open': close, 'high': close + 1,
+                         'low': close - 1, 'close': close, 'volume': np.ones(count)})
+
+
+def expected(frame, width):
+    """Reference bucketing straight from the base bars."""
+    return frame.groupby(frame['time'] - frame['time'] % width, sort=True).agg(
+        pyramid.OHLCV_AGG).reset_index()
+
+
+def test_pyramid_levels_match_base_bucketing():
+    frame = bars(60, 3000)
+    built = pyramid.Pyramid.build(frame)
+    assert built.labels == ['1m', '5m', '15m', '1h', '1d']
+    for label, width in pyramid.LEVELS.items():
+        pd.testing.assert_frame_equal(built.level(label), expected(frame, width),
+                                      check_dtype=False)
+
+
+def test_pyramid_skips_levels_base_bars_would_straddle():
+    widths = {**pyramid.LEVELS, '10m': 600}
+    for step, labels in ((120, {'120s', '10m', '1h', '1d'}), (600, {'10m', '1h', '1d'})):
+        frame = bars(step, 2000)
+        built = pyramid.Pyramid.build(frame, widths=widths)
+        assert set(built.labels) == labels  # no 5m/15m: base bars cross their buckets
+        for label in labels & set(widths):
+            pd.testing.assert_frame_equal(built.level(label), expected(frame, widths[label]),
+                                          check_dtype=False)
+            assert built.level(label)['volume'].sum() == len(frame)
+
+
+def test_pyramid_cache_builds_once_per_source_version():
+    cache = pyramid.PyramidCache()
+    builds = []
+
+    def build(name):
+        def run():
+            builds.append(name)
+            return name
+        return run
+
+    assert cache.get('a.csv', 1, build('a1')) == 'a1'
+    assert cache.get('a.csv', 1, build('again')) == 'a1'
+    assert cache.get('a.csv', 2, build('a2')) == 'a2'
+    assert cache.get('b.csv', 1, build('b1')) == 'b1'
+    assert builds == ['a1', 'a2', 'b1']
+    assert len(cache) == 2  # a new version replaces the old pyramid
+
+
+def test_pyramid_cache_ttl():
+    now = [0.0]
+    cache = pyramid.PyramidCache(clock=lambda: now[0])
+    assert cache.get('url', None, lambda: 1, ttl=10) == 1
+    now[0] = 5
+    assert cache.get('url', None, lambda: 2, ttl=10) == 1
+    now[0] = 10
+    assert cache.get('url', None, lambda: 3, ttl=10) == 3
+
+
+def test_pyramid_cache_locks_per_source():
+    cache = pyramid.PyramidCache()
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return 'slow'
+
+    thread = threading.Thread(target=cache.get, args=('big.csv', 1, slow))
+    thread.start()
+    started.wait(5)
+    start = time.perf_counter()
+    assert cache.get('small.csv', 1, lambda: 'small') == 'small'  # not held up by big.csv
+    assert time.perf_counter() - start < 1
+    release.set()
+    thread.join()
+    assert cache.get('big.csv', 1, lambda: 'rebuilt') == 'slow'
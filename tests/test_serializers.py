@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+import serializers
+import transport
+
+
+def frame():
+    return pd.DataFrame({
+        'time': pd.to_datetime(['2024-01-02 09:30', '2024-01-02 09:31', '2024-01-02 09:32']),
+        'open': np.array([100.01, 101.5, 99.0], dtype=np.float32),
+        'close': np.array([101.0, 100.25, 99.5], dtype=np.float32),
+        'volume': [1200.0, np.nan, 800.0],
+    })
+
+
+def test_color_codes_pick_first_true_condition():
+    codes = serializers.color_codes([True, False, True, False], [True, True, False, False])
+    assert codes.dtype == np.uint8
+    assert codes.tolist() == [1, 2, 1, 0]
+
+
+def test_line_columns_pack_to_typed_payload():
+    df = frame()
+    colors = serializers.color_codes(df['open'].to_numpy() > df['close'].to_numpy())
+    columns = serializers.frame_line_columns(df, 'volume', colors=colors)
+    buffers = transport.Buffers(False)
+    packed = columns.pack(buffers)
+    blob = buffers.blob()
+
+    assert packed == {
+        'length': 3,
+        'time': {'dtype': 'int32', 'offset': 0, 'kind': 'seconds'},
+        'columns': {'value': {'dtype': 'float64', 'offset': 16},
+                    'color': {'dtype': 'uint8', 'offset': 40}},
+        'extras': {},
+    }
+    assert np.frombuffer(blob, np.int32, 3, 0).tolist() == [1704187800, 1704187860, 1704187920]
+    np.testing.assert_array_equal(np.frombuffer(blob, np.float64, 3, 16), [1200.0, np.nan, 800.0])
+    assert np.frombuffer(blob, np.uint8, 3, 40).tolist() == [0, 1, 0]
+    # The NaN volume is a whitespace point, keeping its color
+    assert transport.unpack(packed, blob) == [
+        {'time': 1704187800, 'value': 1200.0, 'color': 0},
+        {'time': 1704187860, 'color': 1},
+        {'time': 1704187920, 'value': 800.0, 'color': 0},
+    ]
+
+
+def test_float32_prices_pack_as_their_decimals():
+    df = frame()
+    columns = serializers.frame_ohlc_columns(df, columns=('open', 'open', 'close', 'close'))
+    buffers = transport.Buffers(False)
+    packed = columns.pack(buffers)
+    assert packed['columns']['open']['dtype'] == 'float64'
+    assert [r['open'] for r in transport.unpack(packed, buffers.blob())] == [100.01, 101.5, 99.0]
+    assert [r['close'] for r in columns.records()] == [101.0, 100.25, 99.5]
+
+
+def test_columns_records_match_record_serializers():
+    df = frame()
+    colors = serializers.color_codes(df['volume'].to_numpy() > 1000)
+    assert serializers.frame_ohlc_columns(df, columns=('open', 'open', 'close', 'close')).records() == \
+        serializers.frame_ohlc_records(df, columns=('open', 'open', 'close', 'close'))
+    records = serializers.frame_line_records(df, 'volume', colors=colors)
+    del records[1]['value']  # None in a record list, left out of a Columns point
+    assert serializers.frame_line_columns(df, 'volume', colors=colors).records() == records
+
+
+def test_columns_slice_locate_and_digest():
+    columns = serializers.frame_line_columns(frame(), 'close')
+    tail = columns[1:]
+    assert len(tail) == 2 and tail.time_at(0) == 1704187860
+    assert columns.locate(1704187860) == 1 and columns.locate(1704187861) == 2
+    assert columns[:2].digest() == serializers.frame_line_columns(frame()[:2], 'close').digest()
+    assert columns.digest() != tail.digest()
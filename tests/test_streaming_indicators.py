@@ -0,0 +1,109 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import streaming_indicators as si
+
+
+def macd_engine():
+    return si.IndicatorEngine([si.MACD(12, 26, 9)])
+
+
+def bars(n, seed=0):
+    closes = 100 + np.cumsum(np.random.default_rng(seed).normal(size=n))
+    return pd.Series(pd.date_range('2024-01-01', periods=n, freq='min')), closes
+
+
+def looped(times, closes):
+    return macd_engine().run(si.to_epoch_ns(times).tolist(), list(closes)).to_numpy()
+
+
+def test_run_batch_matches_loop():
+    times, closes = bars(500)
+    ns = si.to_epoch_ns(times)
+    loop, batch = macd_engine(), macd_engine()
+    expected = loop.run(ns.tolist(), closes.tolist())
+    result = batch.run_batch(ns, closes)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-12, equal_nan=True)
+    assert batch.state()['last_time'] == loop.state()['last_time']
+    # Both leave the last bar provisional: re-feeding it with another close agrees
+    assert batch.update(ns[-1].item(), 90.0) == pytest.approx(loop.update(ns[-1].item(), 90.0))
+
+
+def test_run_batch_falls_back_on_gaps():
+    times, closes = bars(100)
+    closes[40] = np.nan
+    ns = si.to_epoch_ns(times)
+    np.testing.assert_allclose(macd_engine().run_batch(ns, closes).to_numpy(), looped(times, closes), equal_nan=True)
+
+
+def test_compute_appends_and_reuses(tmp_path):
+    store = si.IndicatorStore(str(tmp_path))
+    key = ('X', '1m', 'MACD_12_26_9')
+    times, closes = bars(300)
+    store.compute(key, macd_engine, times[:200], closes[:200])
+
+    # A rerun over the same bars writes nothing
+    before = {name: os.stat(tmp_path / name).st_mtime_ns for name in os.listdir(tmp_path)}
+    store.compute(key, macd_engine, times[:200], closes[:200])
+    assert {name: os.stat(tmp_path / name).st_mtime_ns for name in os.listdir(tmp_path)} == before
+
+    # New bars, then a changed provisional bar, land in segments and match a full run
+    result = store.compute(key, macd_engine, times, closes)
+    np.testing.assert_allclose(result.to_numpy(), looped(times, closes), equal_nan=True)
+    closes[-1] += 5
+    result = store.compute(key, macd_engine, times, closes)
+    np.testing.assert_allclose(result.to_numpy(), looped(times, closes), equal_nan=True)
+    assert len(store.read(key)[1]['segments']) == 2
+
+
+def test_compute_is_thread_safe(tmp_path):
+    store = si.IndicatorStore(str(tmp_path))
+    times, closes = bars(2000)
+    errors = []
+
+    def compute():
+        try:
+            store.compute(('Y', '1m', 'MACD_12_26_9'), macd_engine, times, closes)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=compute) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def reference_ema(close, length):
+    # pandas_ta's ema: SMA of the first ``length`` values as the seed, then ewm(adjust=False)
+    seeded = close.copy()
+    seeded.iloc[:length - 1] = np.nan
+    seeded.iloc[length - 1] = close.iloc[:length].mean()
+    return seeded.ewm(span=length, adjust=False).mean()
+
+
+def reference_macd(close, fast=12, slow=26, signal=9):
+    macd = reference_ema(close, fast) - reference_ema(close, slow)
+    signal_line = reference_ema(macd.dropna(), signal).reindex(macd.index)
+    return pd.DataFrame({
+        f'MACD_{fast}_{slow}_{signal}': macd,
+        f'MACDh_{fast}_{slow}_{signal}': macd - signal_line,
+        f'MACDs_{fast}_{slow}_{signal}': signal_line,
+    })
+
+
+def test_compute_recomputes_a_window_that_starts_elsewhere(tmp_path):
+    store = si.IndicatorStore(str(tmp_path))
+    key = ('Z', '1d', '6mo', 'MACD_12_26_9')
+    times, closes = bars(400)
+    # The window moves on by a few bars; then an older, wider window asks for the same key
+    for start, stop in [(0, 300), (5, 305), (0, 305), (0, 310)]:
+        result = store.compute(key, macd_engine, times[start:stop], closes[start:stop])
+        expected = reference_macd(pd.Series(closes[start:stop], index=result.index))
+        np.testing.assert_allclose(result.to_numpy(), expected[result.columns].to_numpy(), rtol=1e-10, equal_nan=True)
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import time_axis
+
+NY = 'America/New_York'
+
+
+def test_epoch_seconds_round_trip_across_dst_start():
+    # 00:00 EST, 01:00 EST, then 03:00 EDT: the clocks skip 02:00
+    times = pd.date_range('2024-03-10 05:00', periods=3, freq='h', tz='UTC').tz_convert(NY)
+    seconds = time_axis.validate(time_axis.epoch_seconds(times))
+    assert np.diff(seconds).tolist() == [3600, 7200]
+    wall = pd.to_datetime(seconds, unit='s')
+    assert wall.strftime('%H:%M').tolist() == ['00:00', '01:00', '03:00']
+    assert (wall.tz_localize(NY) == times).all()
+    np.testing.assert_array_equal(time_axis.epoch_seconds(wall, tz=NY, display_tz=NY), seconds)
+
+
+def test_repeated_wall_hour_at_dst_end_is_rejected():
+    # 01:00 EDT and 01:00 EST are one hour apart but show the same wall time
+    times = pd.date_range('2024-11-03 05:00', periods=2, freq='h', tz='UTC').tz_convert(NY)
+    seconds = time_axis.epoch_seconds(times)
+    assert time_axis.check(seconds) == (1, 0)
+    with pytest.raises(ValueError, match='1 duplicate'):
+        time_axis.validate(seconds)
+    # Shown in UTC they stay distinct
+    assert np.diff(time_axis.epoch_seconds(times, display_tz='UTC')).tolist() == [3600]
+
+
+def test_naive_input():
+    naive = pd.to_datetime(['2024-01-02 09:30', '2024-07-02 09:30'])
+    # Read as wall-clock time as is
+    assert time_axis.epoch_seconds(naive).tolist() == [1704187800, 1719912600]
+    # Or as NY time, shown in UTC (EST is UTC-5, EDT is UTC-4)
+    assert time_axis.epoch_seconds(naive, tz=NY, display_tz='UTC').tolist() == [1704205800, 1719927000]
+    # A tz without display_tz leaves naive input alone
+    assert time_axis.epoch_seconds(naive, tz=NY).tolist() == [1704187800, 1719912600]
+
+
+def test_missing_times_raise():
+    with pytest.raises(ValueError, match='1 missing'):
+        time_axis.epoch_seconds(pd.to_datetime(['2024-01-02', None]))
+
+
+def test_business_days():
+    times = pd.to_datetime(['2024-01-02 16:00', '2024-01-03 16:00']).tz_localize(NY)
+    assert time_axis.business_days(times).tolist() == ['2024-01-02', '2024-01-03']
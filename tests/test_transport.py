@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import transport
+
+
+def roundtrip(records, inline=False, value_dtype='float64'):
+    buffers = transport.Buffers(inline)
+    packed = transport.pack_records(records, buffers, value_dtype)
+    return packed, transport.unpack(packed, buffers.blob())
+
+
+def test_float32_values_roundtrip_at_float32_precision():
+    records = [{'time': 1700000000 + 60 * i, 'value': 100.0 + i / 3} for i in range(5)]
+    packed, result = roundtrip(records, value_dtype='float32')
+    assert packed['columns']['value']['dtype'] == 'float32'
+    assert [r['time'] for r in result] == [r['time'] for r in records]
+    assert [r['value'] for r in result] == pytest.approx([r['value'] for r in records], rel=1e-7)
+
+
+def test_int_columns_and_missing_values():
+    records = [{'time': 1, 'value': 1.5, 'color': 0}, {'time': 2, 'value': None, 'color': 2},
+               {'time': 3, 'value': 2.5, 'color': 1}]
+    packed, result = roundtrip(records)
+    assert packed['columns']['color']['dtype'] == 'uint8'
+    assert result == [{'time': 1, 'value': 1.5, 'color': 0}, {'time': 2, 'color': 2},
+                      {'time': 3, 'value': 2.5, 'color': 1}]
+
+    wide = [{'time': 1, 'volume': 70_000}, {'time': 2, 'volume': 3}]
+    packed, result = roundtrip(wide)
+    assert packed['columns']['volume']['dtype'] == 'int32'
+    assert result == wide
+
+
+@pytest.mark.parametrize('times, kind, dtype', [
+    ([1700000000, 1700000060], 'seconds', 'int32'),
+    ([1e10, 1e10 + 60], 'seconds', 'float64'),
+    (['2024-01-02', '2024-01-03'], 'date', 'int32'),
+])
+def test_time_columns(times, kind, dtype):
+    records = [{'time': t, 'value': 1.0} for t in times]
+    packed, result = roundtrip(records)
+    assert (packed['time']['kind'], packed['time']['dtype']) == (kind, dtype)
+    assert [r['time'] for r in result] == times
+
+
+def test_datetime64_times_become_unix_seconds():
+    buffers = transport.Buffers(False)
+    times = np.array(['2024-01-02T09:30', '2024-01-02T09:31'], dtype='datetime64[m]')
+    packed = transport.pack_columns(times, {'value': np.array([1.0, 2.0])}, buffers)
+    assert [r['time'] for r in transport.unpack(packed, buffers.blob())] == [1704187800, 1704187860]
+
+
+def test_identical_buffers_are_stored_once():
+    buffers = transport.Buffers(False)
+    times = np.arange(100, dtype=np.int64) * 60 + 1700000000
+    a = transport.pack_columns(times, {'value': np.arange(100.0)}, buffers)
+    b = transport.pack_columns(times, {'value': np.arange(100.0) * 2}, buffers)
+    assert a['time'] == b['time']
+    assert len(buffers.blob()) == 100 * 4 + 2 * 100 * 8
+    assert [r['value'] for r in transport.unpack(b, buffers.blob())] == (np.arange(100.0) * 2).tolist()
+
+
+def test_inline_base64_needs_no_blob():
+    records = [{'time': 1, 'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5, 'color': '#fff'}]
+    packed, result = roundtrip(records, inline=True)
+    assert all('b64' in spec for spec in [packed['time'], *packed['columns'].values()])
+    assert packed['extras'] == {'color': ['#fff']}
+    assert result == records